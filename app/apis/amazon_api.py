@@ -1,170 +1,686 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db, engine, SessionLocal
-from app.models import amazon_models
-from app.models.amazon_models import Amazon, AmazonPrice, AmazonDeliverable, AmazonDiscount  # Updated imports
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_amazon_async_db, get_async_session_factory, pool_status, stop_warm_up, warm_up_pool
+from app.cache import TTLCache, invalidate_on_change, load_row, load_rows, row_tags, table_tags
+from app.pricing import assign_price_ids
+from app.seeding import SEED_ON_STARTUP, bulk_seed, prepare_store
+from app.titles import backfill_normalized_titles, normalize_title, prefix_bounds
+from app.suggest import SuggestIndex
+from app.fuzzy_search import DEFAULT_MIN_SCORE, TrigramIndex
+from app.delivery import DeliveryIndex, normalize_pincode
+from app.compare import OFFER_MIN_SCORE
+from app.responses import FastJSONResponse, PreEncodedJSONResponse, encode_json
+from app.http_cache import conditional_response, entity_tag, row_modified
+from app.inventory import (
+    InsufficientStock, InventoryBusy, ReservationError, ReservationNotFound, seed_inventory, stock_ledger_for
+)
+from app.discount_tiers import DiscountTierError, DiscountTiers
+from app.models.amazon_models import Amazon, AmazonPrice, AmazonDeliverable, AmazonDiscount, AmazonInventory, AmazonReservation  # Updated imports
 from app.schemas.amazon_schemas import (
     AMAZON_SEED_DATA,
     AMAZON_PRICE_SEED_DATA,  # Updated import names
     AMAZON_DELIVERABLE_SEED_DATA,  # Updated import names
     AMAZON_DISCOUNT_SEED_DATA  # Updated import names
 )
+from app.schemas.common_schemas import EXPORT_BATCH_SIZE, MAX_BATCH_SIZE, MAX_PAGE_SIZE, DeliveryBatchRequest, PriceBatchRequest, QuoteRequest, ReserveRequest
 from typing import Optional
-import random
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(default_response_class=FastJSONResponse)
+
+STORE_MODELS = (Amazon, AmazonPrice, AmazonDeliverable, AmazonDiscount, AmazonInventory, AmazonReservation)
+
+def seed_amazon_database(db):
+    """Seed the Amazon database with initial data, one bulk insert per empty table"""
+    for model, rows in (
+        (Amazon, AMAZON_SEED_DATA),
+        (AmazonPrice, AMAZON_PRICE_SEED_DATA),
+        (AmazonDeliverable, AMAZON_DELIVERABLE_SEED_DATA),
+        (AmazonDiscount, AMAZON_DISCOUNT_SEED_DATA),
+    ):
+        bulk_seed(db, model, rows)
+    db.flush()
+
+    # Backfill lookup columns for books written before they existed
+    backfill_normalized_titles(db, Amazon)
+
+    # Materialize the product -> price mapping for books that lack one
+    assign_price_ids(db, Amazon, AmazonPrice)
 
-router = APIRouter()
+    # Stock for books that have no inventory row yet
+    seed_inventory(db, Amazon, AmazonInventory)
+    logger.info("Amazon database seeded successfully")
 
-def seed_amazon_database():
-    """Seed the Amazon database with initial data"""
-    db = SessionLocal()
+@router.on_event("startup")
+def prepare_amazon_database():
+    """Create tables and seed data once per seed version, before the indexes are built"""
+    if not SEED_ON_STARTUP:
+        return
     try:
-        # Check if data already exists
-        if db.query(Amazon).count() == 0:
-            # Seed Amazon products
-            for item in AMAZON_SEED_DATA:
-                amazon_product = Amazon(**item)
-                db.add(amazon_product)
-
-        if db.query(AmazonPrice).count() == 0:  # Updated class name
-            # Seed Amazon Prices
-            for item in AMAZON_PRICE_SEED_DATA:  # Updated variable name
-                amazon_price = AmazonPrice(**item)  # Updated class name
-                db.add(amazon_price)
-
-        if db.query(AmazonDeliverable).count() == 0:  # Updated class name
-            # Seed Amazon Deliverables
-            for item in AMAZON_DELIVERABLE_SEED_DATA:  # Updated variable name
-                amazon_deliverable = AmazonDeliverable(**item)  # Updated class name
-                db.add(amazon_deliverable)
-
-        if db.query(AmazonDiscount).count() == 0:  # Updated class name
-            # Seed Amazon Discounts
-            for item in AMAZON_DISCOUNT_SEED_DATA:  # Updated variable name
-                amazon_discount = AmazonDiscount(**item)  # Updated class name
-                db.add(amazon_discount)
-
-        db.commit()
-        print("Amazon database seeded successfully!")
-
-    except Exception as e:
-        print(f"Error seeding Amazon database: {e}")
-        db.rollback()
-    finally:
-        db.close()
-
-# Create Amazon database tables and seed data
-amazon_models.Base.metadata.create_all(bind=engine)
-seed_amazon_database()
+        prepare_store("amazon", STORE_MODELS, seed_amazon_database)
+    except Exception:
+        logger.exception("Error seeding Amazon database")
+
+# Never changes, so it is encoded once
+ROOT_PAYLOAD = encode_json({"message": "Amazon Management System API - All endpoints ready!"})
 
 @router.get("/")
 async def amazon_root():
-    return {"message": "Amazon Management System API - All endpoints ready!"}
+    return PreEncodedJSONResponse(ROOT_PAYLOAD)
+
+# Per-process read-through cache for the rarely changing catalog tables
+catalog_cache = TTLCache("amazon")
+CACHED_TABLES = {Amazon.__tablename__, AmazonPrice.__tablename__, AmazonDiscount.__tablename__}
+invalidate_on_change(catalog_cache, Amazon, AmazonPrice, AmazonDiscount)
+
+# In-memory search indexes: typeahead over names, publishers and subject
+# codes, and typo-tolerant trigram search over names
+suggest_index = SuggestIndex()
+suggest_index.track(Amazon)
+title_index = TrigramIndex()
+title_index.track(Amazon)
+
+# Pincode -> delivery time lookups, reloaded whenever the table changes
+delivery_index = DeliveryIndex()
+delivery_index.track(AmazonDeliverable)
+
+# Stock levels and reservations, optionally sold from in-memory counters
+# for hot books (INVENTORY_MODE=sharded)
+stock_ledger = stock_ledger_for("amazon", AmazonInventory, AmazonReservation)
+
+
+@router.on_event("startup")
+async def warm_up_connections():
+    await warm_up_pool("amazon")
+
+
+@router.on_event("shutdown")
+async def stop_warming_up():
+    await stop_warm_up("amazon")
+
+
+@router.on_event("startup")
+async def build_search_indexes():
+    # An index left unbuilt is built by the first request that needs it
+    try:
+        session_factory = get_async_session_factory("amazon")
+        await suggest_index.refresh(session_factory, Amazon)
+        await title_index.refresh(session_factory, Amazon)
+        await delivery_index.refresh(session_factory, AmazonDeliverable)
+    except Exception:
+        logger.exception("Error building Amazon search indexes")
+
+
+@router.on_event("startup")
+async def start_inventory():
+    await stock_ledger.start(get_async_session_factory("amazon"))
+
+
+@router.on_event("shutdown")
+async def stop_inventory():
+    await stock_ledger.stop()
+
+
+async def fetch_product(db: AsyncSession, id=None, name=None):
+    """
+    Cached lookup of a book by id, or by name when no id is given. Names
+    match case- and whitespace-insensitively through name_normalized.
+    """
+    if id is not None:
+        key, stmt = ("product_id", id), select(Amazon).where(Amazon.id == id)
+    else:
+        normalized = normalize_title(name)
+        key = ("product_name", normalized)
+        stmt = select(Amazon).where(Amazon.name_normalized == normalized).order_by(Amazon.id).limit(1)
+    return await catalog_cache.get_or_load(key, lambda: load_row(db, stmt), tags=row_tags)
+
+
+async def fetch_products_bulk(db: AsyncSession, ids=(), names=()):
+    """
+    Cached lookup of many books by id and/or name (matched like
+    fetch_product). Cache misses are loaded with a single IN (...) query.
+    Returns (by_id, by_name) dicts keyed by the requested values.
+    """
+    by_id, by_name = {}, {}
+    missing_ids, missing_names = [], {}
+    for id in ids:
+        found, product = catalog_cache.get(("product_id", id))
+        if found:
+            by_id[id] = product
+        else:
+            missing_ids.append(id)
+    for name in names:
+        normalized = normalize_title(name)
+        found, product = catalog_cache.get(("product_name", normalized))
+        if found:
+            by_name[name] = product
+        else:
+            missing_names.setdefault(normalized, []).append(name)
+
+    if missing_ids or missing_names:
+        conditions = []
+        if missing_ids:
+            conditions.append(Amazon.id.in_(missing_ids))
+        if missing_names:
+            conditions.append(Amazon.name_normalized.in_(missing_names))
+
+        for product in await load_rows(db, select(Amazon).where(or_(*conditions)).order_by(Amazon.id)):
+            catalog_cache.set(("product_id", product.id), product, row_tags(product))
+            by_id.setdefault(product.id, product)
+            requested = missing_names.pop(product.name_normalized, ())
+            if requested:
+                catalog_cache.set(("product_name", product.name_normalized), product, row_tags(product))
+            for name in requested:
+                by_name[name] = product
+
+    return by_id, by_name
+
+
+async def fetch_price_count(db: AsyncSession):
+    return await catalog_cache.get_or_load(
+        ("price_count",),
+        lambda: db.scalar(select(func.count()).select_from(AmazonPrice)),
+        tags=table_tags(AmazonPrice.__tablename__)
+    )
+
+
+async def resolve_price_ids(db: AsyncSession, products):
+    """
+    Price id for each book: the stored price reference, or the legacy
+    modulo mapping for rows that have not been backfilled yet.
+    """
+    price_ids = {product.id: product.price_id for product in products if product.price_id}
+    legacy = [product for product in products if not product.price_id]
+    if legacy:
+        price_count = await fetch_price_count(db)
+        if price_count:
+            price_ids.update({product.id: (product.id % price_count) + 1 for product in legacy})
+    return price_ids
+
+
+async def fetch_price_rows_bulk(db: AsyncSession, products):
+    """
+    Cached price rows for many books, keyed by book id. Cache misses are
+    loaded with a single IN (...) query; books without a price are left out.
+    """
+    price_ids = await resolve_price_ids(db, products)
+    prices, missing = {}, []
+    for price_id in set(price_ids.values()):
+        found, price_obj = catalog_cache.get(("price", price_id))
+        if found:
+            prices[price_id] = price_obj
+        else:
+            missing.append(price_id)
+
+    if missing:
+        for price_obj in await load_rows(db, select(AmazonPrice).where(AmazonPrice.id.in_(missing))):
+            catalog_cache.set(("price", price_obj.id), price_obj, row_tags(price_obj))
+            prices[price_obj.id] = price_obj
+
+    return {
+        product_id: prices[price_id]
+        for product_id, price_id in price_ids.items()
+        if price_id in prices
+    }
+
+
+async def fetch_unit_prices_bulk(db: AsyncSession, products):
+    """Cached unit prices for many books, keyed by book id"""
+    price_rows = await fetch_price_rows_bulk(db, products)
+    return {product_id: price_obj.price for product_id, price_obj in price_rows.items()}
+
+
+async def fetch_price_row(db: AsyncSession, product):
+    """Cached price row of a book via its stored price reference"""
+    price_rows = await fetch_price_rows_bulk(db, [product])
+    if product.id not in price_rows:
+        raise HTTPException(status_code=404, detail="Price not found")
+
+    return price_rows[product.id]
+
+
+async def fetch_unit_price(db: AsyncSession, product):
+    """Cached unit price for a book via its stored price reference"""
+    return (await fetch_price_row(db, product)).price
+
+
+async def load_discount_tiers(db: AsyncSession):
+    try:
+        discount_tiers = DiscountTiers(await load_rows(db, select(AmazonDiscount)))
+    except DiscountTierError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if discount_tiers.gaps:
+        logger.warning("Amazon discount tiers have gaps with no discount: %s", discount_tiers.gaps)
+    return discount_tiers
+
+
+async def fetch_discount_tiers(db: AsyncSession):
+    """Validated discount tiers, loaded once and reused until the table changes"""
+    return await catalog_cache.get_or_load(
+        ("discount_tiers",),
+        lambda: load_discount_tiers(db),
+        tags=table_tags(AmazonDiscount.__tablename__)
+    )
+
+
+async def find_offer(db: AsyncSession, name, quantity=1):
+    """
+    This store's offer for a title, as used by the cross-store comparison:
+    the book named 'name' (or failing that the best fuzzy title match)
+    priced for 'quantity' copies after the discount tier. None when the
+    store has no such book or no price for it.
+    """
+    product, match = await fetch_product(db, name=name), "exact"
+    if not product:
+        await title_index.ready(get_async_session_factory("amazon"), Amazon)
+        hits = title_index.search(name, limit=1, min_score=OFFER_MIN_SCORE)
+        product, match = (await fetch_product(db, id=hits[0]["id"]) if hits else None), "fuzzy"
+    if not product:
+        return None
+
+    unit_prices = await fetch_unit_prices_bulk(db, [product])
+    if product.id not in unit_prices:
+        return None
+
+    unit_price = unit_prices[product.id]
+    total_price = unit_price * quantity
+    percent = (await fetch_discount_tiers(db)).percent_off(total_price)
+    reduced_amount = (percent / 100) * total_price
+    return {
+        "id": product.id,
+        "name": product.name,
+        "store_product_id": product.amazon_id,
+        "match": match,
+        "quantity": quantity,
+        "unit_price": round(unit_price, 2),
+        "total_price": round(total_price, 2),
+        "discount_percent": percent,
+        "payable_amount": round(total_price - reduced_amount, 2)
+    }
+
+
+async def store_offer(name, quantity=1):
+    """find_offer in a session of its own, for callers outside this router's requests"""
+    async with get_async_session_factory("amazon")() as db:
+        return await find_offer(db, name, quantity)
 
 
 @router.get("/id_or_name")
+@router.head("/id_or_name")
 async def id_or_name_lookup(
+    request: Request,
     id: Optional[int] = None,
     name: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_amazon_async_db)
 ):
     """
     Return product name given the ID, or ID given the name.
     At least one of the parameters ('id' or 'name') is required.
+    Conditional: answers 304 when If-None-Match / If-Modified-Since match.
     """
-    if not id and not name:
+    if id is None and not name:
         raise HTTPException(status_code=400, detail="Provide either 'id' or 'name'")
 
-    if id:
-        product = db.query(Amazon).filter(Amazon.id == id).first()
-        if not product:
-            raise HTTPException(status_code=404, detail="Product not found")
-        return {"id": product.id, "name": product.name}
+    product = await fetch_product(db, id=id, name=name)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
 
-    if name:
-        product = db.query(Amazon).filter(Amazon.name == name).first()
-        if not product:
-            raise HTTPException(status_code=404, detail="Product not found")
-        return {"id": product.id, "name": product.name}
+    modified = row_modified(product)
+    return conditional_response(
+        request, "id_or_name",
+        entity_tag(product.id, product.name, modified),
+        modified,
+        {"id": product.id, "name": product.name}
+    )
+
+# Columns of the /books listing and export, by response key
+BOOK_FIELDS = {
+    "id": Amazon.id,
+    "amazon_id": Amazon.amazon_id,
+    "name": Amazon.name,
+    "publisher": Amazon.publisher,
+    "genre": Amazon.genre,
+    "subject_code": Amazon.subject_code,
+    "serial_number": Amazon.serial_number,
+    "created_at": Amazon.created_at,
+}
+
+
+def books_query(genre=None, publisher=None, subject_code=None):
+    """Books in id order, optionally filtered on an exact genre, publisher and subject code"""
+    stmt = select(*BOOK_FIELDS.values()).order_by(Amazon.id)
+    for column, value in ((Amazon.genre, genre), (Amazon.publisher, publisher), (Amazon.subject_code, subject_code)):
+        if value is not None:
+            stmt = stmt.where(column == value)
+    return stmt
+
+
+@router.get("/books")
+async def list_books(
+    after: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    genre: Optional[str] = None,
+    publisher: Optional[str] = None,
+    subject_code: Optional[str] = None,
+    db: AsyncSession = Depends(get_amazon_async_db)
+):
+    """
+    One page of books with id greater than 'after', in id order. Pass the
+    returned 'next_after' as 'after' to get the next page; it is null on
+    the last one. Every page is an index range scan from the cursor, so
+    deep pages cost the same as the first.
+    """
+    rows = (await db.execute(
+        books_query(genre, publisher, subject_code).where(Amazon.id > after).limit(limit)
+    )).all()
+    books = [dict(zip(BOOK_FIELDS, row)) for row in rows]
+    return FastJSONResponse({
+        "books": books,
+        "next_after": books[-1]["id"] if len(books) == limit else None
+    })
+
+
+@router.get("/books/export")
+async def export_books(
+    genre: Optional[str] = None,
+    publisher: Optional[str] = None,
+    subject_code: Optional[str] = None
+):
+    """
+    Every matching book as NDJSON, one object per line in id order. Rows
+    come from a server-side cursor EXPORT_BATCH_SIZE at a time and are sent
+    as they are read, so memory stays flat however many books there are.
+    """
+    stmt = books_query(genre, publisher, subject_code).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    async def ndjson():
+        async with get_async_session_factory("amazon")() as db:
+            result = await db.stream(stmt)
+            async for rows in result.partitions():
+                yield b"".join(encode_json(dict(zip(BOOK_FIELDS, row))) + b"\n" for row in rows)
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+@router.get("/search_by_prefix")
+async def search_by_prefix(
+    prefix: str,
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_amazon_async_db)
+):
+    """
+    Books whose name starts with 'prefix' (case- and whitespace-insensitive),
+    ordered by name. Served by a range scan on the name_normalized index.
+    """
+    normalized = normalize_title(prefix)
+    if not normalized:
+        raise HTTPException(status_code=400, detail="Provide a non-empty 'prefix'")
+
+    low, high = prefix_bounds(normalized)
+    stmt = select(Amazon).where(Amazon.name_normalized >= low)
+    if high is not None:
+        stmt = stmt.where(Amazon.name_normalized < high)
+    stmt = (
+        stmt
+        .order_by(Amazon.name_normalized)
+        .limit(limit)
+    )
+    matches = await catalog_cache.get_or_load(
+        ("prefix", normalized, limit),
+        lambda: load_rows(db, stmt),
+        tags=table_tags(Amazon.__tablename__)
+    )
+    return FastJSONResponse([{"id": product.id, "name": product.name} for product in matches])
+
+@router.get("/suggest")
+async def suggest(
+    q: str,
+    limit: int = Query(10, ge=1, le=50)
+):
+    """
+    Ranked typeahead completions for 'q' over book names, publishers and
+    subject codes, served from the in-memory index without a query.
+    """
+    await suggest_index.ready(get_async_session_factory("amazon"), Amazon)
+    return FastJSONResponse(suggest_index.suggest(q, limit))
+
+@router.get("/fuzzy_search")
+async def fuzzy_search(
+    q: str,
+    limit: int = Query(10, ge=1, le=50),
+    min_score: float = Query(DEFAULT_MIN_SCORE, ge=0, le=1)
+):
+    """
+    Books whose name resembles 'q', tolerating typos, missing words and
+    partial titles, ranked by trigram similarity score.
+    """
+    await title_index.ready(get_async_session_factory("amazon"), Amazon)
+    return FastJSONResponse(title_index.search(q, limit, min_score))
+
+@router.get("/delivery")
+async def delivery(pincode: str):
+    """
+    Delivery time in days to 'pincode'. Pincodes without an entry get the
+    estimate of the longest known prefix they share ("match": "prefix").
+    """
+    normalized = normalize_pincode(pincode)
+    if normalized is None:
+        raise HTTPException(status_code=400, detail="Invalid pincode")
+    await delivery_index.ready(get_async_session_factory("amazon"), AmazonDeliverable)
+
+    result = delivery_index.lookup(normalized)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No delivery to this pincode")
+    return result
+
+@router.post("/deliveries")
+async def deliveries(request: DeliveryBatchRequest):
+    """
+    Delivery times for many pincodes, in request order. Each item carries
+    its own 'error' instead of failing the whole batch.
+    """
+    if not request.pincodes:
+        raise HTTPException(status_code=400, detail="Provide 'pincodes'")
+    if len(request.pincodes) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} items per request")
+    await delivery_index.ready(get_async_session_factory("amazon"), AmazonDeliverable)
+
+    results = []
+    for pincode in request.pincodes:
+        normalized = normalize_pincode(pincode)
+        result = delivery_index.lookup(normalized) if normalized else None
+        if result is None:
+            error = "Invalid pincode" if normalized is None else "No delivery to this pincode"
+            result = {"pincode": pincode, "delivery_time": None, "match": None, "matched_prefix": None, "error": error}
+        else:
+            result["error"] = None
+        results.append(result)
+    return FastJSONResponse(results)
+
+@router.get("/offer")
+async def offer(
+    name: str,
+    quantity: int = Query(1, ge=1),
+    db: AsyncSession = Depends(get_amazon_async_db)
+):
+    """Price of a title for 'quantity' copies after discounts, for price comparison"""
+    result = await find_offer(db, name, quantity)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return result
+
+@router.get("/get_price")
+@router.head("/get_price")
 @router.post("/get_price")
 async def get_price(
+    request: Request,
     id: Optional[int] = None,  # Use int, as `Amazon.id` is Integer
     book_name: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_amazon_async_db)
 ):
-    if not id and not book_name:
+    """
+    Unit price of a book. Served over GET as well so CDNs can cache it;
+    GET and HEAD requests with a matching If-None-Match / If-Modified-Since
+    get 304.
+    """
+    if id is None and not book_name:
         raise HTTPException(status_code=400, detail="Provide either 'id' or 'book_name'")
 
-    if id:
-        product = db.query(Amazon).filter(Amazon.id == id).first()
-    else:
-        product = db.query(Amazon).filter(Amazon.name == book_name).first()
-
+    product = await fetch_product(db, id=id, name=book_name)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    price_count = db.query(AmazonPrice).count()
-    if price_count == 0:
-        raise HTTPException(status_code=404, detail="No prices available")
+    price_obj = await fetch_price_row(db, product)
 
-    # Deterministic mapping of product to price (as in your logic)
-    price_id = (product.id % price_count) + 1
-    price_obj = db.query(AmazonPrice).filter(AmazonPrice.id == price_id).first()
+    modified = max(row_modified(product), row_modified(price_obj))
+    return conditional_response(
+        request, "get_price",
+        entity_tag(product.amazon_id, product.name, price_obj.price, modified),
+        modified,
+        {
+            "amazon_id": product.amazon_id,
+            "name": product.name,
+            "unit_price": price_obj.price
+        }
+    )
 
-    if not price_obj:
-        raise HTTPException(status_code=404, detail="Price not found")
+@router.post("/get_prices")
+async def get_prices(
+    request: PriceBatchRequest,
+    db: AsyncSession = Depends(get_amazon_async_db)
+):
+    """
+    Unit prices for many books in one call, resolved with a constant number
+    of queries. Results follow the order of 'ids' then 'names', and each item
+    carries its own 'error' instead of failing the whole batch.
+    """
+    if not request.ids and not request.names:
+        raise HTTPException(status_code=400, detail="Provide 'ids' and/or 'names'")
+    if len(request.ids) + len(request.names) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} items per request")
 
-    return {
-        "amazon_id": product.amazon_id,
-        "name": product.name,
-        "unit_price": price_obj.price
-    }
+    by_id, by_name = await fetch_products_bulk(db, request.ids, request.names)
+    products = {product.id: product for product in [*by_id.values(), *by_name.values()]}
+    unit_prices = await fetch_unit_prices_bulk(db, products.values())
+
+    lookups = [({"id": id}, by_id.get(id)) for id in request.ids]
+    lookups += [({"name": name}, by_name.get(name)) for name in request.names]
+
+    results = []
+    for query, product in lookups:
+        item = {"id": None, "name": None, "amazon_id": None, "unit_price": None, "error": None, **query}
+        if not product:
+            item["error"] = "Product not found"
+        elif product.id not in unit_prices:
+            item.update(id=product.id, name=product.name, error="Price not found")
+        else:
+            item.update(
+                id=product.id,
+                name=product.name,
+                amazon_id=product.amazon_id,
+                unit_price=unit_prices[product.id]
+            )
+        results.append(item)
+
+    return FastJSONResponse(results)
 
 @router.post("/stock_by_id")
 async def stock_by_id(
-    id: str,
-    db: Session = Depends(get_db)
+    id: int,
+    db: AsyncSession = Depends(get_amazon_async_db)
 ):
-    amazon_product = db.query(Amazon).filter(Amazon.id == id).first()
+    amazon_product = await fetch_product(db, id=id)
     if not amazon_product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    total_stock = random.randint(5, 100)
-    return total_stock
+    levels = await stock_ledger.levels(db, [amazon_product.id])
+    return levels[amazon_product.id]["available"]
+
+
+@router.post("/inventory/reserve")
+async def reserve_stock(
+    request: ReserveRequest,
+    db: AsyncSession = Depends(get_amazon_async_db)
+):
+    """
+    Hold stock for every line of a cart under one reservation id, all or
+    nothing. Held stock is released again unless the reservation is
+    committed before it expires.
+    """
+    if not request.lines:
+        raise HTTPException(status_code=400, detail="Provide 'lines'")
+    if len(request.lines) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} lines per reservation")
+
+    by_id, _ = await fetch_products_bulk(db, list(dict.fromkeys(line.id for line in request.lines)))
+    missing = sorted({line.id for line in request.lines} - by_id.keys())
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Products not found: {missing}")
+
+    try:
+        return await stock_ledger.reserve(db, [(line.id, line.quantity) for line in request.lines])
+    except InsufficientStock as e:
+        raise HTTPException(status_code=409, detail={
+            "error": "Insufficient stock", "id": e.book_id, "requested": e.requested, "available": e.available
+        })
+    except InventoryBusy:
+        raise HTTPException(status_code=503, detail="Inventory is busy, retry shortly")
+
+
+@router.post("/inventory/release")
+async def release_stock(
+    reservation_id: str,
+    db: AsyncSession = Depends(get_amazon_async_db)
+):
+    """Give the stock held by a reservation back"""
+    try:
+        return await stock_ledger.release(db, reservation_id)
+    except ReservationNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ReservationError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except InventoryBusy:
+        raise HTTPException(status_code=503, detail="Inventory is busy, retry shortly")
+
+
+@router.post("/inventory/commit")
+async def commit_stock(
+    reservation_id: str,
+    db: AsyncSession = Depends(get_amazon_async_db)
+):
+    """Complete the sale of a held reservation, taking its copies out of stock"""
+    try:
+        return await stock_ledger.commit(db, reservation_id)
+    except ReservationNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ReservationError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except InventoryBusy:
+        raise HTTPException(status_code=503, detail="Inventory is busy, retry shortly")
 
 
 @router.post("/get_discount")
 async def get_discount(
     id: int,  # Book ID is required
-    quantity: int,  # Quantity is required
-    db: Session = Depends(get_db)
+    quantity: int = Query(..., gt=0),  # Quantity is required, like a quote line
+    db: AsyncSession = Depends(get_amazon_async_db)
 ):
     # Fetch the book by ID
-    product = db.query(Amazon).filter(Amazon.id == id).first()
+    product = await fetch_product(db, id=id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
     # Fetch unit price for the book
-    price_count = db.query(AmazonPrice).count()
-    if price_count == 0:
-        raise HTTPException(status_code=404, detail="No prices available")
-
-    # Determine the price_id (same logic as earlier)
-    price_id = (product.id % price_count) + 1
-    price_obj = db.query(AmazonPrice).filter(AmazonPrice.id == price_id).first()
-
-    if not price_obj:
-        raise HTTPException(status_code=404, detail="Price not found")
-
-    unit_price = price_obj.price
+    unit_price = await fetch_unit_price(db, product)
     total_price = unit_price * quantity
 
     # Find applicable discount
-    discount = db.query(AmazonDiscount).filter(
-        AmazonDiscount.cost_from <= total_price,
-        AmazonDiscount.cost_to > total_price
-    ).first()
-
-    percent = discount.percent_off if discount else 0
+    discount_tiers = await fetch_discount_tiers(db)
+    percent = discount_tiers.percent_off(total_price)
     reduced_amount = (percent / 100) * total_price
     payable_amount = total_price - reduced_amount
 
@@ -178,6 +694,139 @@ async def get_discount(
         "payable_amount": round(payable_amount, 2)
     }
 
+@router.post("/quote")
+async def quote(
+    request: QuoteRequest,
+    db: AsyncSession = Depends(get_amazon_async_db)
+):
+    """
+    Price a whole cart in one call. Products and prices are loaded in bulk,
+    each line gets its total and the discount it would get on its own, and
+    the store's discount tiers are applied to the cart subtotal for the
+    amount payable. Lines that cannot be priced carry an 'error' and are
+    left out of the totals.
+    """
+    if not request.lines:
+        raise HTTPException(status_code=400, detail="Provide 'lines'")
+    if len(request.lines) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} lines per quote")
+
+    by_id, _ = await fetch_products_bulk(db, list(dict.fromkeys(line.id for line in request.lines)))
+    unit_prices = await fetch_unit_prices_bulk(db, by_id.values())
+    discount_tiers = await fetch_discount_tiers(db)
+
+    lines, subtotal, separate_payable = [], 0.0, 0.0
+    for line in request.lines:
+        product = by_id.get(line.id)
+        item = {
+            "id": line.id, "name": None, "amazon_id": None, "quantity": line.quantity,
+            "unit_price": None, "line_total": None, "discount_percent": None,
+            "reduced_amount": None, "payable_amount": None, "error": None
+        }
+        if not product:
+            item["error"] = "Product not found"
+        elif product.id not in unit_prices:
+            item.update(name=product.name, amazon_id=product.amazon_id, error="Price not found")
+        else:
+            unit_price = unit_prices[product.id]
+            line_total = unit_price * line.quantity
+            percent = discount_tiers.percent_off(line_total)
+            reduced_amount = (percent / 100) * line_total
+            item.update(
+                name=product.name,
+                amazon_id=product.amazon_id,
+                unit_price=round(unit_price, 2),
+                line_total=round(line_total, 2),
+                discount_percent=percent,
+                reduced_amount=round(reduced_amount, 2),
+                payable_amount=round(line_total - reduced_amount, 2)
+            )
+            subtotal += line_total
+            separate_payable += line_total - reduced_amount
+        lines.append(item)
+
+    percent = discount_tiers.percent_off(subtotal)
+    reduced_amount = (percent / 100) * subtotal
+    return FastJSONResponse({
+        "lines": lines,
+        "subtotal": round(subtotal, 2),
+        "discount_percent": percent,
+        "reduced_amount": round(reduced_amount, 2),
+        "payable_amount": round(subtotal - reduced_amount, 2),
+        "payable_if_bought_separately": round(separate_payable, 2)
+    })
+
+
+@router.get("/admin/cache")
+async def cache_stats():
+    """Hit/miss counters and occupancy of the catalog cache"""
+    return catalog_cache.stats()
+
+
+@router.get("/ready")
+async def ready():
+    """
+    Readiness probe: connection pool state from in-memory counters, without
+    running a query. 503 until the pool is warmed up or after a connection
+    failure.
+    """
+    status = pool_status("amazon")
+    return FastJSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@router.get("/admin/inventory")
+async def inventory_stats():
+    """
+    Reservation counters of this process, including lock conflicts that
+    were retried, and in sharded mode the in-memory stock of hot books
+    """
+    return stock_ledger.report()
+
+
+@router.post("/admin/inventory/restock")
+async def restock(
+    id: int,
+    quantity: int,
+    db: AsyncSession = Depends(get_amazon_async_db)
+):
+    """Add 'quantity' copies of a book to stock (negative to write copies off)"""
+    if not await fetch_product(db, id=id):
+        raise HTTPException(status_code=404, detail="Product not found")
+    try:
+        return await stock_ledger.restock(db, id, quantity)
+    except InsufficientStock as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except InventoryBusy:
+        raise HTTPException(status_code=503, detail="Inventory is busy, retry shortly")
+
+
+@router.post("/admin/cache/invalidate")
+async def invalidate_cache(
+    product_id: Optional[int] = None,
+    table: Optional[str] = None
+):
+    """
+    Drop cached entries for one product and/or a whole table.
+    With neither parameter the whole cache is cleared.
+    """
+    if table and table not in CACHED_TABLES | {AmazonDeliverable.__tablename__}:
+        raise HTTPException(status_code=400, detail=f"Unknown table '{table}'")
+
+    removed = 0
+    if product_id:
+        removed += catalog_cache.invalidate_tag((Amazon.__tablename__, product_id))
+    if table:
+        removed += catalog_cache.invalidate_tag(table)
+    if not product_id and not table:
+        removed = catalog_cache.clear()
+    if table == Amazon.__tablename__ or not (product_id or table):
+        suggest_index.mark_stale()
+        title_index.mark_stale()
+    if table == AmazonDeliverable.__tablename__ or not (product_id or table):
+        delivery_index.mark_stale()
+
+    return {"invalidated": removed, "cache": catalog_cache.stats()}
+
 # @router.get("/get_books_from_amazon")
 # def get_books_from_amazon():
 #     return {
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Query
+from app.apis import amazon_api, flipkart_api, sapna_api
+from app.compare import COMPARE_DEADLINE, COMPARE_STORE_TIMEOUT, compare_offers, http_offer_source, store_urls
+from app.responses import FastJSONResponse
+from typing import Optional
+import httpx
+
+router = APIRouter(default_response_class=FastJSONResponse)
+
+# Stores served by this process answer in-process; COMPARE_STORE_URLS
+# switches to their /offer endpoints when they run as separate apps
+IN_PROCESS_OFFERS = {
+    "amazon": amazon_api.store_offer,
+    "flipkart": flipkart_api.store_offer,
+    "sapna": sapna_api.store_offer,
+}
+
+http_client = None
+
+
+def offer_sources():
+    global http_client
+    urls = store_urls()
+    if not urls:
+        return IN_PROCESS_OFFERS
+    if http_client is None:
+        http_client = httpx.AsyncClient()
+    return {store: http_offer_source(http_client, url) for store, url in urls.items()}
+
+
+@router.on_event("shutdown")
+async def close_http_client():
+    if http_client is not None:
+        await http_client.aclose()
+
+
+@router.get("/compare")
+async def compare(
+    name: str,
+    quantity: int = Query(1, ge=1),
+    timeout_ms: Optional[float] = Query(None, gt=0, le=10000),
+    deadline_ms: Optional[float] = Query(None, gt=0, le=10000)
+):
+    """
+    Cheapest seller of a title across all stores, queried concurrently.
+    Returns after the deadline with the stores that answered in time, each
+    with its status and latency, and the cheapest offer after discounts.
+    """
+    return await compare_offers(
+        offer_sources(), name, quantity,
+        store_timeout=timeout_ms / 1000 if timeout_ms else COMPARE_STORE_TIMEOUT,
+        deadline=deadline_ms / 1000 if deadline_ms else COMPARE_DEADLINE
+    )
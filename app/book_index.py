@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import time
+
+from sqlalchemy import event, inspect, select
+
+from app.cache import CATALOG_CACHE_TTL, snapshot
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip when rebuilding, so the event loop is not held by one large fetch
+REBUILD_BATCH = 10000
+
+
+def _release(values):
+    """
+    Free the contents of a replaced index a piece at a time. Dropping a
+    million entries at once is one long deallocation holding the GIL.
+    """
+    while values:
+        value = values.pop()
+        if isinstance(value, dict):
+            while value:
+                _release([value.popitem()[1]])
+        elif isinstance(value, list):
+            while value:
+                _release([value.pop()])
+
+
+class BookIndex:
+    """
+    Base for the per-store in-memory search indexes. Subclasses implement
+    add(), remove() and load(); this class handles building from the
+    database, staleness and following the ORM writes of this process.
+    Writes from other processes are picked up by a rebuild once the index
+    is older than `max_age` seconds.
+
+    Rebuilds load a new copy of the index in a worker thread and swap it in
+    on the event loop, so queries keep being answered from the current
+    contents meanwhile; at most one rebuild runs at a time.
+    """
+
+    # Book columns the index needs when rebuilding
+    FIELDS = ("id", "name")
+
+    # Attributes of this class rather than of the index contents, kept when a rebuilt copy is swapped in
+    _OWN_STATE = ("built", "max_age", "_loaded_at", "_stale_marks", "_rebuilding", "_changes")
+
+    def __init__(self, max_age=CATALOG_CACHE_TTL):
+        self.built = False
+        self.max_age = max_age
+        self._loaded_at = 0.0
+        self._stale_marks = 0
+        self._rebuilding = None  # the rebuild task in progress
+        self._changes = None     # ORM writes seen while rebuilding, replayed onto the new copy
+
+    @property
+    def fresh(self):
+        """Built, and rebuilt less than max_age seconds ago"""
+        return self.built and time.monotonic() - self._loaded_at < self.max_age
+
+    def add(self, book):
+        raise NotImplementedError
+
+    def remove(self, book_id):
+        raise NotImplementedError
+
+    def load(self, books):
+        raise NotImplementedError
+
+    async def rebuild(self, db, model):
+        """Load every book of `model` from the database into a new copy of the index and swap it in"""
+        columns = [getattr(model, field) for field in self.FIELDS]
+        stale_marks = self._stale_marks
+        self._changes = []
+        try:
+            rows = []
+            result = await db.stream(select(*columns))
+            async for partition in result.partitions(REBUILD_BATCH):
+                rows += partition
+            copy = type(self)()
+            await asyncio.get_running_loop().run_in_executor(None, copy.load, rows)
+
+            # Back on the event loop: no query sees a half swapped index
+            replaced = []
+            for name, value in vars(copy).items():
+                if name not in self._OWN_STATE:
+                    replaced.append(getattr(self, name, None))
+                    setattr(self, name, value)
+            del copy
+            for book_id, book in self._changes:
+                self.remove(book_id)
+                if book is not None:
+                    self.add(book)
+            await asyncio.get_running_loop().run_in_executor(None, _release, replaced)
+        finally:
+            self._changes = None
+        self.built = True
+        # Marked stale while loading: the rows read may predate the change
+        self._loaded_at = time.monotonic() if stale_marks == self._stale_marks else 0.0
+
+    def refresh(self, session_factory, model):
+        """Start a rebuild in the background unless one is running; returns its task"""
+        if self._rebuilding is None or self._rebuilding.done():
+            async def rebuild():
+                async with session_factory() as db:
+                    await self.rebuild(db, model)
+
+            self._rebuilding = asyncio.ensure_future(rebuild())
+            self._rebuilding.add_done_callback(self._rebuilt)
+        return self._rebuilding
+
+    def _rebuilt(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Error rebuilding %s", type(self).__name__, exc_info=task.exception())
+
+    async def ready(self, session_factory, model):
+        """
+        Make the index usable for a query: the first build (or one after
+        mark_stale) is waited for, later ones past max_age run in the
+        background while the current contents keep being served.
+        """
+        if self.fresh:
+            return
+        rebuilding = self.refresh(session_factory, model)
+        if not self.built:
+            # Shielded: a cancelled request must not cancel the build others wait for
+            await asyncio.shield(rebuilding)
+
+    def mark_stale(self):
+        """Force a rebuild on the next query"""
+        self.built = False
+        self._stale_marks += 1
+
+    def track(self, model):
+        """Apply this process's ORM inserts/updates/deletes of `model` to the index"""
+        def _changed(book_id, book):
+            if self.built:
+                self.remove(book_id)
+                if book is not None:
+                    self.add(book)
+            if self._changes is not None:
+                self._changes.append((book_id, book))
+
+        def _added(mapper, connection, target):
+            _changed(target.id, snapshot(target))
+
+        def _updated(mapper, connection, target):
+            # Stock, price and other columns change far more often than the indexed ones
+            attrs = inspect(target).attrs
+            if any(attrs[field].history.has_changes() for field in self.FIELDS):
+                _changed(target.id, snapshot(target))
+
+        def _deleted(mapper, connection, target):
+            _changed(target.id, None)
+
+        event.listen(model, "after_insert", _added)
+        event.listen(model, "after_update", _updated)
+        event.listen(model, "after_delete", _deleted)
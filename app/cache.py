@@ -0,0 +1,141 @@
+from collections import OrderedDict
+from types import SimpleNamespace
+import os
+import time
+
+from sqlalchemy import event
+
+# Defaults for the per-process catalog caches, overridable from .env
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "4096"))
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+
+
+class CachedRow(SimpleNamespace):
+    """Detached, read-only copy of an ORM row's column values"""
+
+
+def snapshot(row):
+    """Copy an ORM instance into a CachedRow that is safe to share across sessions"""
+    values = {column.key: getattr(row, column.key) for column in row.__table__.columns}
+    return CachedRow(_table=row.__table__.name, **values)
+
+
+def row_tags(row):
+    """Invalidation tags for a cached row: its table and (table, id)"""
+    return (row._table, (row._table, row.id))
+
+
+def table_tags(table):
+    """Invalidation tags for a value derived from a whole table (counts, tier lists)"""
+    return (table, (table, "aggregate"))
+
+
+async def load_row(db, stmt):
+    row = await db.scalar(stmt)
+    return snapshot(row) if row is not None else None
+
+
+async def load_rows(db, stmt):
+    return [snapshot(row) for row in (await db.scalars(stmt)).all()]
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with a per-entry TTL and tag-based invalidation.
+    Entries are only touched from the event loop, so no locking is done.
+    """
+
+    def __init__(self, name, maxsize=CATALOG_CACHE_SIZE, ttl=CATALOG_CACHE_TTL):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Return (found, value); expired entries count as misses"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, value
+
+    def set(self, key, value, tags=()):
+        self._entries[key] = (time.monotonic() + self.ttl, value, frozenset(tags))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(self, key, loader, tags=()):
+        """
+        Read-through lookup. `loader` is an async callable producing the value,
+        `tags` is an iterable or a callable mapping the loaded value to tags.
+        None results are not cached, so newly added rows show up immediately.
+        """
+        found, value = self.get(key)
+        if found:
+            return value
+
+        value = await loader()
+        if value is not None:
+            self.set(key, value, tags(value) if callable(tags) else tags)
+        return value
+
+    def invalidate(self, key):
+        return self._entries.pop(key, None) is not None
+
+    def invalidate_tag(self, tag):
+        """Drop every entry carrying `tag`; returns the number removed"""
+        stale = [key for key, (_, _, tags) in self._entries.items() if tag in tags]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        removed = len(self._entries)
+        self._entries.clear()
+        return removed
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def invalidate_on_change(cache, *models):
+    """
+    Drop cached entries for a row whenever this process inserts, updates or
+    deletes it through the ORM. Changes made elsewhere still rely on the TTL
+    or the admin invalidation endpoint.
+    """
+    def _invalidate(mapper, connection, target):
+        table = target.__table__.name
+        cache.invalidate_tag((table, target.id))
+        cache.invalidate_tag((table, "aggregate"))
+
+    for model in models:
+        for name in ("after_insert", "after_update", "after_delete"):
+            event.listen(model, name, _invalidate)
@@ -33,6 +33,27 @@ def get_price(product_id):
     response.raise_for_status()
     return response.json()
 
+def get_prices(ids=None, names=None):
+    """Unit prices for many books in one request"""
+    response = requests.post(
+        f"{BASE_URL}/get_prices",
+        json={"ids": ids or [], "names": names or []}
+    )
+    response.raise_for_status()
+    return response.json()
+
+def get_delivery(pincode: str):
+    """Delivery time in days to a pincode"""
+    response = requests.get(f"{BASE_URL}/delivery", params={"pincode": pincode})
+    response.raise_for_status()
+    return response.json()
+
+def get_deliveries(pincodes):
+    """Delivery times for many pincodes in one request"""
+    response = requests.post(f"{BASE_URL}/deliveries", json={"pincodes": pincodes})
+    response.raise_for_status()
+    return response.json()
+
 def get_discount(id: int, quantity: int):
     response = requests.post(
         f"{BASE_URL}/get_discount",
@@ -42,6 +63,37 @@ def get_discount(id: int, quantity: int):
     response.raise_for_status()
     return response.json()
 
+def get_quote(lines):
+    """Price a cart of [(id, quantity), ...] lines, with discounts, in one request"""
+    response = requests.post(
+        f"{BASE_URL}/quote",
+        json={"lines": [{"id": id, "quantity": quantity} for id, quantity in lines]}
+    )
+    response.raise_for_status()
+    return response.json()
+
+def iter_books(page_size=1000, **filters):
+    """Every book matching genre= / publisher= / subject_code=, fetched a keyset page at a time"""
+    after = 0
+    while after is not None:
+        response = requests.get(f"{BASE_URL}/books", params={"after": after, "limit": page_size, **filters})
+        response.raise_for_status()
+        page = response.json()
+        yield from page["books"]
+        after = page["next_after"]
+
+def export_books(path, **filters):
+    """Stream the NDJSON export of matching books into a file, returns the number of books"""
+    count = 0
+    with requests.get(f"{BASE_URL}/books/export", params=filters, stream=True) as response:
+        response.raise_for_status()
+        with open(path, "wb") as f:
+            for line in response.iter_lines():
+                if line:
+                    f.write(line + b"\n")
+                    count += 1
+    return count
+
 
 def main():
     product_info = get_id_and_name(name="Python Crash Course")
@@ -0,0 +1,105 @@
+import asyncio
+import os
+import time
+
+import httpx
+
+from app.log_config import outgoing_headers
+
+# Fuzzy title matches below this score are not offered as "the same book"
+OFFER_MIN_SCORE = 0.6
+
+# Per-store timeout and overall deadline of a comparison, overridable from .env
+COMPARE_STORE_TIMEOUT = float(os.getenv("COMPARE_STORE_TIMEOUT_MS", "300")) / 1000
+COMPARE_DEADLINE = float(os.getenv("COMPARE_DEADLINE_MS", "500")) / 1000
+
+
+def store_urls():
+    """
+    Stores to compare over HTTP, from COMPARE_STORE_URLS
+    ("amazon=http://localhost:8000/amazon,flipkart=..."). Empty means the
+    stores are queried in-process.
+    """
+    urls = {}
+    for entry in os.getenv("COMPARE_STORE_URLS", "").split(","):
+        if "=" in entry:
+            store, url = entry.split("=", 1)
+            urls[store.strip()] = url.strip().rstrip("/")
+    return urls
+
+
+def http_offer_source(client: httpx.AsyncClient, base_url):
+    """Offer fetcher for a store running in another process, via its /offer endpoint"""
+    async def fetch(name, quantity):
+        response = await client.get(
+            f"{base_url}/offer", params={"name": name, "quantity": quantity}, headers=outgoing_headers()
+        )
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+    return fetch
+
+
+async def _timed_offer(fetch, name, quantity, timeout):
+    start = time.perf_counter()
+    offer, error = None, None
+    try:
+        offer = await asyncio.wait_for(fetch(name, quantity), timeout)
+        status = "ok" if offer else "not_found"
+    except asyncio.TimeoutError:
+        status = "timeout"
+    except Exception as e:
+        status, error = "error", str(e) or type(e).__name__
+    return {
+        "status": status,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+        "offer": offer,
+        "error": error
+    }
+
+
+async def compare_offers(sources, name, quantity=1, store_timeout=COMPARE_STORE_TIMEOUT, deadline=COMPARE_DEADLINE):
+    """
+    Ask every store in `sources` ({store: async fetch(name, quantity)}) for
+    its offer at once. Each store gets `store_timeout` seconds and the whole
+    comparison returns after at most `deadline` seconds with whatever has
+    arrived; stores still running are cancelled and reported as "deadline".
+    The cheapest offer is the lowest payable amount after discounts.
+    """
+    start = time.perf_counter()
+    tasks = {
+        store: asyncio.ensure_future(_timed_offer(fetch, name, quantity, store_timeout))
+        for store, fetch in sources.items()
+    }
+    await asyncio.wait(tasks.values(), timeout=deadline)
+
+    stores = {}
+    for store, task in tasks.items():
+        if task.done():
+            stores[store] = task.result()
+        else:
+            task.cancel()
+            stores[store] = {
+                "status": "deadline",
+                "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+                "offer": None,
+                "error": None
+            }
+
+    offers = [
+        (result["offer"]["payable_amount"], store)
+        for store, result in stores.items() if result["status"] == "ok"
+    ]
+    cheapest = None
+    if offers:
+        _, store = min(offers)
+        cheapest = {"store": store, **stores[store]["offer"]}
+
+    return {
+        "name": name,
+        "quantity": quantity,
+        "cheapest": cheapest,
+        "stores": stores,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+    }
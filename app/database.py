@@ -1,73 +1,380 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import asyncio
+import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# === AMAZON DB Setup ===
-AMAZON_DATABASE_URL = os.getenv("DATABASE_URL")
-
-engine = create_engine(
-    AMAZON_DATABASE_URL,
-    echo=True,
-    pool_pre_ping=True,
-    pool_recycle=300
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# === FLIPKART DB Setup ===
-FLIPKART_DATABASE_URL = os.getenv("FLIPKART_DATABASE_URL")
-
-flipkart_engine = create_engine(
-    FLIPKART_DATABASE_URL,
-    echo=True,
-    pool_pre_ping=True,
-    pool_recycle=300
-)
-FlipkartSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=flipkart_engine)
-
-# === SAPNA DB Setup ===
-SAPNA_DATABASE_URL = os.getenv("SAPNA_DATABASE_URL")
-
-sapna_engine = create_engine(
-    SAPNA_DATABASE_URL,
-    echo=True,
-    pool_pre_ping=True,
-    pool_recycle=300
-)
-SapnaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sapna_engine)
+logger = logging.getLogger(__name__)
+
+# Async drivers for the request path. The sync engines are still used for
+# table creation and seeding.
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url):
+    """Swap the sync driver in a database URL for its async counterpart"""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+
+# === Store Engine Registry ===
+# Engines and sessionmakers are created on first use, so a process only
+# connects to (and only needs configuration for) the stores it serves.
+STORE_URL_ENV = {
+    "amazon": "DATABASE_URL",
+    "flipkart": "FLIPKART_DATABASE_URL",
+    "sapna": "SAPNA_DATABASE_URL",
+}
+
+def store_setting(store, name, default=None):
+    """Per-store setting such as FLIPKART_DB_POOL_SIZE, falling back to the shared DB_POOL_SIZE"""
+    return os.getenv(f"{store.upper()}_{name}", os.getenv(name, default))
+
+def _flag(value):
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+def store_url(store):
+    if store not in STORE_URL_ENV:
+        raise KeyError(f"Unknown store: {store}")
+    url = os.getenv(STORE_URL_ENV[store])
+    if not url:
+        raise RuntimeError(f"{STORE_URL_ENV[store]} is not set, cannot connect to the {store} database")
+    return url
+
+class _WaitTiming:
+    """Pool mixin counting checkouts, time spent waiting for a connection and timeouts (see app/metrics.py)"""
+    checkouts = 0
+    wait_seconds = 0.0
+    timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.checkouts += 1
+            self.wait_seconds += time.perf_counter() - start
+
+class TimedQueuePool(_WaitTiming, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_WaitTiming, AsyncAdaptedQueuePool):
+    pass
+
+# How pooled connections are checked before use (DB_POOL_PRE_PING):
+#   always - a round trip on every checkout (SQLAlchemy's pool_pre_ping)
+#   idle   - only connections idle for DB_POOL_PING_IDLE_SECONDS or longer,
+#            which are the ones the server may have dropped
+#   never  - rely on pool_recycle and reconnect-on-error
+# True/False are read as always/never.
+PRE_PING_MODES = ("always", "idle", "never")
+
+def pre_ping_mode(store):
+    value = str(store_setting(store, "DB_POOL_PRE_PING", "idle")).strip().lower()
+    if value in PRE_PING_MODES:
+        return value
+    return "always" if _flag(value) else "never"
+
+def engine_options(store, is_async=False):
+    """Pool settings for a store's sync and async engines"""
+    options = {
+        "pool_recycle": int(store_setting(store, "DB_POOL_RECYCLE", "300")),
+        "pool_pre_ping": pre_ping_mode(store) == "always",
+        # Names the store in the metrics and logs of its queries (app/query_tracking.py)
+        "logging_name": store,
+    }
+    # SQLite engines (local development) use pools that take no sizing arguments
+    if make_url(store_url(store)).get_backend_name() != "sqlite":
+        options.update(
+            poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+            pool_size=int(store_setting(store, "DB_POOL_SIZE", "5")),
+            max_overflow=int(store_setting(store, "DB_MAX_OVERFLOW", "10")),
+            pool_timeout=float(store_setting(store, "DB_POOL_TIMEOUT", "30")),
+        )
+    return options
+
+def ping_idle_connections(engine, idle_seconds):
+    """Ping connections that sat in the pool for `idle_seconds` or longer when they are checked out"""
+    @event.listens_for(engine, "checkin")
+    def checked_in(dbapi_connection, record):
+        record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def checked_out(dbapi_connection, record, proxy):
+        checked_in_at = record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        try:
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            finally:
+                cursor.close()
+        except Exception as e:
+            # The pool discards the connection and checks out a fresh one
+            raise exc.DisconnectionError(f"Idle connection failed its ping: {e}") from e
+
+# Per store: whether warm_up_pool succeeded and the last connection failure,
+# kept up to date by pool events so readiness probes need not run a query
+_pool_health = {}
+
+def track_pool_health(store, engine):
+    health = _pool_health.setdefault(store, {"warmed": False, "warm_up_ms": None, "last_error": None})
+
+    @event.listens_for(engine, "connect")
+    def connected(dbapi_connection, record):
+        health["last_error"] = None
+
+    @event.listens_for(engine, "handle_error")
+    def failed(context):
+        # No connection yet means connecting failed; is_disconnect means it dropped
+        if context.connection is None or context.is_disconnect:
+            health["last_error"] = f"{type(context.original_exception).__name__}: {context.original_exception}"
+
+def _configured(store, engine):
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if pre_ping_mode(store) == "idle":
+        ping_idle_connections(sync_engine, float(store_setting(store, "DB_POOL_PING_IDLE_SECONDS", "30")))
+    track_pool_health(store, sync_engine)
+    return engine
+
+_registry = {}
+_registry_lock = threading.RLock()
+
+def _registered(kind, store, factory):
+    key = (kind, store)
+    value = _registry.get(key)
+    if value is None:
+        with _registry_lock:
+            value = _registry.get(key)
+            if value is None:
+                value = _registry[key] = factory()
+    return value
+
+def get_engine(store):
+    return _registered(
+        "engine", store,
+        lambda: _configured(store, create_engine(store_url(store), **engine_options(store)))
+    )
+
+def get_session_factory(store):
+    return _registered(
+        "sessionmaker", store,
+        lambda: sessionmaker(autocommit=False, autoflush=False, bind=get_engine(store))
+    )
+
+def get_async_engine(store):
+    return _registered(
+        "async_engine", store,
+        lambda: _configured(
+            store, create_async_engine(to_async_url(store_url(store)), **engine_options(store, is_async=True))
+        )
+    )
+
+def get_async_session_factory(store):
+    return _registered(
+        "async_sessionmaker", store,
+        lambda: async_sessionmaker(get_async_engine(store), autoflush=False, expire_on_commit=False)
+    )
+
+def created_engines():
+    """(kind, store) pairs of the engines this process has created so far"""
+    return sorted(key for key in _registry if key[0] in ("engine", "async_engine"))
+
+# Seconds between warm-up attempts after a failed one, doubling up to the maximum
+WARM_UP_RETRY_SECONDS = 1.0
+WARM_UP_RETRY_MAX_SECONDS = 30.0
+
+_warm_up_retries = {}
+
+async def _open_connections(store):
+    pool = get_async_engine(store).sync_engine.pool
+    health = _pool_health[store]
+    # SQLite engines use pools without a size that keep no idle connections
+    count = min(int(store_setting(store, "DB_POOL_MIN", pool.size())), pool.size()) if hasattr(pool, "size") else 0
+    start = time.perf_counter()
+    engine = get_async_engine(store)
+    opened = await asyncio.gather(*(engine.connect() for _ in range(count)), return_exceptions=True)
+    failures = [result for result in opened if isinstance(result, BaseException)]
+    for connection in opened:
+        if not isinstance(connection, BaseException):
+            await connection.close()
+    if failures:
+        logger.error("Could not open %d of %d %s connections: %s", len(failures), count, store, failures[0])
+        return False
+    health["warmed"] = True
+    health["warm_up_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info("Opened %d %s connections in %.0fms", count, store, health["warm_up_ms"])
+    return True
+
+async def _retry_warm_up(store):
+    delay = WARM_UP_RETRY_SECONDS
+    while True:
+        await asyncio.sleep(delay)
+        if await _open_connections(store):
+            return
+        delay = min(delay * 2, WARM_UP_RETRY_MAX_SECONDS)
+
+async def warm_up_pool(store):
+    """
+    Open DB_POOL_MIN connections of the store's async engine (by default its
+    pool_size) before the first request, so early requests do not pay for
+    connecting. Failures are logged and reported by pool_status, and the
+    warm-up is retried in the background with backoff until it succeeds.
+    """
+    if await _open_connections(store):
+        return True
+    retry = _warm_up_retries.get(store)
+    if retry is None or retry.done():
+        _warm_up_retries[store] = asyncio.ensure_future(_retry_warm_up(store))
+    return False
+
+async def stop_warm_up(store):
+    """Cancel a pending warm-up retry (at shutdown)"""
+    retry = _warm_up_retries.pop(store, None)
+    if retry is not None and not retry.done():
+        retry.cancel()
+        try:
+            await retry
+        except asyncio.CancelledError:
+            pass
+
+def pool_status(store):
+    """
+    Readiness of the store's async engine, from the pool's counters and
+    events only: probes never check out a connection or run a query.
+    Ready once warmed up, unless the last connection attempt failed.
+    """
+    pool = get_async_engine(store).sync_engine.pool
+    health = _pool_health[store]
+    status = {
+        "store": store,
+        "ready": health["warmed"] and health["last_error"] is None,
+        "warmed": health["warmed"],
+        "warm_up_ms": health["warm_up_ms"],
+        "last_error": health["last_error"],
+        "pool": type(pool).__name__,
+        "pre_ping": pre_ping_mode(store),
+    }
+    if hasattr(pool, "size"):
+        capacity = pool.size() + int(store_setting(store, "DB_MAX_OVERFLOW", "10"))
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            available=max(capacity - pool.checkedout(), 0),
+            timeouts=getattr(pool, "timeouts", 0),
+        )
+    return status
+
+# Module-level names from before the registry, resolved lazily on access
+_LEGACY_NAMES = {
+    "engine": (get_engine, "amazon"),
+    "SessionLocal": (get_session_factory, "amazon"),
+    "async_engine": (get_async_engine, "amazon"),
+    "AsyncSessionLocal": (get_async_session_factory, "amazon"),
+    "flipkart_engine": (get_engine, "flipkart"),
+    "FlipkartSessionLocal": (get_session_factory, "flipkart"),
+    "flipkart_async_engine": (get_async_engine, "flipkart"),
+    "FlipkartAsyncSessionLocal": (get_async_session_factory, "flipkart"),
+    "sapna_engine": (get_engine, "sapna"),
+    "SapnaSessionLocal": (get_session_factory, "sapna"),
+    "sapna_async_engine": (get_async_engine, "sapna"),
+    "SapnaAsyncSessionLocal": (get_async_session_factory, "sapna"),
+}
+
+def __getattr__(name):
+    if name in _LEGACY_NAMES:
+        factory, store = _LEGACY_NAMES[name]
+        return factory(store)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # === Common Base ===
 Base = declarative_base()
 
+def add_missing_columns(bind, *models):
+    """
+    create_all only creates missing tables. Add (and index) columns that were
+    introduced after an existing table was created.
+    """
+    inspector = inspect(bind)
+    for model in models:
+        table = model.__table__
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=bind.dialect)
+            with bind.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            for index in table.indexes:
+                if column.name in index.columns:
+                    index.create(bind)
+            logger.info("Added column %s.%s", table.name, column.name)
+
 # === DB Getters ===
 def get_db():
     """Default getter for Amazon DB (backward compatibility)"""
-    db = SessionLocal()
+    db = get_session_factory("amazon")()
     try:
         yield db
     finally:
         db.close()
 
 def get_amazon_db():
-    db = SessionLocal()
+    db = get_session_factory("amazon")()
     try:
         yield db
     finally:
         db.close()
 
 def get_flipkart_db():
-    db = FlipkartSessionLocal()
+    db = get_session_factory("flipkart")()
     try:
         yield db
     finally:
         db.close()
 
 def get_sapna_db():
-    db = SapnaSessionLocal()
+    db = get_session_factory("sapna")()
     try:
         yield db
     finally:
         db.close()
+
+# === Async DB Getters (used by the store routers) ===
+async def get_async_db():
+    """Default async getter for Amazon DB"""
+    async with get_async_session_factory("amazon")() as db:
+        yield db
+
+async def get_amazon_async_db():
+    async with get_async_session_factory("amazon")() as db:
+        yield db
+
+async def get_flipkart_async_db():
+    async with get_async_session_factory("flipkart")() as db:
+        yield db
+
+async def get_sapna_async_db():
+    async with get_async_session_factory("sapna")() as db:
+        yield db
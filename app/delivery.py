@@ -0,0 +1,81 @@
+import re
+
+from sqlalchemy import event
+
+from app.book_index import BookIndex
+from app.cache import CATALOG_CACHE_TTL
+
+_PINCODE = re.compile(r"^\d{3,10}$")
+
+# Shortest prefix an unknown pincode must share with a known one for a
+# fallback answer; 1 means "same postal zone"
+MIN_PREFIX_LEN = 1
+
+
+def normalize_pincode(pincode):
+    """Pincode without whitespace ("110 001" -> "110001"), or None if it is not all digits"""
+    pincode = "".join(str(pincode).split())
+    return pincode if _PINCODE.match(pincode) else None
+
+
+class DeliveryIndex(BookIndex):
+    """
+    pincode -> delivery time (days) hash index for one store.
+
+    Unknown pincodes fall back to the longest prefix they share with known
+    pincodes (same district, then circle, then zone), answered with the
+    slowest delivery time among those so the estimate is never optimistic.
+    The table is small, so any change triggers a full reload.
+    """
+
+    FIELDS = ("pincode", "delivery_time")
+
+    def __init__(self, max_age=CATALOG_CACHE_TTL):
+        super().__init__(max_age)
+        self._times = {}     # pincode -> delivery days
+        self._prefixes = {}  # prefix of known pincodes -> slowest delivery days among them
+
+    def load(self, rows):
+        """Replace the index contents with (pincode, delivery_time) rows"""
+        times = {}
+        for pincode, delivery_time in rows:
+            pincode = normalize_pincode(pincode)
+            if pincode is None or delivery_time is None:
+                continue
+            times[pincode] = max(delivery_time, times.get(pincode, delivery_time))
+
+        prefixes = {}
+        for pincode, days in times.items():
+            for length in range(MIN_PREFIX_LEN, len(pincode) + 1):
+                prefix = pincode[:length]
+                prefixes[prefix] = max(days, prefixes.get(prefix, days))
+
+        self._times, self._prefixes = times, prefixes
+
+    def track(self, model):
+        """Reload on the next lookup after this process writes to `model`"""
+        def _changed(mapper, connection, target):
+            self.mark_stale()
+
+        for name in ("after_insert", "after_update", "after_delete"):
+            event.listen(model, name, _changed)
+
+    def lookup(self, pincode):
+        """
+        {"pincode", "delivery_time", "match", "matched_prefix"} for a
+        normalized pincode, with match "exact" or "prefix"; None when no
+        known pincode is close enough.
+        """
+        days = self._times.get(pincode)
+        if days is not None:
+            return {"pincode": pincode, "delivery_time": days, "match": "exact", "matched_prefix": pincode}
+
+        for length in range(len(pincode) - 1, MIN_PREFIX_LEN - 1, -1):
+            prefix = pincode[:length]
+            days = self._prefixes.get(prefix)
+            if days is not None:
+                return {"pincode": pincode, "delivery_time": days, "match": "prefix", "matched_prefix": prefix}
+        return None
+
+    def __len__(self):
+        return len(self._times)
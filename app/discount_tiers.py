@@ -0,0 +1,53 @@
+from bisect import bisect_right
+from collections import namedtuple
+
+DiscountTier = namedtuple("DiscountTier", ["cost_from", "cost_to", "percent_off"])
+
+
+class DiscountTierError(ValueError):
+    """Raised when the discount table does not form a valid set of intervals"""
+
+
+class DiscountTiers:
+    """
+    Discount tiers as sorted half-open intervals [cost_from, cost_to),
+    validated once at load time and resolved with a binary search.
+    """
+
+    def __init__(self, rows):
+        tiers = sorted(
+            (DiscountTier(row.cost_from, row.cost_to, row.percent_off) for row in rows),
+            key=lambda tier: tier.cost_from
+        )
+        self.gaps = []
+
+        for tier in tiers:
+            if tier.cost_from >= tier.cost_to:
+                raise DiscountTierError(f"Empty discount tier {tier.cost_from} - {tier.cost_to}")
+
+        for prev, tier in zip(tiers, tiers[1:]):
+            if tier.cost_from < prev.cost_to:
+                raise DiscountTierError(
+                    f"Discount tiers overlap: {prev.cost_from} - {prev.cost_to} "
+                    f"and {tier.cost_from} - {tier.cost_to}"
+                )
+            if tier.cost_from > prev.cost_to:
+                # Totals in a gap simply get no discount
+                self.gaps.append((prev.cost_to, tier.cost_from))
+
+        self.tiers = tiers
+        self._starts = [tier.cost_from for tier in tiers]
+
+    def lookup(self, total):
+        """Return the tier containing `total`, or None"""
+        i = bisect_right(self._starts, total) - 1
+        if i >= 0 and total < self.tiers[i].cost_to:
+            return self.tiers[i]
+        return None
+
+    def percent_off(self, total):
+        tier = self.lookup(total)
+        return tier.percent_off if tier else 0
+
+    def __len__(self):
+        return len(self.tiers)
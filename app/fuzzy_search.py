@@ -0,0 +1,125 @@
+from array import array
+from collections import Counter
+
+from app.book_index import BookIndex
+from app.titles import normalize_title
+
+# Candidates are gathered from the rarest query trigrams until this many
+# postings have been read; common grams ("the", "ing", ...) are skipped for
+# candidate generation but still count towards the final score
+POSTINGS_BUDGET = 30000
+
+# Number of best candidates that are scored exactly per query
+MAX_CANDIDATES = 200
+
+DEFAULT_MIN_SCORE = 0.3
+
+
+def trigrams(text):
+    """
+    Set of 3-character shingles of a normalized title. Each word is padded
+    ("  word ") so word starts weigh more and short words still produce grams.
+    """
+    grams = set()
+    for word in normalize_title(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(query_grams, title_grams):
+    """
+    Blend of Dice similarity (whole title resembles the query) and
+    containment (query appears within a longer title), in [0, 1].
+    """
+    if not query_grams or not title_grams:
+        return 0.0
+    shared = len(query_grams & title_grams)
+    dice = 2 * shared / (len(query_grams) + len(title_grams))
+    containment = shared / len(query_grams)
+    return (dice + containment) / 2
+
+
+class TrigramIndex(BookIndex):
+    """
+    Typo-tolerant title search backed by a trigram inverted index.
+
+    Posting lists are compact unsigned int arrays (4 bytes per posting), so
+    a million titles of ~25 trigrams each need roughly 100 MB of postings.
+    Removing a book takes its id out of the posting list of each of its
+    trigrams, a linear scan of each list, so renames cost more than reads.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._postings = {}  # trigram -> array of book ids
+        self._titles = {}    # book id -> current name
+
+    def add(self, book):
+        if book.id in self._titles:
+            self.remove(book.id)
+        self._titles[book.id] = book.name
+        for gram in trigrams(book.name):
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array("I")
+            postings.append(book.id)
+
+    def remove(self, book_id):
+        name = self._titles.pop(book_id, None)
+        if name is None:
+            return
+        for gram in trigrams(name):
+            postings = self._postings.get(gram)
+            if postings is not None and book_id in postings:
+                postings.remove(book_id)
+                if not postings:
+                    del self._postings[gram]
+
+    def load(self, books):
+        """Replace the index contents with `books` in one pass"""
+        self._postings = {}
+        self._titles = {}
+        for book in books:
+            self.add(book)
+
+    def search(self, query, limit=10, min_score=DEFAULT_MIN_SCORE):
+        """Best matching titles for `query` as [{"id", "name", "score"}], highest score first"""
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        lists = sorted(
+            (self._postings[gram] for gram in query_grams if gram in self._postings),
+            key=len
+        )
+        if not lists:
+            return []
+
+        # Rarest grams first; the rarest one is always read so that short or
+        # very common queries still return something
+        counts = Counter()
+        budget = POSTINGS_BUDGET
+        for i, postings in enumerate(lists):
+            if i and len(postings) > budget:
+                break
+            counts.update(postings)
+            budget -= len(postings)
+
+        results = []
+        for book_id, _ in counts.most_common(MAX_CANDIDATES):
+            name = self._titles.get(book_id)
+            if name is None:
+                continue
+            score = similarity(query_grams, trigrams(name))
+            if score >= min_score:
+                results.append((score, book_id, name))
+
+        results.sort(key=lambda result: (-result[0], len(result[2]), result[1]))
+        return [
+            {"id": book_id, "name": name, "score": round(score, 3)}
+            for score, book_id, name in results[:limit]
+        ]
+
+    def __len__(self):
+        return len(self._titles)
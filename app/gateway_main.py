@@ -0,0 +1,52 @@
+from fastapi import FastAPI
+from app.apis.amazon_api import router as amazon_router
+from app.apis.flipkart_api import router as flipkart_router
+from app.apis.sapna_api import router as sapna_router
+from app.apis.compare_api import router as compare_router
+from app.database import pool_status
+from app.log_config import install_logging
+from app.metrics import install_metrics
+from app.responses import FastJSONResponse, PreEncodedJSONResponse, encode_json
+import os
+import uvicorn
+
+# All three stores in one app: one port, one set of worker processes, and
+# each worker keeps a single copy of every store's caches and indexes.
+STORE_ROUTERS = {
+    "amazon": amazon_router,
+    "flipkart": flipkart_router,
+    "sapna": sapna_router,
+}
+
+app = FastAPI(default_response_class=FastJSONResponse)
+for store, router in STORE_ROUTERS.items():
+    app.include_router(router, prefix=f"/{store}")
+app.include_router(compare_router)
+install_metrics(app)
+install_logging(app)
+
+
+ROOT_PAYLOAD = encode_json({"message": "Store Gateway API - All stores ready!", "stores": list(STORE_ROUTERS)})
+
+
+@app.get("/")
+async def gateway_root():
+    return PreEncodedJSONResponse(ROOT_PAYLOAD)
+
+
+@app.get("/ready")
+async def gateway_ready():
+    """Readiness of every store's connection pool (see /<store>/ready); 503 unless all are ready"""
+    stores = {store: pool_status(store) for store in STORE_ROUTERS}
+    ready = all(status["ready"] for status in stores.values())
+    return FastJSONResponse({"ready": ready, "stores": stores}, status_code=200 if ready else 503)
+
+
+if __name__ == "__main__":
+    uvicorn.run(
+        "app.gateway_main:app",
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8000")),
+        workers=int(os.getenv("GATEWAY_WORKERS", "1")),
+        log_level="info"
+    )
@@ -0,0 +1,76 @@
+import hashlib
+import os
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from starlette.responses import Response
+
+from app.responses import FastJSONResponse
+
+# Cache-Control max-age (seconds) of conditional catalog responses: the
+# shared HTTP_CACHE_MAX_AGE, or per endpoint e.g. HTTP_CACHE_MAX_AGE_GET_PRICE.
+# 0 sends "no-cache": clients and CDNs store the response but revalidate
+# it every time, which the ETag makes a cheap 304.
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+
+
+def max_age(endpoint):
+    return int(os.getenv(f"HTTP_CACHE_MAX_AGE_{endpoint.upper()}", HTTP_CACHE_MAX_AGE))
+
+
+def row_modified(row):
+    """When a catalog row last changed: updated_at, or created_at for rows written before it existed"""
+    return getattr(row, "updated_at", None) or row.created_at
+
+
+def entity_tag(*parts):
+    """Strong ETag over the values a response is built from, without encoding the response"""
+    return '"' + hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest() + '"'
+
+
+def http_date(moment):
+    """HTTP-date of a naive UTC datetime, as stored by the models"""
+    return format_datetime(moment.replace(microsecond=0, tzinfo=timezone.utc), usegmt=True)
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Whether the client's copy is current. If-None-Match wins over
+    If-Modified-Since when both are sent, as RFC 9110 requires.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison: a W/ prefix added by a proxy still matches
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def conditional_response(request, endpoint, etag, last_modified, content):
+    """
+    FastJSONResponse with ETag, Last-Modified and Cache-Control headers, or
+    an empty 304 when the request's validators match. Only GET and HEAD are
+    answered with 304; other methods always get the body. A 304 skips
+    encoding `content` altogether.
+    """
+    seconds = max_age(endpoint)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={seconds}" if seconds > 0 else "no-cache",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+
+    if request.method in ("GET", "HEAD") and not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(content, headers=headers)
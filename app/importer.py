@@ -0,0 +1,220 @@
+import csv
+import gzip
+import json
+import time
+from collections import namedtuple
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.database import get_engine, get_session_factory
+from app.inventory import seed_inventory
+from app.pricing import assign_price_ids
+from app.titles import normalize_title
+from app.models.amazon_models import Amazon, AmazonPrice, AmazonDeliverable, AmazonDiscount, AmazonInventory
+from app.models.flipkart_models import (
+    Flipkart, Price as FlipkartPrice, Deliverable as FlipkartDeliverable, Discount as FlipkartDiscount,
+    Inventory as FlipkartInventory
+)
+from app.models.sapna_models import (
+    sapna, Price as SapnaPrice, Deliverable as SapnaDeliverable, Discount as SapnaDiscount,
+    Inventory as SapnaInventory
+)
+from app.schemas import amazon_schemas, flipkart_schemas, sapna_schemas
+
+# model: ORM class written to; schema: *Create class each row is validated with;
+# key: column an existing row is matched on for upserts
+ImportTable = namedtuple("ImportTable", ["model", "schema", "key"])
+
+IMPORT_TABLES = {
+    "amazon": {
+        "books": ImportTable(Amazon, amazon_schemas.AmazonCreate, "amazon_id"),
+        "prices": ImportTable(AmazonPrice, amazon_schemas.AmazonPriceCreate, "id"),
+        "deliverables": ImportTable(AmazonDeliverable, amazon_schemas.AmazonDeliverableCreate, "id"),
+        "discounts": ImportTable(AmazonDiscount, amazon_schemas.AmazonDiscountCreate, "id"),
+    },
+    "flipkart": {
+        "books": ImportTable(Flipkart, flipkart_schemas.flipkartCreate, "flipkart_id"),
+        "prices": ImportTable(FlipkartPrice, flipkart_schemas.PriceCreate, "id"),
+        "deliverables": ImportTable(FlipkartDeliverable, flipkart_schemas.DeliverableCreate, "id"),
+        "discounts": ImportTable(FlipkartDiscount, flipkart_schemas.DiscountCreate, "id"),
+    },
+    "sapna": {
+        "books": ImportTable(sapna, sapna_schemas.sapnaCreate, "sapna_id"),
+        "prices": ImportTable(SapnaPrice, sapna_schemas.PriceCreate, "id"),
+        "deliverables": ImportTable(SapnaDeliverable, sapna_schemas.DeliverableCreate, "id"),
+        "discounts": ImportTable(SapnaDiscount, sapna_schemas.DiscountCreate, "id"),
+    },
+}
+
+# Stock table of each store; imported books get a row like seeded ones
+INVENTORY_MODELS = {"amazon": AmazonInventory, "flipkart": FlipkartInventory, "sapna": SapnaInventory}
+
+ON_CONFLICT = ("update", "skip", "error")
+
+
+def feed_format(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if name.endswith(".csv"):
+        return "csv"
+    raise ValueError(f"Cannot tell the format of {path}, expected .jsonl, .ndjson or .csv (optionally .gz)")
+
+
+def read_feed(path):
+    """
+    Stream a JSONL or CSV feed as (line number, row dict, parse error) tuples.
+    Empty CSV cells are left out of the row so optional fields stay unset.
+    """
+    fmt = feed_format(path)
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, {k: v for k, v in row.items() if k and v not in ("", None)}, None
+            return
+
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_no, None, f"invalid JSON: {e}"
+                continue
+            if isinstance(row, dict):
+                yield line_no, row, None
+            else:
+                yield line_no, None, "expected a JSON object"
+
+
+def validate_row(spec, raw):
+    """Column values for one feed row, validated by the table's *Create schema"""
+    values = spec.schema.model_validate(raw).model_dump()
+    # Schemas leave out the primary key; keep an explicit id so prices etc. can be upserted
+    if spec.key == "id" and raw.get("id") not in (None, ""):
+        values["id"] = int(raw["id"])
+    if "name" in values:
+        values["name_normalized"] = normalize_title(values["name"])
+    return values
+
+
+def describe_error(error):
+    if hasattr(error, "errors"):
+        return "; ".join(f"{'.'.join(map(str, e['loc'])) or 'row'}: {e['msg']}" for e in error.errors())
+    return str(error)
+
+
+def write_statement(dialect, spec, columns, on_conflict):
+    """INSERT for one group of rows, turned into an upsert/insert-ignore on the key where supported"""
+    table = spec.model.__table__
+    if on_conflict == "error" or spec.key not in columns:
+        return insert(table)
+
+    updates = [c for c in columns if c not in (spec.key, "id")]
+    if dialect == "mysql":
+        stmt = mysql_insert(table)
+        if on_conflict == "skip" or not updates:
+            return stmt.prefix_with("IGNORE")
+        return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in updates})
+    if dialect == "sqlite":
+        stmt = sqlite_insert(table)
+        if on_conflict == "skip" or not updates:
+            return stmt.on_conflict_do_nothing(index_elements=[spec.key])
+        return stmt.on_conflict_do_update(index_elements=[spec.key], set_={c: stmt.excluded[c] for c in updates})
+    # Other backends: plain inserts, duplicates fail the import
+    return insert(table)
+
+
+def import_feed(store, table, path, chunk_size=5000, commit_every=50000, on_conflict="update",
+                rejects_path=None, progress=print):
+    """
+    Stream `path` into a store table. Rows are validated one by one; valid
+    rows are written chunk_size at a time with a single executemany, and
+    the transaction is committed about every commit_every rows. Invalid rows
+    are counted, and written with their errors to rejects_path as JSONL.
+    A database error aborts the import; earlier commits are kept.
+
+    Returns {"read", "written", "rejected", "seconds", "rows_per_second"}.
+    """
+    spec = IMPORT_TABLES[store][table]
+    if on_conflict not in ON_CONFLICT:
+        raise ValueError(f"on_conflict must be one of {ON_CONFLICT}")
+
+    engine = get_engine(store)
+    dialect = engine.dialect.name
+    # Upserted books and prices get a new updated_at, which changes their ETag / Last-Modified
+    stamp_updated = "updated_at" in spec.model.__table__.c
+    imported_at = datetime.utcnow()
+    stats = {"read": 0, "written": 0, "rejected": 0}
+    rejects = open(rejects_path, "w", encoding="utf-8") if rejects_path else None
+    start = time.perf_counter()
+
+    def report(label):
+        elapsed = time.perf_counter() - start
+        rate = stats["read"] / elapsed if elapsed else 0.0
+        progress(
+            f"{label}: {stats['read']} rows read, {stats['written']} written, "
+            f"{stats['rejected']} rejected, {rate:,.0f} rows/s"
+        )
+        return elapsed, rate
+
+    try:
+        with engine.connect() as conn:
+            rows_iter = read_feed(path)
+            uncommitted = 0
+            while True:
+                chunk = list(islice(rows_iter, chunk_size))
+                if not chunk:
+                    break
+
+                groups = {}
+                for line_no, raw, error in chunk:
+                    stats["read"] += 1
+                    if error is None:
+                        try:
+                            values = validate_row(spec, raw)
+                        except (ValueError, TypeError) as e:
+                            error = describe_error(e)
+                        else:
+                            if stamp_updated:
+                                values["updated_at"] = imported_at
+                            groups.setdefault(tuple(values), []).append(values)
+                            continue
+                    stats["rejected"] += 1
+                    if rejects:
+                        rejects.write(json.dumps({"line": line_no, "error": error, "row": raw}, default=str) + "\n")
+
+                for columns, rows in groups.items():
+                    conn.execute(write_statement(dialect, spec, columns, on_conflict), rows)
+                    stats["written"] += len(rows)
+                    uncommitted += len(rows)
+
+                if uncommitted >= commit_every:
+                    conn.commit()
+                    uncommitted = 0
+                    report("committed")
+            conn.commit()
+    finally:
+        if rejects:
+            rejects.close()
+
+    if table == "books":
+        # Books imported without a price reference get the deterministic
+        # default, and new books the seed stock so they can be reserved
+        db = get_session_factory(store)()
+        try:
+            assign_price_ids(db, spec.model, IMPORT_TABLES[store]["prices"].model)
+            seed_inventory(db, spec.model, INVENTORY_MODELS[store])
+            db.commit()
+        finally:
+            db.close()
+
+    elapsed, rate = report("done")
+    return dict(stats, seconds=round(elapsed, 3), rows_per_second=round(rate, 1))
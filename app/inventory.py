@@ -0,0 +1,713 @@
+import asyncio
+import logging
+import os
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import exists, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.database import store_setting
+
+logger = logging.getLogger(__name__)
+
+# How long a reservation holds stock before the sweeper releases it
+RESERVATION_TTL = int(os.getenv("RESERVATION_TTL_SECONDS", "900"))
+RESERVATION_SWEEP_INTERVAL = int(os.getenv("RESERVATION_SWEEP_SECONDS", "60"))
+
+# Copies given to every seeded book that has no inventory row yet
+SEED_STOCK = int(os.getenv("INVENTORY_SEED_STOCK", "50"))
+
+# Sharded mode (INVENTORY_MODE=sharded): hot books are sold from in-memory
+# counters filled by leasing INVENTORY_LEASE_SIZE copies at a time from the
+# database. Holds and releases are written back every INVENTORY_FLUSH_MS,
+# commits before they are acknowledged; a lease not renewed for
+# INVENTORY_LEASE_TTL_SECONDS is reclaimed by any sweeper.
+INVENTORY_LEASE_SIZE = int(os.getenv("INVENTORY_LEASE_SIZE", "100"))
+INVENTORY_FLUSH_INTERVAL = int(os.getenv("INVENTORY_FLUSH_MS", "200")) / 1000
+INVENTORY_LEASE_TTL = int(os.getenv("INVENTORY_LEASE_TTL_SECONDS", "30"))
+
+# Attempts for a transaction that hits a deadlock or lock timeout
+MAX_ATTEMPTS = 8
+
+HELD, COMMITTED, RELEASED, EXPIRED = "held", "committed", "released", "expired"
+# Status of the rows recording stock a sharded ledger holds in memory
+LEASED = "leased"
+
+INVENTORY_MODES = ("database", "sharded")
+
+
+class InsufficientStock(Exception):
+    def __init__(self, book_id, requested, available):
+        super().__init__(f"Only {available} of book {book_id} available, {requested} requested")
+        self.book_id = book_id
+        self.requested = requested
+        self.available = available
+
+
+class ReservationError(Exception):
+    """Reservation that is no longer held (released, committed or expired)"""
+
+
+class ReservationNotFound(ReservationError):
+    pass
+
+
+class InventoryBusy(Exception):
+    """Lock conflicts persisted through every retry; the caller may try again later"""
+
+
+def _retryable(error):
+    """Deadlocks and lock wait timeouts (MySQL) or a busy database (SQLite)"""
+    orig = getattr(error, "orig", None)
+    code = orig.args[0] if orig is not None and orig.args else None
+    return code in (1205, 1213) or "database is locked" in str(orig)
+
+
+def seed_inventory(db, book_model, stock_model, on_hand=SEED_STOCK):
+    """Give every book without an inventory row `on_hand` copies, as one INSERT ... SELECT"""
+    missing = select(book_model.id, literal(on_hand), literal(0), literal(0)).where(
+        ~exists().where(stock_model.book_id == book_model.id)
+    )
+    return db.execute(
+        insert(stock_model).from_select(["book_id", "on_hand", "reserved", "version"], missing)
+    ).rowcount
+
+
+class StockLedger:
+    """
+    Stock levels and reservations of one store.
+
+    Reserving is a guarded UPDATE (... SET reserved = reserved + q WHERE
+    on_hand - reserved >= q), so the check and the change are one atomic
+    statement and no row lock is held across round trips. Cart lines are
+    applied in book id order in a single transaction, all or nothing.
+    Transactions that hit a deadlock or lock timeout are retried with
+    jittered backoff; `stats` counts them as conflicts.
+    """
+
+    def __init__(self, name, stock_model, reservation_model):
+        self.name = name
+        self.stock_model = stock_model
+        self.reservation_model = reservation_model
+        self.stats = Counter()
+        self._sweeper = None
+
+    async def _run(self, db, operation):
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                result = await operation(db)
+                await db.commit()
+                return result
+            except OperationalError as e:
+                await db.rollback()
+                if not _retryable(e):
+                    raise
+                self.stats["conflicts"] += 1
+                if attempt == MAX_ATTEMPTS:
+                    self.stats["busy"] += 1
+                    raise InventoryBusy(str(e.orig)) from e
+                await asyncio.sleep(random.uniform(0, min(0.5, 0.005 * 2 ** attempt)))
+            except Exception:
+                await db.rollback()
+                raise
+
+    async def levels(self, db, book_ids):
+        """{book_id: {"on_hand", "reserved", "available"}}; books without a row have no stock"""
+        S = self.stock_model
+        rows = (await db.execute(
+            select(S.book_id, S.on_hand, S.reserved).where(S.book_id.in_(book_ids))
+        )).all()
+        levels = {id: {"on_hand": 0, "reserved": 0, "available": 0} for id in book_ids}
+        for book_id, on_hand, reserved in rows:
+            levels[book_id] = {"on_hand": on_hand, "reserved": reserved, "available": on_hand - reserved}
+        return levels
+
+    async def reserve(self, db, lines, ttl=RESERVATION_TTL):
+        """
+        Hold stock for [(book_id, quantity), ...] under one new reservation id.
+        Raises InsufficientStock, holding nothing, if any line cannot be met.
+        """
+        S, R = self.stock_model, self.reservation_model
+        quantities = Counter()
+        for book_id, quantity in lines:
+            quantities[book_id] += quantity
+
+        async def operation(db):
+            for book_id in sorted(quantities):
+                quantity = quantities[book_id]
+                result = await db.execute(
+                    update(S)
+                    .where(S.book_id == book_id, S.on_hand - S.reserved >= quantity)
+                    .values(reserved=S.reserved + quantity, version=S.version + 1)
+                )
+                if result.rowcount == 0:
+                    available = (await self.levels(db, [book_id]))[book_id]["available"]
+                    raise InsufficientStock(book_id, quantity, available)
+
+            reservation_id = str(uuid.uuid4())
+            expires_at = datetime.utcnow() + timedelta(seconds=ttl)
+            await db.execute(insert(R), [
+                {"reservation_id": reservation_id, "book_id": book_id, "quantity": quantity,
+                 "status": HELD, "expires_at": expires_at}
+                for book_id, quantity in sorted(quantities.items())
+            ])
+            return {
+                "reservation_id": reservation_id,
+                "expires_at": expires_at.isoformat(),
+                "lines": [{"id": book_id, "quantity": q} for book_id, q in sorted(quantities.items())]
+            }
+
+        try:
+            reservation = await self._run(db, operation)
+        except InsufficientStock:
+            self.stats["rejected"] += 1
+            raise
+        self.stats["reserved"] += 1
+        return reservation
+
+    async def _settle(self, db, lines, status):
+        """Move held (or leased) lines to `status`, returning their stock (and using it up on commit)"""
+        S, R = self.stock_model, self.reservation_model
+        settled = 0
+        for line_id, book_id, quantity in sorted(lines, key=lambda line: line[1]):
+            # The status guard makes concurrent settles of the same line count once
+            result = await db.execute(
+                update(R).where(R.id == line_id, R.status.in_((HELD, LEASED))).values(status=status)
+            )
+            if result.rowcount == 0:
+                continue
+            values = {"reserved": S.reserved - quantity, "version": S.version + 1}
+            if status == COMMITTED:
+                values["on_hand"] = S.on_hand - quantity
+            await db.execute(update(S).where(S.book_id == book_id).values(**values))
+            settled += 1
+        return settled
+
+    async def _held_lines(self, db, reservation_id):
+        R = self.reservation_model
+        rows = (await db.execute(
+            select(R.id, R.book_id, R.quantity, R.status, R.expires_at).where(R.reservation_id == reservation_id)
+        )).all()
+        if not rows:
+            raise ReservationNotFound("Reservation not found")
+        held = [row for row in rows if row.status == HELD]
+        if not held:
+            raise ReservationError(f"Reservation is already {rows[0].status}")
+        return held
+
+    async def release(self, db, reservation_id):
+        """Return a held reservation's stock"""
+        async def operation(db):
+            held = await self._held_lines(db, reservation_id)
+            return await self._settle(db, [(r.id, r.book_id, r.quantity) for r in held], RELEASED)
+
+        released = await self._run(db, operation)
+        self.stats["released"] += 1
+        return {"reservation_id": reservation_id, "status": RELEASED, "lines": released}
+
+    async def commit(self, db, reservation_id):
+        """Turn a held reservation into a sale: the held copies leave on_hand for good"""
+        async def operation(db):
+            held = await self._held_lines(db, reservation_id)
+            lines = [(r.id, r.book_id, r.quantity) for r in held]
+            if held[0].expires_at < datetime.utcnow():
+                await self._settle(db, lines, EXPIRED)
+                return None
+            return await self._settle(db, lines, COMMITTED)
+
+        committed = await self._run(db, operation)
+        if committed is None:
+            self.stats["expired"] += 1
+            raise ReservationError("Reservation expired")
+        self.stats["committed"] += 1
+        return {"reservation_id": reservation_id, "status": COMMITTED, "lines": committed}
+
+    async def restock(self, db, book_id, quantity):
+        """Add `quantity` copies (negative to remove) to a book's stock, creating its row if needed"""
+        S = self.stock_model
+
+        async def operation(db):
+            result = await db.execute(
+                update(S).where(S.book_id == book_id, S.on_hand + quantity >= S.reserved)
+                .values(on_hand=S.on_hand + quantity, version=S.version + 1)
+            )
+            if result.rowcount == 0:
+                if await db.get(S, book_id) is not None or quantity < 0:
+                    available = (await self.levels(db, [book_id]))[book_id]["available"]
+                    raise InsufficientStock(book_id, -quantity, available)
+                await db.execute(insert(S).values(book_id=book_id, on_hand=quantity, reserved=0, version=0))
+            return (await self.levels(db, [book_id]))[book_id]
+
+        try:
+            return await self._run(db, operation)
+        except IntegrityError:
+            # A concurrent restock created the row first; now the UPDATE applies
+            return await self._run(db, operation)
+
+    async def release_expired(self, db):
+        """
+        Release every held reservation line past its expiry, returns the
+        number released. Leases whose owner stopped renewing them (a crashed
+        process) are reclaimed the same way.
+        """
+        R = self.reservation_model
+
+        async def operation(db):
+            rows = (await db.execute(
+                select(R.id, R.book_id, R.quantity)
+                .where(R.status.in_((HELD, LEASED)), R.expires_at < datetime.utcnow())
+            )).all()
+            return await self._settle(db, [tuple(row) for row in rows], EXPIRED)
+
+        expired = await self._run(db, operation)
+        self.stats["expired_lines"] += expired
+        return expired
+
+    def report(self):
+        return dict(self.stats, mode="database")
+
+    async def start(self, session_factory):
+        self.start_sweeper(session_factory)
+
+    async def stop(self):
+        await self.stop_sweeper()
+
+    def start_sweeper(self, session_factory, interval=RESERVATION_SWEEP_INTERVAL):
+        """Release expired reservations every `interval` seconds in the background"""
+        async def sweep():
+            while True:
+                try:
+                    async with session_factory() as db:
+                        expired = await self.release_expired(db)
+                    if expired:
+                        logger.info("Released %d expired %s reservation lines", expired, self.name)
+                except Exception:
+                    logger.exception("Error releasing expired %s reservations", self.name)
+                await asyncio.sleep(interval)
+
+        if self._sweeper is None:
+            self._sweeper = asyncio.ensure_future(sweep())
+
+    async def stop_sweeper(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+
+class ShardedStockLedger(StockLedger):
+    """
+    StockLedger that sells `hot_books` from memory.
+
+    For every hot book a block of stock is leased from the database: it is
+    added to the inventory row's reserved count and recorded as a LEASED
+    row of this process. Carts made only of hot books are reserved and
+    released against in-memory counters without touching the database;
+    every flush_interval the accumulated changes are written back in one
+    transaction (new reservation rows, status changes, one UPDATE per hot
+    book) and the leases are renewed and topped up. A commit waits for a
+    write-back that includes it, running one itself if need be, so every
+    acknowledged sale is in the database and already taken out of the
+    lease; commits arriving during a flush go out together. Other carts, and
+    reservations this process does not know, use the database as usual.
+    The counters are plain ints: all of this runs on one event loop and
+    nothing awaits between checking a counter and changing it.
+
+    The database always satisfies reserved = held rows + leased rows. A
+    crash loses the holds and releases of the last flush_interval, never a
+    sale: the dead process's lease expires and a sweeper hands the copies
+    it still held back to stock. A process that could not renew its lease
+    for half of lease_ttl stops taking holds (InventoryBusy) until it can;
+    only one cut off for the whole lease_ttl that still commits earlier
+    holds could sell copies a sweeper has already handed back.
+    """
+
+    def __init__(self, name, stock_model, reservation_model, hot_books,
+                 lease_size=INVENTORY_LEASE_SIZE, flush_interval=INVENTORY_FLUSH_INTERVAL,
+                 lease_ttl=INVENTORY_LEASE_TTL):
+        super().__init__(name, stock_model, reservation_model)
+        self.hot_books = set(hot_books)
+        self.lease_size = lease_size
+        self.flush_interval = flush_interval
+        self.lease_ttl = lease_ttl
+        self.lease_id = str(uuid.uuid4())
+        self._counters = {book_id: 0 for book_id in self.hot_books}  # copies in memory, free to hold
+        self._sold_out = set()
+        self._leased = {}  # book_id -> copies recorded in this process's lease row
+        self._tracked = {}  # reservation_id -> in-memory reservation, until written back and settled
+        self._lock = asyncio.Lock()  # flushes and lease changes
+        self._lease_valid_until = 0.0
+        self._flusher = None
+        self._session_factory = None
+
+    def report(self):
+        return dict(
+            self.stats,
+            mode="sharded",
+            tracked_reservations=len(self._tracked),
+            hot_books={
+                book_id: {"in_memory": copies, "leased": self._leased.get(book_id, 0)}
+                for book_id, copies in sorted(self._counters.items())
+            }
+        )
+
+    async def levels(self, db, book_ids):
+        levels = await super().levels(db, book_ids)
+        for book_id in book_ids:
+            if book_id in self._counters:
+                levels[book_id]["available"] += max(0, self._counters[book_id])
+        return levels
+
+    async def _top_up(self, db, book_id, need):
+        """
+        Make sure at least `need` copies of a hot book are in memory, leasing
+        at least lease_size more from the database when short. Returns the
+        number of copies leased; a book found sold out is not asked for
+        again before the next refill.
+        """
+        S, R = self.stock_model, self.reservation_model
+
+        async def operation(db):
+            available = (await StockLedger.levels(self, db, [book_id]))[book_id]["available"]
+            n = min(want, available)
+            if n <= 0:
+                return 0
+            result = await db.execute(
+                update(S).where(S.book_id == book_id, S.on_hand - S.reserved >= n)
+                .values(reserved=S.reserved + n, version=S.version + 1)
+            )
+            if result.rowcount == 0:
+                return 0
+            expires_at = datetime.utcnow() + timedelta(seconds=self.lease_ttl)
+            if book_id in self._leased:
+                await db.execute(
+                    update(R).where(R.reservation_id == self.lease_id, R.book_id == book_id, R.status == LEASED)
+                    .values(quantity=R.quantity + n, expires_at=expires_at)
+                )
+            else:
+                await db.execute(insert(R).values(
+                    reservation_id=self.lease_id, book_id=book_id, quantity=n, status=LEASED, expires_at=expires_at
+                ))
+            return n
+
+        async with self._lock:
+            # Concurrent callers queue here; most find the counter already refilled
+            missing = need - self._counters[book_id]
+            if missing <= 0 or book_id in self._sold_out:
+                return 0
+            want = max(missing, self.lease_size)
+            n = await self._run(db, operation)
+            if n < missing:
+                self._sold_out.add(book_id)
+            if n:
+                self._leased[book_id] = self._leased.get(book_id, 0) + n
+                self._counters[book_id] += n
+                self._lease_valid_until = max(self._lease_valid_until, time.monotonic() + self.lease_ttl / 2)
+                self.stats["leased"] += n
+        return n
+
+    async def reserve(self, db, lines, ttl=RESERVATION_TTL):
+        quantities = Counter()
+        for book_id, quantity in lines:
+            quantities[book_id] += quantity
+        if not quantities.keys() <= self.hot_books:
+            return await super().reserve(db, lines, ttl)
+
+        # Lease what is missing first: nothing may be taken from a counter
+        # while a flush could run, or the flush would see it neither in the
+        # lease nor in a reservation
+        for book_id in sorted(quantities):
+            if self._counters[book_id] < quantities[book_id]:
+                await self._top_up(db, book_id, quantities[book_id])
+        if time.monotonic() > self._lease_valid_until:
+            self.stats["busy"] += 1
+            raise InventoryBusy("Stock lease could not be renewed")
+
+        taken = []
+        for book_id in sorted(quantities):
+            if self._counters[book_id] < quantities[book_id]:
+                for taken_id, quantity in taken:
+                    self._counters[taken_id] += quantity
+                self.stats["rejected"] += 1
+                raise InsufficientStock(book_id, quantities[book_id], max(0, self._counters[book_id]))
+            self._counters[book_id] -= quantities[book_id]
+            taken.append((book_id, quantities[book_id]))
+
+        reservation_id = str(uuid.uuid4())
+        expires_at = datetime.utcnow() + timedelta(seconds=ttl)
+        self._tracked[reservation_id] = {
+            "lines": taken, "expires_at": expires_at, "status": HELD, "written": False, "dirty": True
+        }
+        self.stats["reserved"] += 1
+        self.stats["reserved_in_memory"] += 1
+        return {
+            "reservation_id": reservation_id,
+            "expires_at": expires_at.isoformat(),
+            "lines": [{"id": book_id, "quantity": q} for book_id, q in taken]
+        }
+
+    def _close(self, reservation, status):
+        """Settle an in-memory reservation; it reaches the database with the next flush"""
+        if reservation["status"] != HELD:
+            raise ReservationError(f"Reservation is already {reservation['status']}")
+        reservation["status"] = status
+        reservation["dirty"] = True
+        if status != COMMITTED:
+            for book_id, quantity in reservation["lines"]:
+                self._counters[book_id] += quantity
+
+    async def release(self, db, reservation_id):
+        reservation = self._tracked.get(reservation_id)
+        if reservation is None:
+            return await super().release(db, reservation_id)
+        self._close(reservation, RELEASED)
+        self.stats["released"] += 1
+        return {"reservation_id": reservation_id, "status": RELEASED, "lines": len(reservation["lines"])}
+
+    async def commit(self, db, reservation_id):
+        """Settle an in-memory reservation as a sale and write it back before returning"""
+        reservation = self._tracked.get(reservation_id)
+        if reservation is None:
+            return await super().commit(db, reservation_id)
+        if reservation["status"] == HELD and reservation["expires_at"] < datetime.utcnow():
+            self._close(reservation, EXPIRED)
+            self.stats["expired"] += 1
+            raise ReservationError("Reservation expired")
+        self._close(reservation, COMMITTED)
+        async with self._lock:
+            # Commits queued behind a flush have mostly been written by it
+            if reservation["dirty"]:
+                try:
+                    await self._flush(db)
+                except BaseException:
+                    # No other flush ran meanwhile, so the sale was not written
+                    if reservation["dirty"]:
+                        reservation["status"] = HELD
+                    raise
+        self.stats["committed"] += 1
+        return {"reservation_id": reservation_id, "status": COMMITTED, "lines": len(reservation["lines"])}
+
+    async def release_expired(self, db):
+        now = datetime.utcnow()
+        for reservation in list(self._tracked.values()):
+            if reservation["status"] == HELD and reservation["expires_at"] < now:
+                self._close(reservation, EXPIRED)
+                self.stats["expired_lines"] += len(reservation["lines"])
+        return await super().release_expired(db)
+
+    async def _write_behind(self, db, batch, in_memory, leased):
+        """
+        One flush transaction. Returns the books whose lease was lost, the
+        copies handed back to counters that must be taken out again because
+        their reservation had already been settled elsewhere, and the number
+        of reservation rows inserted.
+        """
+        S, R = self.stock_model, self.reservation_model
+        reserved_delta, on_hand_delta, stale = Counter(), Counter(), Counter()
+        rows, settled = [], {}
+        for reservation_id, reservation, status, written in batch:
+            for book_id, quantity in reservation["lines"]:
+                if written:
+                    if status != HELD:
+                        settled[(reservation_id, book_id)] = (quantity, status)
+                    continue
+                rows.append({"reservation_id": reservation_id, "book_id": book_id, "quantity": quantity,
+                             "status": status, "expires_at": reservation["expires_at"]})
+                if status == HELD:
+                    reserved_delta[book_id] += quantity
+                elif status == COMMITTED:
+                    on_hand_delta[book_id] -= quantity
+
+        # Lines written by an earlier flush: look up their current status
+        # in one query, then move them in one UPDATE per new status
+        transitions = {}
+        ids = sorted({reservation_id for reservation_id, _ in settled})
+        for i in range(0, len(ids), 500):
+            current = (await db.execute(
+                select(R.id, R.reservation_id, R.book_id, R.status)
+                .where(R.reservation_id.in_(ids[i:i + 500]), R.status.in_((HELD, EXPIRED))).with_for_update()
+            )).all()
+            for line_id, reservation_id, book_id, current_status in current:
+                if (reservation_id, book_id) not in settled:
+                    continue
+                quantity, status = settled.pop((reservation_id, book_id))
+                if current_status == HELD:
+                    transitions.setdefault(status, []).append(line_id)
+                    reserved_delta[book_id] -= quantity
+                    if status == COMMITTED:
+                        on_hand_delta[book_id] -= quantity
+                elif status == COMMITTED:
+                    # Expired by a sweeper meanwhile, which already returned
+                    # its copies; the sale was confirmed, so it still stands
+                    transitions.setdefault(status, []).append(line_id)
+                    on_hand_delta[book_id] -= quantity
+                else:
+                    settled[(reservation_id, book_id)] = (quantity, status)
+        for (_, book_id), (quantity, status) in settled.items():
+            # Already settled elsewhere: copies handed back must not be sold again
+            if status != COMMITTED:
+                stale[book_id] += quantity
+        for status, line_ids in transitions.items():
+            for i in range(0, len(line_ids), 500):
+                await db.execute(update(R).where(R.id.in_(line_ids[i:i + 500])).values(status=status))
+
+        if rows:
+            await db.execute(insert(R), rows)
+
+        lost = set()
+        expires_at = datetime.utcnow() + timedelta(seconds=self.lease_ttl)
+        for book_id, copies in leased.items():
+            copies_now = in_memory[book_id] - stale[book_id]
+            result = await db.execute(
+                update(R).where(R.reservation_id == self.lease_id, R.book_id == book_id, R.status == LEASED)
+                .values(quantity=copies_now, expires_at=expires_at)
+            )
+            if result.rowcount:
+                reserved_delta[book_id] += copies_now - copies
+            else:
+                lost.add(book_id)
+
+        for book_id in sorted(set(reserved_delta) | set(on_hand_delta)):
+            if reserved_delta[book_id] or on_hand_delta[book_id]:
+                await db.execute(update(S).where(S.book_id == book_id).values(
+                    reserved=S.reserved + reserved_delta[book_id],
+                    on_hand=S.on_hand + on_hand_delta[book_id],
+                    version=S.version + 1
+                ))
+        return lost, stale, len(rows)
+
+    async def flush(self, db):
+        """Write in-memory changes back and renew the leases"""
+        async with self._lock:
+            await self._flush(db)
+
+    async def _flush(self, db):
+        """flush() for a caller already holding the lock"""
+        # No await between reading the counters and the reservations, so they agree
+        batch = [(reservation_id, r, r["status"], r["written"])
+                 for reservation_id, r in self._tracked.items() if r["dirty"]]
+        for _, reservation, _, _ in batch:
+            reservation["dirty"] = False
+        leased = dict(self._leased)
+        in_memory = {book_id: self._counters[book_id] for book_id in leased}
+
+        try:
+            lost, stale, written = await self._run(
+                db, lambda db: self._write_behind(db, batch, in_memory, leased)
+            )
+        except BaseException:
+            # Including cancellation: the changes go out with the next flush
+            for _, reservation, _, _ in batch:
+                reservation["dirty"] = True
+            raise
+
+        for reservation_id, reservation, _, _ in batch:
+            reservation["written"] = True
+            if reservation["status"] != HELD and not reservation["dirty"]:
+                del self._tracked[reservation_id]
+        for book_id, copies in stale.items():
+            self._counters[book_id] -= copies
+        for book_id in leased:
+            if book_id in lost:
+                # Reclaimed by a sweeper: the copies are no longer ours to sell
+                self._counters[book_id] -= in_memory[book_id]
+                del self._leased[book_id]
+                self.stats["leases_lost"] += 1
+            else:
+                self._leased[book_id] = in_memory[book_id] - stale[book_id]
+        self._lease_valid_until = time.monotonic() + self.lease_ttl / 2
+        self.stats["flushes"] += 1
+        self.stats["flushed_rows"] += written
+        self.stats["stale_settles"] += sum(stale.values())
+
+    async def _refill(self, db):
+        self._sold_out.clear()
+        for book_id in sorted(self.hot_books):
+            if self._counters[book_id] < self.lease_size // 2:
+                await self._top_up(db, book_id, self.lease_size)
+
+    async def start(self, session_factory):
+        """
+        Reclaim stale leases (from a crash), lease stock for the hot books and
+        start writing back. A reclaimed lease only counts copies that were
+        never sold: commits were written back, and taken out of the lease
+        row, before they were acknowledged.
+        """
+        async with session_factory() as db:
+            reclaimed = await self.release_expired(db)
+            if reclaimed:
+                logger.info("Reclaimed %d expired %s reservation and lease lines", reclaimed, self.name)
+            await self._refill(db)
+        self._lease_valid_until = time.monotonic() + self.lease_ttl / 2
+
+        async def write_behind():
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                try:
+                    async with session_factory() as db:
+                        await self.flush(db)
+                        await self._refill(db)
+                except Exception:
+                    logger.exception("Error writing back %s inventory", self.name)
+
+        self.start_sweeper(session_factory)
+        if self._flusher is None:
+            self._flusher = asyncio.ensure_future(write_behind())
+        self._session_factory = session_factory
+
+    async def stop(self):
+        """Write everything back and hand the leased copies back to the database"""
+        await self.stop_sweeper()
+        if self._flusher is None:
+            return
+        self._flusher.cancel()
+        try:
+            await self._flusher
+        except asyncio.CancelledError:
+            pass
+        self._flusher = None
+
+        S, R = self.stock_model, self.reservation_model
+        async with self._session_factory() as db:
+            await self.flush(db)
+
+            async def operation(db):
+                for book_id, copies in sorted(self._leased.items()):
+                    result = await db.execute(
+                        update(R).where(R.reservation_id == self.lease_id, R.book_id == book_id, R.status == LEASED)
+                        .values(status=RELEASED)
+                    )
+                    if result.rowcount:
+                        await db.execute(update(S).where(S.book_id == book_id).values(
+                            reserved=S.reserved - copies, version=S.version + 1
+                        ))
+
+            async with self._lock:
+                await self._run(db, operation)
+                for book_id, copies in self._leased.items():
+                    self._counters[book_id] -= copies
+                self._leased.clear()
+
+
+def stock_ledger_for(store, stock_model, reservation_model):
+    """StockLedger, or ShardedStockLedger when <STORE_>INVENTORY_MODE is 'sharded'"""
+    mode = store_setting(store, "INVENTORY_MODE", "database").strip().lower()
+    if mode not in INVENTORY_MODES:
+        raise ValueError(f"INVENTORY_MODE must be one of {INVENTORY_MODES}, got {mode!r}")
+    if mode == "database":
+        return StockLedger(store, stock_model, reservation_model)
+
+    hot_books = {int(id) for id in store_setting(store, "INVENTORY_HOT_BOOKS", "").split(",") if id.strip()}
+    return ShardedStockLedger(
+        store, stock_model, reservation_model, hot_books,
+        lease_size=int(store_setting(store, "INVENTORY_LEASE_SIZE", INVENTORY_LEASE_SIZE)),
+        flush_interval=int(store_setting(store, "INVENTORY_FLUSH_MS", INVENTORY_FLUSH_INTERVAL * 1000)) / 1000,
+        lease_ttl=int(store_setting(store, "INVENTORY_LEASE_TTL_SECONDS", INVENTORY_LEASE_TTL))
+    )
@@ -0,0 +1,188 @@
+import atexit
+import copy
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+import orjson
+from starlette.datastructures import MutableHeaders
+
+# Logging for the API processes. Records are put on an in-memory queue by the
+# thread that logs them and written out by a single listener thread, so
+# request handlers never wait on stdout. Output is one JSON object per line
+# (LOG_FORMAT=json) or plain text for local development (LOG_FORMAT=text).
+# Every record logged while a request is handled carries its request id.
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Per-logger levels, e.g. "app.sql=DEBUG,uvicorn.access=WARNING"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# Incoming ids are reused when they look like an id, otherwise replaced
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+request_id = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed with extra= and
+# goes into the JSON object as a field of its own (uvicorn's ANSI-coloured
+# copy of its messages is dropped)
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "request_id", "color_message"
+}
+
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps records with the id of the request being handled, in the thread that logs them"""
+
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Resolve the message and traceback in the logging thread, while the
+        # arguments are still current, but keep the traceback apart from the
+        # message (QueueHandler would append it) for the formatters
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record):
+        record.request_id = getattr(record, "request_id", None) or "-"
+        return super().format(record)
+
+
+def _parse_levels(spec):
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def _route_uvicorn_loggers():
+    """
+    Hand uvicorn's loggers to the root queue handler and apply LOG_LEVELS.
+    uvicorn installs its own handlers when it starts (after the app module
+    may already have been imported once, e.g. under python -m), so this runs
+    on every configure_logging call.
+    """
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logger = logging.getLogger(name)
+        logger.handlers[:] = []
+        logger.propagate = True
+    for name, level in _parse_levels(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+
+def configure_logging():
+    """
+    Route all logging through the queue and its listener thread. Safe to
+    call more than once: the queue and listener are installed by the first
+    call in a process, and every call routes uvicorn's own loggers through
+    them again.
+    """
+    global _listener
+    if _listener is not None:
+        _route_uvicorn_loggers()
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JSONFormatter())
+
+    records = queue.SimpleQueue()
+    handler = _QueueHandler(records)
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(LOG_LEVEL)
+    _route_uvicorn_loggers()
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    # Write out whatever is still queued when the process exits
+    atexit.register(_listener.stop)
+
+
+def outgoing_headers():
+    """Headers that carry the current request id on to another service"""
+    current = request_id.get()
+    return {REQUEST_ID_HEADER: current} if current else {}
+
+
+class RequestIdMiddleware:
+    """
+    Gives every HTTP request an id: the caller's X-Request-ID when it sent a
+    usable one, a new one otherwise. The id is set for everything logged
+    while the request is handled and returned in the X-Request-ID header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                incoming = value.decode("latin-1")
+                break
+        current = incoming if incoming and _VALID_REQUEST_ID.fullmatch(incoming) else uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = current
+            await send(message)
+
+        token = request_id.set(current)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id.reset(token)
+
+
+def install_logging(app):
+    """Configure logging for the process and give `app`'s requests ids; call after install_metrics"""
+    configure_logging()
+    app.add_middleware(RequestIdMiddleware)
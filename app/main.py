@@ -1,14 +1,50 @@
+"""
+Launch the store APIs.
+
+By default all stores are served by the gateway (app/gateway_main.py) on a
+single port, headless, with GATEWAY_WORKERS worker processes. Pass --separate
+to open the old layout: one gnome-terminal per store on ports 8000/8001/8002.
+"""
+
+import argparse
 import os
 import subprocess
+import sys
+
+import uvicorn
+from dotenv import load_dotenv
+
+load_dotenv()
 
 # Define the commands to run each script in a new terminal
-commands = [
-    'gnome-terminal -- bash -c "python3 amazon_main.py; exec bash"',
-    'gnome-terminal -- bash -c "python3 flipkart_main.py; exec bash"',
-    'gnome-terminal -- bash -c "python3 sapna_main.py; exec bash"',
+SEPARATE_COMMANDS = [
+    'gnome-terminal -- bash -c "python3 -m app.amazon_main; exec bash"',
+    'gnome-terminal -- bash -c "python3 -m app.flipkart_main; exec bash"',
+    'gnome-terminal -- bash -c "python3 -m app.sapna_main; exec bash"',
 ]
 
-for cmd in commands:
-    subprocess.Popen(cmd, shell=True)
 
-print("Launched amazon_main.py, flipkart_main.py, and sapna_main.py in new terminals.")
\ No newline at end of file
+def launch_separate():
+    for cmd in SEPARATE_COMMANDS:
+        subprocess.Popen(cmd, shell=True)
+    print("Launched amazon_main.py, flipkart_main.py, and sapna_main.py in new terminals.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--separate", action="store_true", help="one process and terminal per store")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("GATEWAY_WORKERS", "1")))
+    args = parser.parse_args()
+
+    if args.separate:
+        launch_separate()
+        return
+
+    print(f"Serving amazon, flipkart and sapna on {args.host}:{args.port} with {args.workers} worker(s)")
+    uvicorn.run("app.gateway_main:app", host=args.host, port=args.port, workers=args.workers, log_level="info")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
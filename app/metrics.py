@@ -0,0 +1,200 @@
+import logging
+import threading
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+
+from app import query_tracking
+from app.database import created_engines, get_async_engine, get_engine
+
+# Process-wide request, query and connection pool metrics served at GET /metrics
+# in the Prometheus text exposition format. Counters live in this process
+# only: with GATEWAY_WORKERS > 1 each worker reports its own, and Prometheus
+# sums them across scrape targets.
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Queries run outside a request (startup, seeding, the inventory flusher)
+BACKGROUND_ROUTE = "background"
+# Requests that matched no route (404s), counted under one label instead of per path
+UNMATCHED_ROUTE = "unmatched"
+
+_lock = threading.Lock()
+_requests = {}          # (method, route, status) -> count
+_errors = {}            # (method, route) -> count of 5xx responses and unhandled exceptions
+_latency = {}           # (method, route) -> [bucket counts..., +Inf count, sum]
+_queries = {}           # (route, store) -> [count, seconds]
+_over_budget = {}       # (method, route) -> count of requests over the query budget
+
+
+def _observe_request(method, route, status, seconds, failed):
+    with _lock:
+        key = (method, route, str(status))
+        _requests[key] = _requests.get(key, 0) + 1
+        if failed:
+            _errors[(method, route)] = _errors.get((method, route), 0) + 1
+        histogram = _latency.get((method, route))
+        if histogram is None:
+            histogram = _latency[(method, route)] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                histogram[i] += 1
+        histogram[len(LATENCY_BUCKETS)] += 1
+        histogram[-1] += seconds
+
+
+def _observe_queries(route, per_store):
+    with _lock:
+        for store, (count, seconds) in per_store.items():
+            totals = _queries.setdefault((route, store), [0, 0.0])
+            totals[0] += count
+            totals[1] += seconds
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request. The route label is the
+    matched route's path template, read from the scope once routing has
+    run, so path parameters and unknown URLs do not explode the series.
+
+    Each request's SQL statements are collected with query_tracking: their
+    count and time go out in a Server-Timing header (statements run while a
+    streaming body is sent come after the headers and are left out of it)
+    and requests over QUERY_BUDGET are logged and counted.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        with query_tracking.tracking() as queries:
+            async def send_wrapper(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    if query_tracking.SERVER_TIMING:
+                        MutableHeaders(scope=message).append("Server-Timing", queries.server_timing())
+                await send(message)
+
+            failed = False
+            try:
+                await self.app(scope, receive, send_wrapper)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                seconds = time.perf_counter() - start
+                method = scope["method"]
+                route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+                _observe_request(method, route, status, seconds, failed or status >= 500)
+                _observe_queries(route, queries.per_store)
+                if queries.over_budget():
+                    logger.warning(
+                        "%s %s ran %d queries, over the budget of %d", method, route, queries.count,
+                        query_tracking.QUERY_BUDGET, extra={"server_timing": queries.server_timing()}
+                    )
+                    with _lock:
+                        _over_budget[(method, route)] = _over_budget.get((method, route), 0) + 1
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _pool_lines():
+    lines = []
+    gauges = {
+        "db_pool_size": ("Configured pool size", "size"),
+        "db_pool_checked_out": ("Connections currently checked out", "checkedout"),
+        "db_pool_overflow": ("Connections open beyond pool_size (negative while the pool is filling)", "overflow"),
+        "db_pool_checked_in": ("Idle connections in the pool", "checkedin"),
+    }
+    counters = {
+        "db_pool_checkouts_total": ("Connection checkouts that had to go to the pool", "checkouts"),
+        "db_pool_wait_seconds_total": ("Time spent waiting for a pooled connection", "wait_seconds"),
+        "db_pool_timeouts_total": ("Checkouts that gave up after pool_timeout", "timeouts"),
+    }
+    pools = []
+    for kind, store in created_engines():
+        engine = get_engine(store) if kind == "engine" else get_async_engine(store).sync_engine
+        pools.append((_labels(store=store, engine="async" if kind == "async_engine" else "sync"), engine.pool))
+
+    for name, (help_text, attribute) in gauges.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        # Pools without sizing (SQLite, NullPool) are skipped
+        lines += [f"{name}{labels} {getattr(pool, attribute)()}" for labels, pool in pools if hasattr(pool, attribute)]
+    for name, (help_text, attribute) in counters.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        lines += [f"{name}{labels} {getattr(pool, attribute)}" for labels, pool in pools if hasattr(pool, attribute)]
+    return lines
+
+
+def render_metrics():
+    """The current metrics in the Prometheus text format"""
+    with _lock:
+        requests = dict(_requests)
+        errors = dict(_errors)
+        latency = {key: list(value) for key, value in _latency.items()}
+        queries = {key: list(value) for key, value in _queries.items()}
+        over_budget = dict(_over_budget)
+    for store, totals in query_tracking.background_queries().items():
+        queries[(BACKGROUND_ROUTE, store)] = totals
+
+    lines = ["# HELP http_requests_total HTTP requests by route and status", "# TYPE http_requests_total counter"]
+    for (method, route, status), count in sorted(requests.items()):
+        lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+    lines += ["# HELP http_request_errors_total Requests answered with a 5xx or failed with an exception",
+              "# TYPE http_request_errors_total counter"]
+    for (method, route), count in sorted(errors.items()):
+        lines.append(f"http_request_errors_total{_labels(method=method, route=route)} {count}")
+
+    lines += ["# HELP http_request_duration_seconds Request latency by route",
+              "# TYPE http_request_duration_seconds histogram"]
+    for (method, route), histogram in sorted(latency.items()):
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), histogram):
+            lines.append(f"http_request_duration_seconds_bucket{_labels(method=method, route=route, le=bound)} {count}")
+        labels = _labels(method=method, route=route)
+        lines.append(f"http_request_duration_seconds_sum{labels} {histogram[-1]}")
+        lines.append(f"http_request_duration_seconds_count{labels} {histogram[len(LATENCY_BUCKETS)]}")
+
+    lines += ["# HELP db_queries_total SQL statements executed, by the route that issued them",
+              "# TYPE db_queries_total counter"]
+    lines += [f"db_queries_total{_labels(route=route, store=store)} {count}"
+              for (route, store), (count, _) in sorted(queries.items())]
+    lines += ["# HELP db_query_seconds_total Time spent executing SQL statements, by route",
+              "# TYPE db_query_seconds_total counter"]
+    lines += [f"db_query_seconds_total{_labels(route=route, store=store)} {seconds}"
+              for (route, store), (_, seconds) in sorted(queries.items())]
+
+    lines += ["# HELP http_requests_over_query_budget_total Requests that ran more than QUERY_BUDGET SQL statements",
+              "# TYPE http_requests_over_query_budget_total counter"]
+    lines += [f"http_requests_over_query_budget_total{_labels(method=method, route=route)} {count}"
+              for (method, route), count in sorted(over_budget.items())]
+
+    lines += _pool_lines()
+    return "\n".join(lines) + "\n"
+
+
+def install_metrics(app):
+    """Time every request of `app` and serve the metrics at GET /metrics"""
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(render_metrics(), media_type=CONTENT_TYPE)
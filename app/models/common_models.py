@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.database import Base
+
+class SeedVersion(Base):
+    __tablename__ = "seed_versions"
+
+    store = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False)  # app.seeding.SEED_VERSION the store was last prepared with
+    seeded_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
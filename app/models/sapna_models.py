@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from app.titles import keep_normalized_title
 from app.database import Base
 
 class sapna(Base):
@@ -9,11 +10,16 @@ class sapna(Base):
     id = Column(Integer, primary_key=True, index=True)
     sapna_id = Column(String(50), unique=True, index=True, nullable=False)
     name = Column(String(255), nullable=False)
+    name_normalized = Column(String(255), nullable=True, index=True)  # lower-cased, whitespace-collapsed name for lookups
     publisher = Column(String(255), nullable=False)
     genre = Column(String(100), nullable=False)
     subject_code = Column(String(10), nullable=False)
     serial_number = Column(Integer, nullable=False)
+    price_id = Column(Integer, ForeignKey("sapna_prices.id"), nullable=True, index=True)  # materialized product -> price mapping
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # ETag / Last-Modified of catalog responses
+
+keep_normalized_title(sapna)
 
 class Price(Base):
     __tablename__ = "sapna_prices"  # Changed to avoid conflicts
@@ -21,6 +27,7 @@ class Price(Base):
     id = Column(Integer, primary_key=True, index=True)
     price = Column(Float, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # ETag / Last-Modified of price responses
 
 class Deliverable(Base):
     __tablename__ = "sapna_deliverables"  # Changed to avoid conflicts
@@ -38,3 +45,23 @@ class Discount(Base):
     cost_to = Column(Float, nullable=False)
     percent_off = Column(Float, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+class Inventory(Base):
+    __tablename__ = "sapna_inventory"
+
+    book_id = Column(Integer, ForeignKey("sapnas.id"), primary_key=True)
+    on_hand = Column(Integer, nullable=False, default=0)  # physical copies in stock
+    reserved = Column(Integer, nullable=False, default=0)  # copies held by open reservations
+    version = Column(Integer, nullable=False, default=0)  # bumped on every change, for optimistic readers
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Reservation(Base):
+    __tablename__ = "sapna_reservations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    reservation_id = Column(String(36), nullable=False, index=True)  # shared by all lines of one cart
+    book_id = Column(Integer, ForeignKey("sapnas.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    status = Column(String(10), nullable=False, default="held")  # held, committed, released or expired
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,19 @@
+from sqlalchemy import update
+
+
+def assign_price_ids(db, book_model, price_model):
+    """
+    Materialize the product -> price mapping for books that do not have a
+    price reference yet, using the original deterministic rule
+    price_id = (book id % price count) + 1. Runs as a single UPDATE.
+    """
+    price_count = db.query(price_model).count()
+    if price_count == 0:
+        return 0
+
+    result = db.execute(
+        update(book_model)
+        .where(book_model.price_id.is_(None))
+        .values(price_id=(book_model.id % price_count) + 1)
+    )
+    return result.rowcount
@@ -0,0 +1,158 @@
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.database import store_setting
+
+# Every SQL statement any engine runs is timed here (engine-wide cursor
+# events) and added to the QueryLog of the request that ran it. The metrics
+# middleware (app/metrics.py) opens a log per request, reports it in a
+# Server-Timing header and in /metrics, and flags requests over QUERY_BUDGET.
+#
+# Statements are logged to the "app.sql" logger instead of engine echo
+# (which prints every statement to stdout as it runs): a sample of them at
+# INFO, SQL_LOG_SAMPLE_RATE of all statements (per store e.g.
+# AMAZON_SQL_LOG_SAMPLE_RATE), and every slow one at WARNING.
+
+sql_logger = logging.getLogger("app.sql")
+
+# Statements slower than this are logged with their parameters; 0 disables
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# Requests running more statements than this are flagged; 0 disables
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "10"))
+# Add a Server-Timing header with each store's query count and time
+SERVER_TIMING = os.getenv("SERVER_TIMING", "True").strip().lower() in ("1", "true", "yes", "on")
+
+# Longest statement / parameter text logged
+_SQL_LOG_TEXT = 2000
+
+_sample_rates = {}
+
+
+def sample_rate(store):
+    """Share of the store's statements logged, 0 to 1"""
+    rate = _sample_rates.get(store)
+    if rate is None:
+        rate = _sample_rates[store] = min(max(float(store_setting(store, "SQL_LOG_SAMPLE_RATE", "0")), 0.0), 1.0)
+    return rate
+
+
+class QueryLog:
+    """Statements run within one request: count and seconds, in total and per store"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.per_store = {}     # store -> [count, seconds]
+
+    def add(self, store, seconds):
+        self.count += 1
+        self.seconds += seconds
+        totals = self.per_store.setdefault(store, [0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+
+    def over_budget(self, budget=None):
+        budget = QUERY_BUDGET if budget is None else budget
+        return budget > 0 and self.count > budget
+
+    def server_timing(self):
+        """Server-Timing header value: the total, then each store (`db;dur=3.12;count=4, db-amazon;...`)"""
+        entries = [f"db;dur={self.seconds * 1000:.2f};count={self.count}"]
+        entries += [
+            f"db-{store};dur={seconds * 1000:.2f};count={count}"
+            for store, (count, seconds) in sorted(self.per_store.items())
+        ]
+        return ", ".join(entries)
+
+
+# The log of the request in progress. The log object is shared with copies
+# of the context, so statements from sync endpoints running in the
+# threadpool land in it too.
+_current = ContextVar("query_log", default=None)
+
+# Statements run outside any request (startup, seeding, the inventory flusher)
+background = QueryLog()
+_background_lock = threading.Lock()
+
+
+@contextmanager
+def tracking():
+    """
+    Collect the statements run inside the block into a new QueryLog:
+
+        with tracking() as queries:
+            ...
+        assert queries.count <= 3
+    """
+    log = QueryLog()
+    token = _current.set(log)
+    try:
+        yield log
+    finally:
+        _current.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    _record(conn, statement, parameters)
+
+
+@event.listens_for(Engine, "handle_error")
+def _query_failed(context):
+    conn = context.connection
+    if conn is not None and conn.info.get("query_started"):
+        _record(conn, context.statement, context.parameters)
+
+
+def _record(conn, statement, parameters):
+    seconds = time.perf_counter() - conn.info["query_started"].pop()
+    store = conn.engine.logging_name or "default"
+    if SLOW_QUERY_MS > 0 and seconds * 1000 >= SLOW_QUERY_MS:
+        _log_statement(logging.WARNING, "Slow query", store, seconds, statement, parameters)
+    else:
+        rate = sample_rate(store)
+        if rate > 0 and (rate >= 1 or random.random() < rate):
+            _log_statement(logging.INFO, "Query", store, seconds, statement, parameters)
+
+    log = _current.get()
+    if log is not None:
+        log.add(store, seconds)
+    else:
+        with _background_lock:
+            background.add(store, seconds)
+
+
+def background_queries():
+    """{store: (count, seconds)} of the statements run outside any request so far"""
+    with _background_lock:
+        return {store: tuple(totals) for store, totals in background.per_store.items()}
+
+
+def _log_statement(level, message, store, seconds, statement, parameters):
+    if sql_logger.isEnabledFor(level):
+        sql_logger.log(level, f"{message} on {store} ({seconds * 1000:.1f}ms)", extra={
+            "store": store,
+            "duration_ms": round(seconds * 1000, 3),
+            "statement": _shorten(statement),
+            "parameters": _shorten(repr(parameters)),
+        })
+
+
+def _shorten(text):
+    text = re.sub(r"\s+", " ", str(text)).strip()
+    return text if len(text) <= _SQL_LOG_TEXT else text[:_SQL_LOG_TEXT] + "..."
+
@@ -0,0 +1,58 @@
+from decimal import Decimal
+from functools import lru_cache
+from typing import List
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+from starlette.responses import Response
+
+# FastAPI passes whatever an endpoint returns through jsonable_encoder
+# before the response class sees it, which for list-heavy results costs more
+# than the encoding itself. Routers use FastJSONResponse as their default
+# class, and endpoints returning long lists return one directly so the
+# content goes straight to orjson.
+
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    """Types orjson does not encode natively, encoded the way jsonable_encoder would"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model):
+    return TypeAdapter(List[model])
+
+
+def encode_json(content):
+    """
+    JSON bytes for dicts and lists. A Pydantic model, or a list of models
+    of one class, is serialized by pydantic-core directly.
+    """
+    if isinstance(content, BaseModel):
+        return content.__pydantic_serializer__.to_json(content)
+    if isinstance(content, list) and content and isinstance(content[0], BaseModel):
+        model = type(content[0])
+        if all(type(item) is model for item in content):
+            return _list_adapter(model).dump_json(content)
+    return orjson.dumps(content, default=_default, option=JSON_OPTIONS)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """ORJSONResponse that also encodes Pydantic models, decimals and sets"""
+
+    def render(self, content):
+        return encode_json(content)
+
+
+class PreEncodedJSONResponse(Response):
+    """Serves JSON bytes encoded once up front, for payloads that never change"""
+    media_type = "application/json"
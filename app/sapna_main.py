@@ -1,9 +1,13 @@
 from fastapi import FastAPI
 from app.apis.sapna_api import router
+from app.log_config import install_logging
+from app.metrics import install_metrics
 import uvicorn
 
 app = FastAPI()
 app.include_router(router, prefix="/sapna")
+install_metrics(app)
+install_logging(app)
 
 if __name__ == "__main__":
     uvicorn.run("app.sapna_main:app", host="0.0.0.0",port=8002,reload=True,log_level="debug")
@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+# Request bodies shared by the Amazon, Flipkart and Sapna routers
+
+# Upper bound on the number of items accepted by the batch endpoints
+MAX_BATCH_SIZE = 500
+
+# Largest page of GET /books, and rows fetched per round trip by /books/export
+MAX_PAGE_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000
+
+class PriceBatchRequest(BaseModel):
+    ids: List[int] = []
+    names: List[str] = []
+
+class DeliveryBatchRequest(BaseModel):
+    pincodes: List[str] = []
+
+class CartLine(BaseModel):
+    id: int
+    quantity: int = Field(gt=0)
+
+class QuoteRequest(BaseModel):
+    lines: List[CartLine] = []
+
+class ReserveRequest(BaseModel):
+    lines: List[CartLine] = []
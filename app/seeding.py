@@ -0,0 +1,88 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from app.database import Base, add_missing_columns, get_engine, get_session_factory
+from app.models.common_models import SeedVersion
+
+logger = logging.getLogger(__name__)
+
+# Bump when seed data or columns change so existing databases are prepared again
+SEED_VERSION = 3
+
+# Prepare (create tables, migrate, seed) on app startup. Set to False when the
+# databases are prepared by `python db_init.py` before workers start.
+SEED_ON_STARTUP = os.getenv("SEED_ON_STARTUP", "True").lower() in ("1", "true", "yes", "on")
+
+
+def seed_version(engine, store):
+    """Seed version recorded in the store's database, None if never prepared. One query."""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(SeedVersion.version).where(SeedVersion.store == store)).scalar()
+    except (OperationalError, ProgrammingError):
+        # seed_versions does not exist yet
+        return None
+
+
+def bulk_seed(db, model, rows):
+    """Insert `rows` in a single executemany if the table is empty, returns the number inserted"""
+    if db.execute(select(model.id).limit(1)).first() is not None:
+        return 0
+    db.execute(insert(model), rows)
+    return len(rows)
+
+
+@contextmanager
+def _preparation_lock(engine, store, timeout=60):
+    """Serialize preparation across worker processes starting together (MySQL named lock)"""
+    if engine.dialect.name != "mysql":
+        yield
+        return
+    name = f"seed_{store}"
+    with engine.connect() as conn:
+        conn.execute(text("SELECT GET_LOCK(:name, :timeout)"), {"name": name, "timeout": timeout})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+
+
+def prepare_store(store, models, seed, force=False):
+    """
+    Make a store's database ready to serve: create missing tables and
+    columns, run `seed(db)` and record SEED_VERSION. Skipped after a single
+    marker query when the database is already at SEED_VERSION, unless
+    `force` is set. Returns True when the database was prepared.
+    """
+    engine = get_engine(store)
+    if not force and (seed_version(engine, store) or 0) >= SEED_VERSION:
+        return False
+
+    with _preparation_lock(engine, store):
+        # Another worker may have finished while we waited for the lock
+        if not force and (seed_version(engine, store) or 0) >= SEED_VERSION:
+            return False
+
+        start = time.perf_counter()
+        tables = [model.__table__ for model in models] + [SeedVersion.__table__]
+        Base.metadata.create_all(bind=engine, tables=tables)
+        add_missing_columns(engine, *models)
+
+        db = get_session_factory(store)()
+        try:
+            seed(db)
+            db.merge(SeedVersion(store=store, version=SEED_VERSION))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    logger.info("Prepared %s database at seed version %d in %.0fms", store, SEED_VERSION, (time.perf_counter() - start) * 1000)
+    return True
@@ -0,0 +1,223 @@
+from bisect import bisect_left, insort
+from heapq import heapify, heappop, heappush
+
+from app.book_index import BookIndex
+from app.titles import normalize_title, prefix_successor
+
+# Fields offered as completions, in ranking order
+SUGGEST_FIELDS = ("name", "publisher", "subject_code")
+
+# Index entries per block; a block splits in two when it grows past twice this
+BLOCK_SIZE = 128
+
+# Results for prefixes up to this length are memoized until the index changes;
+# short prefixes are the most frequent keystrokes and the most expensive scans
+MEMO_PREFIX_LEN = 6
+MEMO_SIZE = 10000
+
+
+def _terms(field, normalized):
+    """
+    Searchable terms for a value: the whole value, plus every later word start
+    for names so that "learn" also completes "Deep Learning".
+    """
+    yield normalized, False
+    if field == "name":
+        for i, char in enumerate(normalized):
+            if char == " " and i + 1 < len(normalized):
+                yield normalized[i + 1:], True
+
+
+class SuggestIndex(BookIndex):
+    """
+    Typeahead index over book names, publishers and subject codes.
+
+    Terms live in a sorted array cut into blocks, and each block also keeps
+    its entries in ranking order. A prefix query bisects to the blocks
+    holding its matches, scans the partly covered blocks at either end and
+    merges the ranked lists of the blocks in between through a heap, so the
+    best completions are found among every match while only about `limit`
+    entries per block are looked at. Books are added and removed
+    incrementally; a full rebuild is a single sort.
+    """
+
+    FIELDS = ("id",) + SUGGEST_FIELDS
+
+    def __init__(self):
+        super().__init__()
+        self._blocks = []    # sorted runs of (term, is_inner_word, field_rank, text)
+        self._maxes = []     # last key of each block, to bisect to a block
+        self._ranked = []    # each block's (score, key) best first, None until needed again after a change
+        self._books = {}     # key -> set of book ids
+        self._by_book = {}   # book id -> keys it contributed
+        self._memo = {}      # (short prefix, limit) -> result
+
+    def _entries(self, book):
+        for rank, field in enumerate(SUGGEST_FIELDS):
+            text = getattr(book, field)
+            if not text:
+                continue
+            for term, inner in _terms(field, normalize_title(text)):
+                yield (term, inner, rank, text)
+
+    def _score(self, key):
+        """Rank of a key among prefix matches that are not exact: lower is better"""
+        _, inner, rank, text = key
+        return (inner, rank, -len(self._books[key]), len(text), text)
+
+    def _ranking(self, b):
+        ranked = self._ranked[b]
+        if ranked is None:
+            ranked = self._ranked[b] = sorted((self._score(key), key) for key in self._blocks[b])
+        return ranked
+
+    def _block_of(self, key):
+        return min(bisect_left(self._maxes, key), len(self._blocks) - 1)
+
+    def _insert(self, key):
+        if not self._blocks:
+            self._blocks.append([key])
+            self._maxes.append(key)
+            self._ranked.append(None)
+            return
+        b = self._block_of(key)
+        block = self._blocks[b]
+        insort(block, key)
+        self._maxes[b] = block[-1]
+        self._ranked[b] = None
+        if len(block) > 2 * BLOCK_SIZE:
+            self._blocks.insert(b + 1, block[BLOCK_SIZE:])
+            del block[BLOCK_SIZE:]
+            self._maxes.insert(b, block[-1])
+            self._ranked.insert(b, None)
+
+    def _delete(self, key):
+        b = self._block_of(key)
+        block = self._blocks[b]
+        i = bisect_left(block, key)
+        if i < len(block) and block[i] == key:
+            del block[i]
+        if block:
+            self._maxes[b] = block[-1]
+            self._ranked[b] = None
+        else:
+            del self._blocks[b], self._maxes[b], self._ranked[b]
+
+    def add(self, book):
+        keys = self._by_book.setdefault(book.id, [])
+        for key in self._entries(book):
+            if key not in self._books:
+                self._books[key] = set()
+                self._insert(key)
+            else:
+                # The book count is part of the score
+                self._ranked[self._block_of(key)] = None
+            self._books[key].add(book.id)
+            keys.append(key)
+        self._memo.clear()
+
+    def remove(self, book_id):
+        for key in self._by_book.pop(book_id, ()):
+            ids = self._books.get(key)
+            if ids is None:
+                continue
+            ids.discard(book_id)
+            if not ids:
+                self._delete(key)
+                del self._books[key]
+            else:
+                self._ranked[self._block_of(key)] = None
+        self._memo.clear()
+
+    def load(self, books):
+        """Replace the index contents with `books` in one pass"""
+        keys_by_book, ids_by_key = {}, {}
+        for book in books:
+            keys = keys_by_book.setdefault(book.id, [])
+            for key in self._entries(book):
+                ids_by_key.setdefault(key, set()).add(book.id)
+                keys.append(key)
+
+        # Sorted one bucket of leading characters at a time: a single sort holds
+        # the GIL throughout, and rebuilds load in a worker thread next to the loop
+        buckets = {}
+        for key in ids_by_key:
+            buckets.setdefault(key[0][:3], []).append(key)
+        keys = []
+        for lead in sorted(buckets):
+            keys += sorted(buckets[lead])
+        self._books = ids_by_key
+        self._blocks = [keys[i:i + BLOCK_SIZE] for i in range(0, len(keys), BLOCK_SIZE)]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._ranked = [None] * len(self._blocks)
+        for b in range(len(self._blocks)):
+            self._ranking(b)
+        self._memo = {}
+        self._by_book = keys_by_book
+
+    def suggest(self, query, limit=10):
+        """
+        Ranked completions for `query`: exact matches first, then whole-value
+        prefixes before inner-word matches, names before publishers before
+        subject codes, then by number of books, shorter text and alphabetically.
+        """
+        prefix = normalize_title(query)
+        if not prefix or limit <= 0:
+            return []
+
+        memo_key = (prefix, limit)
+        if len(prefix) <= MEMO_PREFIX_LEN and memo_key in self._memo:
+            return self._memo[memo_key]
+
+        # Matches are the keys from (prefix,) up to the first term past every prefix extension
+        blocks, maxes = self._blocks, self._maxes
+        successor = prefix_successor(prefix)
+        end_key = (successor,) if successor is not None else None
+        first = bisect_left(maxes, (prefix,))
+        last = len(blocks) - 1 if end_key is None else min(bisect_left(maxes, end_key), len(blocks) - 1)
+
+        exact, heap = [], []
+        for b in range(first, last + 1):
+            block = blocks[b]
+            start = bisect_left(block, (prefix,)) if b == first else 0
+            end = bisect_left(block, end_key) if b == last and end_key is not None else len(block)
+            # Exact matches sort first among the matches, so they can only open the range
+            while start < end and block[start][0] == prefix:
+                exact.append(block[start])
+                start += 1
+            if start == 0 and end == len(block):
+                heap.append(self._ranking(b)[0] + (b, 0))
+            else:
+                heap.extend((self._score(key), key, -1, 0) for key in block[start:end])
+        heapify(heap)
+
+        results, seen = [], set()
+
+        def emit(key):
+            _, _, rank, text = key
+            # The same text can match as a whole value and as inner words; the first is its best
+            if (rank, text) not in seen:
+                seen.add((rank, text))
+                results.append({"text": text, "field": SUGGEST_FIELDS[rank], "books": len(self._books[key])})
+
+        for key in sorted(exact, key=self._score):
+            emit(key)
+        while heap and len(results) < limit:
+            _, key, b, i = heappop(heap)
+            if b >= 0:
+                ranked = self._ranked[b]
+                if i + 1 < len(ranked):
+                    heappush(heap, ranked[i + 1] + (b, i + 1))
+                if key[0] == prefix:
+                    continue
+            emit(key)
+        results = results[:limit]
+
+        if len(prefix) <= MEMO_PREFIX_LEN:
+            if len(self._memo) >= MEMO_SIZE:
+                self._memo.clear()
+            self._memo[memo_key] = results
+        return results
+
+    def __len__(self):
+        return len(self._books)
@@ -0,0 +1,52 @@
+import re
+import sys
+
+from sqlalchemy import event, select, update
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_title(title):
+    """Case- and whitespace-insensitive form of a title, used for lookups"""
+    return _WHITESPACE.sub(" ", title).strip().casefold()
+
+
+def keep_normalized_title(model):
+    """Keep model.name_normalized in sync with model.name on every ORM write"""
+    def _normalize(mapper, connection, target):
+        if target.name is not None:
+            target.name_normalized = normalize_title(target.name)
+
+    event.listen(model, "before_insert", _normalize)
+    event.listen(model, "before_update", _normalize)
+
+
+def backfill_normalized_titles(db, model, batch_size=1000):
+    """Fill name_normalized for rows written before the column existed"""
+    rows = db.execute(select(model.id, model.name).where(model.name_normalized.is_(None))).all()
+    for start in range(0, len(rows), batch_size):
+        db.execute(update(model), [
+            {"id": id, "name_normalized": normalize_title(name)}
+            for id, name in rows[start:start + batch_size]
+        ])
+    return len(rows)
+
+
+def prefix_successor(prefix):
+    """
+    Smallest string past every string that starts with `prefix`, or None when
+    there is none (the prefix is all U+10FFFF, the last code point).
+    """
+    stem = prefix.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return None
+    return stem[:-1] + chr(ord(stem[-1]) + 1)
+
+
+def prefix_bounds(prefix):
+    """
+    Half-open range [low, high) holding every string that starts with `prefix`;
+    high is None when the range is open-ended.
+    Unlike LIKE 'prefix%' this is a plain range scan on every backend's index.
+    """
+    return prefix, prefix_successor(prefix)
@@ -0,0 +1,103 @@
+"""
+Concurrent-request throughput: sync Session vs AsyncSession inside `async def` endpoints
+
+Builds a throwaway FastAPI app that serves the same Amazon product lookup two ways:
+  /sync/{id}   - the old pattern, a blocking Session used inside an async handler
+  /async/{id}  - the AsyncSession path now used by the store routers
+and fires the same number of concurrent requests at each through an in-process
+ASGI client, using the database configured in .env.
+
+Usage:
+    python benchmarks/async_db_throughput.py --requests 500 --concurrency 50 --sleep-ms 5
+
+--sleep-ms adds a slow round trip to every request so its cost is visible even
+on a local database: a server-side SELECT SLEEP() on MySQL, otherwise a
+driver-side wait (time.sleep on the sync path, asyncio.sleep on the async one).
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import SessionLocal, async_engine, engine, get_amazon_async_db
+from app.models.amazon_models import Amazon
+
+
+def build_app(sleep_s: float) -> FastAPI:
+    app = FastAPI()
+    server_sleep = engine.dialect.name == "mysql"
+
+    @app.get("/sync/{id}")
+    async def sync_lookup(id: int):
+        # The session is closed inside the handler: with a yield dependency the
+        # close is deferred to the threadpool, and a blocked loop can deadlock on
+        # pool checkout once concurrency exceeds the pool size.
+        with SessionLocal() as db:
+            if sleep_s and server_sleep:
+                db.execute(text("SELECT SLEEP(:s)"), {"s": sleep_s})
+            elif sleep_s:
+                time.sleep(sleep_s)
+            product = db.query(Amazon).filter(Amazon.id == id).first()
+        return {"id": id, "found": product is not None}
+
+    @app.get("/async/{id}")
+    async def async_lookup(id: int, db: AsyncSession = Depends(get_amazon_async_db)):
+        if sleep_s and server_sleep:
+            await db.execute(text("SELECT SLEEP(:s)"), {"s": sleep_s})
+        elif sleep_s:
+            await asyncio.sleep(sleep_s)
+        product = await db.scalar(select(Amazon).where(Amazon.id == id))
+        return {"id": id, "found": product is not None}
+
+    return app
+
+
+async def run(app: FastAPI, path: str, total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i: int):
+            async with semaphore:
+                response = await client.get(f"{path}/{i % 12 + 1}")
+                response.raise_for_status()
+
+        # Warm up the connection pools before timing
+        await asyncio.gather(*(one(i) for i in range(concurrency)))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--sleep-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    # Keep SQL echo out of the measurement
+    engine.echo = False
+    async_engine.sync_engine.echo = False
+
+    app = build_app(args.sleep_ms / 1000)
+    print(f"{args.requests} requests, concurrency {args.concurrency}, dialect {engine.dialect.name}")
+    for label, path in (("sync Session (before)", "/sync"), ("AsyncSession (after)", "/async")):
+        elapsed = await run(app, path, args.requests, args.concurrency)
+        print(f"{label:<24} {elapsed:8.3f}s  {args.requests / elapsed:10.1f} req/s")
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""
+Delivery-time lookups under load: in-memory DeliveryIndex vs querying the table
+
+Fills a throwaway SQLite database with --pincodes random deliverable
+pincodes, then fires --requests concurrent GET /amazon/delivery requests
+through an in-process ASGI client, with about 30% of the pincodes not in the
+table and resolved through the prefix fallback. The same lookups are served
+by a baseline route that queries the table on every request (exact match,
+then one query per shorter prefix). Also times DeliveryIndex.lookup() alone.
+
+Usage:
+    python benchmarks/delivery_lookup.py --pincodes 20000 --requests 5000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(client, path, pincodes, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(pincode):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(path, params={"pincode": pincode})
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code not in (200, 404):
+                response.raise_for_status()
+
+    await asyncio.gather(*(one(p) for p in pincodes[:concurrency]))
+    latencies.clear()
+    start = time.perf_counter()
+    await asyncio.gather(*(one(p) for p in pincodes))
+    return time.perf_counter() - start, latencies
+
+
+async def main(args):
+    import httpx
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import func, select
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.apis.amazon_api import router, seed_amazon_database, STORE_MODELS
+    from app.database import get_amazon_async_db, get_async_engine, get_session_factory
+    from app.delivery import DeliveryIndex, normalize_pincode
+    from app.models.amazon_models import AmazonDeliverable
+    from app.seeding import prepare_store
+
+    rng = random.Random(args.seed)
+    prepare_store("amazon", STORE_MODELS, seed_amazon_database)
+    known = sorted({f"{rng.randint(100000, 899999)}" for _ in range(args.pincodes)})
+    with get_session_factory("amazon")() as db:
+        db.query(AmazonDeliverable).delete()
+        db.bulk_insert_mappings(AmazonDeliverable, [
+            {"pincode": p, "delivery_time": rng.randint(1, 9)} for p in known
+        ])
+        db.commit()
+
+    queries = [
+        rng.choice(known) if rng.random() < 0.7 else f"{rng.randint(100000, 999999)}"
+        for _ in range(args.requests)
+    ]
+
+    app = FastAPI()
+    app.include_router(router, prefix="/amazon")
+
+    @app.get("/baseline/delivery")
+    async def baseline_delivery(pincode: str, db: AsyncSession = Depends(get_amazon_async_db)):
+        pincode = normalize_pincode(pincode)
+        days = await db.scalar(select(AmazonDeliverable.delivery_time).where(AmazonDeliverable.pincode == pincode))
+        if days is not None:
+            return {"pincode": pincode, "delivery_time": days, "match": "exact"}
+        for length in range(len(pincode) - 1, 0, -1):
+            days = await db.scalar(
+                select(func.max(AmazonDeliverable.delivery_time))
+                .where(AmazonDeliverable.pincode.like(f"{pincode[:length]}%"))
+            )
+            if days is not None:
+                return {"pincode": pincode, "delivery_time": days, "match": "prefix"}
+        return {"pincode": pincode, "delivery_time": None}
+
+    index = DeliveryIndex()
+    index.load((p, 1) for p in known)
+    normalized = [normalize_pincode(q) for q in queries]
+    start = time.perf_counter()
+    for pincode in normalized:
+        index.lookup(pincode)
+    per_lookup_us = (time.perf_counter() - start) / len(normalized) * 1e6
+
+    print(f"{len(known)} deliverable pincodes, {args.requests} requests, concurrency {args.concurrency}")
+    print(f"DeliveryIndex.lookup alone: {per_lookup_us:.2f}us per lookup")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for label, path in (("query per request", "/baseline/delivery"), ("in-memory index", "/amazon/delivery")):
+            elapsed, latencies = await run(client, path, queries, args.concurrency)
+            print(
+                f"{label:<18} {args.requests / elapsed:9.1f} req/s  "
+                f"p50={percentile(latencies, 50):7.2f}ms  p99={percentile(latencies, 99):7.2f}ms"
+            )
+
+    await get_async_engine("amazon").dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pincodes", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Never touch the configured database: the table is replaced with synthetic rows
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'amazon.db')}"
+        asyncio.run(main(args))
@@ -0,0 +1,118 @@
+"""
+Fuzzy title search at catalog scale
+
+Builds app.fuzzy_search.TrigramIndex over --books synthetic titles (one
+million by default), reports build time, index size and process memory, then
+times search() for queries derived from real titles with typos (dropped,
+swapped and substituted letters) and missing words, checking how often the
+original title is the top hit. No database is needed.
+
+Usage:
+    python benchmarks/fuzzy_search_scale.py --books 1000000 --queries 1000
+"""
+
+import argparse
+import os
+import random
+import resource
+import string
+import sys
+import time
+from collections import namedtuple
+from itertools import accumulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.fuzzy_search import TrigramIndex
+
+Book = namedtuple("Book", ["id", "name"])
+
+COMMON_WORDS = "the of and to in a for with on an introduction guide".split()
+
+
+def vocabulary(rng, size=50000):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10))))
+    return sorted(words)
+
+
+def synthetic_books(count, words, rng):
+    """Titles mix rare vocabulary with a few very common words, Zipf-like"""
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(words))))
+    for i in range(1, count + 1):
+        title = rng.choices(words, cum_weights=cum_weights, k=rng.randint(2, 5))
+        if rng.random() < 0.5:
+            title.insert(rng.randrange(len(title)), rng.choice(COMMON_WORDS))
+        yield Book(i, " ".join(word.capitalize() for word in title))
+
+
+def misspell(title, rng):
+    """Apply one or two random edits and sometimes drop a word"""
+    chars = list(title)
+    for _ in range(rng.randint(1, 2)):
+        i = rng.randrange(len(chars))
+        edit = rng.choice(("drop", "swap", "substitute"))
+        if edit == "drop" and len(chars) > 3:
+            del chars[i]
+        elif edit == "swap" and i + 1 < len(chars):
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+        else:
+            chars[i] = rng.choice(string.ascii_lowercase)
+    words = "".join(chars).split()
+    if len(words) > 3 and rng.random() < 0.5:
+        del words[rng.randrange(len(words))]
+    return " ".join(words)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = vocabulary(rng)
+    books = list(synthetic_books(args.books, words, rng))
+    rss_before = max_rss_mb()
+
+    index = TrigramIndex()
+    start = time.perf_counter()
+    index.load(books)
+    build_s = time.perf_counter() - start
+
+    postings = sum(len(p) for p in index._postings.values())
+    print(
+        f"{len(index)} titles, {len(index._postings)} trigrams, {postings} postings "
+        f"({postings * 4 / 2**20:.0f} MB of posting arrays)"
+    )
+    print(f"built in {build_s:.1f}s, max RSS grew by {max_rss_mb() - rss_before:.0f} MB")
+
+    targets = [rng.choice(books) for _ in range(args.queries)]
+    samples, top1 = [], 0
+    for book in targets:
+        query = misspell(book.name, rng)
+        start = time.perf_counter()
+        results = index.search(query, limit=10)
+        samples.append((time.perf_counter() - start) * 1000)
+        top1 += bool(results) and results[0]["name"] == book.name
+
+    print(
+        f"{len(samples)} misspelled queries: "
+        f"p50={percentile(samples, 50):.2f}ms  p95={percentile(samples, 95):.2f}ms  "
+        f"p99={percentile(samples, 99):.2f}ms  top-1 accuracy={top1 / len(samples):.1%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
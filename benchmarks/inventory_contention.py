@@ -0,0 +1,137 @@
+"""
+Stock reservation under contention
+
+Sends --requests cart reservations at --concurrency through an in-process
+ASGI client against POST /amazon/inventory/reserve. Every cart takes 1-3
+lines spread over only --books hot books. Half of the successful
+reservations are then committed and half released, so settles compete with
+new reservations for the same inventory rows. Reports reservations/sec,
+the share rejected for lack of stock, the conflict rate (transactions
+retried after a deadlock or lock timeout) and checks that nothing was
+oversold.
+
+--mode sharded runs the store with INVENTORY_MODE=sharded and the hot
+books in memory (see ShardedStockLedger); the final check runs after the
+ledger has written everything back and returned its lease.
+
+By default a throwaway SQLite database is used. --configured-db runs
+against DATABASE_URL from .env instead (use MySQL for realistic locking).
+This resets the stock of books 1..--books there.
+
+Usage:
+    python benchmarks/inventory_contention.py --requests 2000 --concurrency 200 --books 3 --stock 1000
+    python benchmarks/inventory_contention.py --mode sharded
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+async def main(args):
+    os.environ["AMAZON_INVENTORY_MODE"] = args.mode
+    os.environ["AMAZON_INVENTORY_HOT_BOOKS"] = ",".join(str(b) for b in range(1, args.books + 1))
+
+    import httpx
+    from fastapi import FastAPI
+    from sqlalchemy import func, select, update
+
+    from app.apis.amazon_api import STORE_MODELS, router, seed_amazon_database, stock_ledger
+    from app.database import get_async_engine, get_async_session_factory, get_session_factory
+    from app.models.amazon_models import AmazonInventory, AmazonReservation
+    from app.seeding import prepare_store
+
+    prepare_store("amazon", STORE_MODELS, seed_amazon_database)
+    books = list(range(1, args.books + 1))
+    with get_session_factory("amazon")() as db:
+        db.execute(update(AmazonReservation).where(AmazonReservation.book_id.in_(books)).values(status="released"))
+        db.execute(update(AmazonInventory).where(AmazonInventory.book_id.in_(books)).values(on_hand=args.stock, reserved=0))
+        db.commit()
+
+    app = FastAPI()
+    app.include_router(router, prefix="/amazon")
+    rng = random.Random(args.seed)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    outcomes = {"reserved": 0, "rejected": 0, "failed": 0, "committed": 0, "released": 0}
+    committed_copies = {book: 0 for book in books}
+
+    async def checkout(client):
+        lines = [{"id": rng.choice(books), "quantity": rng.randint(1, 2)} for _ in range(rng.randint(1, 3))]
+        settle, settled = ("commit", "committed") if rng.random() < 0.5 else ("release", "released")
+        async with semaphore:
+            response = await client.post("/amazon/inventory/reserve", json={"lines": lines})
+            if response.status_code == 409:
+                outcomes["rejected"] += 1
+                return
+            if response.status_code != 200:
+                outcomes["failed"] += 1
+                return
+            outcomes["reserved"] += 1
+            reservation = response.json()
+            response = await client.post(f"/amazon/inventory/{settle}", params={"reservation_id": reservation["reservation_id"]})
+            if response.status_code == 200:
+                outcomes[settled] += 1
+                if settle == "commit":
+                    for line in reservation["lines"]:
+                        committed_copies[line["id"]] += line["quantity"]
+            else:
+                outcomes["failed"] += 1
+
+    # ASGITransport runs no lifespan events, so start the ledger (leases, write-back) here
+    await stock_ledger.start(get_async_session_factory("amazon"))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(checkout(client) for _ in range(args.requests)))
+        elapsed = time.perf_counter() - start
+    await stock_ledger.stop()
+
+    with get_session_factory("amazon")() as db:
+        stock = dict(db.execute(
+            select(AmazonInventory.book_id, AmazonInventory.on_hand).where(AmazonInventory.book_id.in_(books))
+        ).all())
+        held = db.scalar(
+            select(func.coalesce(func.sum(AmazonReservation.quantity), 0))
+            .where(AmazonReservation.book_id.in_(books), AmazonReservation.status == "held")
+        )
+        reserved = db.scalar(select(func.sum(AmazonInventory.reserved)).where(AmazonInventory.book_id.in_(books)))
+
+    attempts = outcomes["reserved"] + outcomes["rejected"] + outcomes["committed"] + outcomes["released"]
+    conflicts = stock_ledger.stats["conflicts"]
+    consistent = held == reserved and all(stock[b] == args.stock - committed_copies[b] >= 0 for b in books)
+
+    print(f"{args.requests} carts over {args.books} hot books, concurrency {args.concurrency}, "
+          f"dialect {get_async_engine('amazon').dialect.name}, {args.mode} inventory")
+    print(f"{outcomes['reserved'] / elapsed:9.1f} reservations/s  ({attempts / elapsed:.1f} inventory transactions/s)")
+    print(f"reserved={outcomes['reserved']} rejected={outcomes['rejected']} "
+          f"({outcomes['rejected'] / args.requests:.1%} out of stock) failed={outcomes['failed']}")
+    print(f"conflicts retried={conflicts} ({conflicts / max(attempts, 1):.2%} of transactions)")
+    print(f"stock consistent: {consistent} (held={held}, reserved column={reserved}, on_hand={stock})")
+
+    await get_async_engine("amazon").dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--books", type=int, default=3)
+    parser.add_argument("--stock", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--mode", choices=("database", "sharded"), default="database")
+    parser.add_argument("--configured-db", action="store_true", help="use DATABASE_URL instead of a temporary SQLite file")
+    args = parser.parse_args()
+
+    if args.configured_db:
+        asyncio.run(main(args))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'amazon.db')}"
+            asyncio.run(main(args))
@@ -0,0 +1,98 @@
+"""
+JSON response encoding: FastAPI's default path vs app.responses
+
+For representative store payloads, times building the response body the
+way FastAPI does by default (jsonable_encoder, then JSONResponse with the
+stdlib json), through jsonable_encoder into FastJSONResponse (what a router
+default_response_class alone gives), and returning FastJSONResponse from
+the endpoint so the content goes straight to orjson. The static root
+payload is also timed as a PreEncodedJSONResponse. Reports microseconds
+per response and encoded megabytes per second.
+
+Usage:
+    python benchmarks/json_encoding.py --items 500 --repeat 5
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def payloads(items):
+    from app.schemas.amazon_schemas import Amazon
+
+    prices = [
+        {"id": i, "name": f"Book number {i}", "amazon_id": f"amazon_{i:05d}", "unit_price": 199.99 + i,
+         "error": None, "name_query": None}
+        for i in range(1, items + 1)
+    ]
+    quote = {
+        "lines": [
+            {"id": i, "name": f"Book number {i}", "quantity": 3, "unit_price": 499.0, "line_total": 1497.0,
+             "discount_percent": 10.0, "reduced_amount": 149.7, "payable_amount": 1347.3, "error": None}
+            for i in range(1, min(items, 100) + 1)
+        ],
+        "subtotal": 149700.0, "discount_percent": 20.0, "reduced_amount": 29940.0,
+        "payable_amount": 119760.0, "payable_if_bought_separately": 134730.0
+    }
+    books = [
+        Amazon(id=i, amazon_id=f"amazon_{i:05d}", name=f"Book number {i}", publisher="No Starch Press",
+               genre="Programming", subject_code="PY202", serial_number=1000 + i, created_at=datetime(2024, 1, 1))
+        for i in range(1, items + 1)
+    ]
+    suggestions = [{"text": f"Book number {i}", "kind": "name", "score": 0.5} for i in range(10)]
+    return {
+        f"get_prices, {items} items": prices,
+        f"quote, {len(quote['lines'])} lines": quote,
+        f"{items} Amazon schema models": books,
+        "suggest, 10 items": suggestions,
+    }
+
+
+def measure(build, repeat):
+    body = build()
+    number = max(1, int(0.2 / max(timeit.timeit(build, number=1), 1e-7)))
+    seconds = min(timeit.repeat(build, number=number, repeat=repeat)) / number
+    return seconds, len(body)
+
+
+def main(args):
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    from app.apis.amazon_api import ROOT_PAYLOAD
+    from app.responses import FastJSONResponse, PreEncodedJSONResponse
+
+    paths = {
+        "jsonable_encoder + JSONResponse": lambda c: JSONResponse(jsonable_encoder(c)).body,
+        "jsonable_encoder + FastJSONResponse": lambda c: FastJSONResponse(jsonable_encoder(c)).body,
+        "FastJSONResponse direct": lambda c: FastJSONResponse(c).body,
+    }
+
+    for label, content in payloads(args.items).items():
+        print(label)
+        baseline = None
+        for path, encode in paths.items():
+            seconds, size = measure(lambda: encode(content), args.repeat)
+            baseline = baseline or seconds
+            print(f"  {path:<38} {seconds * 1e6:10.1f}us  {size / seconds / 1e6:8.1f} MB/s  "
+                  f"{baseline / seconds:5.1f}x")
+
+    root = {"message": "Amazon Management System API - All endpoints ready!"}
+    print("amazon_root")
+    baseline, size = measure(lambda: JSONResponse(jsonable_encoder(root)).body, args.repeat)
+    print(f"  {'jsonable_encoder + JSONResponse':<38} {baseline * 1e6:10.2f}us")
+    seconds, size = measure(lambda: PreEncodedJSONResponse(ROOT_PAYLOAD).body, args.repeat)
+    print(f"  {'PreEncodedJSONResponse':<38} {seconds * 1e6:10.2f}us  {baseline / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,131 @@
+"""
+Connection checkout latency under contention
+
+--tasks workers each repeatedly check a connection out of one async
+engine's pool, run a trivial query, hold the connection for --hold-ms and
+return it, for --seconds. Runs once per pool size in --pool-sizes and
+pre-ping mode in --pre-ping (see DB_POOL_PRE_PING in app/database.py) and
+reports checkouts/s, p50/p95/p99 checkout latency (time waiting for the
+pool, plus any ping), pool timeouts and the latency of the very first
+checkout with and without warm_up_pool-style pre-opening.
+
+By default a throwaway SQLite file is used, where connecting and pinging
+are nearly free; --configured-db uses DATABASE_URL from .env instead (use
+MySQL to see what connects and pings cost over the network).
+
+Usage:
+    python benchmarks/pool_checkout.py --tasks 50 --pool-sizes 5,10,20 --hold-ms 5
+    python benchmarks/pool_checkout.py --configured-db --pre-ping always,idle,never
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] if ordered else 0.0
+
+
+def make_engine(url, pool_size, pre_ping, args):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from app.database import TimedAsyncQueuePool, ping_idle_connections, to_async_url
+
+    engine = create_async_engine(
+        to_async_url(url),
+        poolclass=TimedAsyncQueuePool,
+        pool_size=pool_size,
+        max_overflow=args.max_overflow,
+        pool_timeout=args.pool_timeout,
+        pool_pre_ping=pre_ping == "always",
+    )
+    if pre_ping == "idle":
+        ping_idle_connections(engine.sync_engine, args.idle_seconds)
+    return engine
+
+
+async def first_checkout(engine, warm, pool_size):
+    from sqlalchemy import text
+
+    if warm:
+        connections = await asyncio.gather(*(engine.connect() for _ in range(pool_size)))
+        for connection in connections:
+            await connection.close()
+    start = time.perf_counter()
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+    return time.perf_counter() - start
+
+
+async def run(url, pool_size, pre_ping, args):
+    from sqlalchemy import text
+
+    cold_engine = make_engine(url, pool_size, pre_ping, args)
+    cold = await first_checkout(cold_engine, False, pool_size)
+    await cold_engine.dispose()
+    engine = make_engine(url, pool_size, pre_ping, args)
+    warm = await first_checkout(engine, True, pool_size)
+
+    latencies = []
+    failures = 0
+    deadline = time.perf_counter() + args.seconds
+
+    async def worker():
+        nonlocal failures
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                async with engine.connect() as connection:
+                    latencies.append(time.perf_counter() - start)
+                    await connection.execute(text("SELECT 1"))
+                    await asyncio.sleep(args.hold_ms / 1000)
+            except Exception:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.tasks)))
+    elapsed = time.perf_counter() - start
+    pool = engine.sync_engine.pool
+    await engine.dispose()
+
+    print(f"pool_size={pool_size:<3} pre_ping={pre_ping:<6} {len(latencies) / elapsed:8.0f} checkouts/s  "
+          f"p50={percentile(latencies, 50) * 1000:7.2f}ms p95={percentile(latencies, 95) * 1000:7.2f}ms "
+          f"p99={percentile(latencies, 99) * 1000:7.2f}ms  timeouts={pool.timeouts} failures={failures}  "
+          f"first checkout cold={cold * 1000:.2f}ms warm={warm * 1000:.2f}ms")
+
+
+async def main(args, url):
+    print(f"{args.tasks} tasks holding connections {args.hold_ms}ms for {args.seconds}s each run, "
+          f"max_overflow={args.max_overflow}, dialect {url.split(':', 1)[0]}")
+    for pool_size in (int(size) for size in args.pool_sizes.split(",")):
+        for pre_ping in args.pre_ping.split(","):
+            await run(url, pool_size, pre_ping, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument("--pool-sizes", default="5,10,20")
+    parser.add_argument("--pre-ping", default="always,idle,never")
+    parser.add_argument("--max-overflow", type=int, default=0)
+    parser.add_argument("--pool-timeout", type=float, default=30)
+    parser.add_argument("--idle-seconds", type=float, default=30)
+    parser.add_argument("--hold-ms", type=float, default=5)
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--configured-db", action="store_true", help="use DATABASE_URL instead of a temporary SQLite file")
+    args = parser.parse_args()
+
+    if args.configured_db:
+        from app.database import store_url
+        asyncio.run(main(args, store_url("amazon")))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            asyncio.run(main(args, f"sqlite:///{os.path.join(tmp, 'pool.db')}"))
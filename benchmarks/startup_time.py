@@ -0,0 +1,88 @@
+"""
+Startup time of each app entry point
+
+Starts app.amazon_main, app.flipkart_main, app.sapna_main and
+app.gateway_main in fresh interpreters, --runs times each: imports the app,
+then runs its startup handlers (database preparation and search index
+builds) the way uvicorn would. Reports median import and startup time, the
+number of SQL statements executed and which engines the process created.
+
+By default the *_DATABASE_URL databases are used, so this measures a
+restart against prepared databases. --cold points every run at new, empty
+SQLite files instead, measuring a cold start that creates and seeds tables.
+
+Usage:
+    python benchmarks/startup_time.py --runs 5
+    python benchmarks/startup_time.py --runs 5 --cold
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APPS = ["app.amazon_main", "app.flipkart_main", "app.sapna_main", "app.gateway_main"]
+
+URL_ENV = {"amazon": "DATABASE_URL", "flipkart": "FLIPKART_DATABASE_URL", "sapna": "SAPNA_DATABASE_URL"}
+
+PROBE = """
+import asyncio, json, time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+statements = []
+event.listen(Engine, "before_cursor_execute", lambda *args: statements.append(1))
+start = time.perf_counter()
+import {module} as main
+imported = time.perf_counter()
+asyncio.run(main.app.router.startup())
+started = time.perf_counter()
+from app import database
+print(json.dumps({{
+    "import": imported - start,
+    "startup": started - imported,
+    "statements": len(statements),
+    "engines": [f"{{kind}}:{{store}}" for kind, store in database.created_engines()],
+}}))
+"""
+
+
+def measure(module, cold):
+    env = dict(os.environ)
+    with tempfile.TemporaryDirectory() as tmp:
+        if cold:
+            for store, name in URL_ENV.items():
+                env[name] = f"sqlite:///{os.path.join(tmp, store)}.db"
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module)],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--cold", action="store_true", help="start every run against empty SQLite databases")
+    parser.add_argument("--apps", nargs="*", default=APPS)
+    args = parser.parse_args()
+
+    print("cold start, empty databases" if args.cold else "restart, prepared databases")
+    for module in args.apps:
+        runs = [measure(module, args.cold) for _ in range(args.runs)]
+        imports = [run["import"] * 1000 for run in runs]
+        startups = [run["startup"] * 1000 for run in runs]
+        totals = [i + s for i, s in zip(imports, startups)]
+        print(
+            f"{module:<18} total={statistics.median(totals):7.1f}ms  "
+            f"import={statistics.median(imports):7.1f}ms  startup={statistics.median(startups):7.1f}ms  "
+            f"sql={runs[-1]['statements']:<4} engines={', '.join(runs[-1]['engines']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Typeahead latency: SuggestIndex vs a linear scan over the catalog
+
+Builds a synthetic catalog of --books titles (with publishers and subject
+codes), loads it into app.suggest.SuggestIndex and times suggest() for
+random 1-6 character prefixes of real titles, the way a search box issues
+them keystroke by keystroke. "cold" disables the short-prefix memo so every
+query scans the index; "warm" is the steady state with repeated prefixes.
+A naive startswith() scan over all titles is timed on the same queries for
+comparison. No database is needed.
+
+Usage:
+    python benchmarks/suggest_latency.py --books 200000 --queries 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import suggest as suggest_module
+from app.suggest import SuggestIndex
+from app.titles import normalize_title
+
+Book = namedtuple("Book", ["id", "name", "publisher", "subject_code"])
+
+WORDS = (
+    "python java data structures algorithms machine learning deep systems design "
+    "patterns effective modern practical introduction advanced guide complete "
+    "programming networks databases cloud security compilers operating theory"
+).split()
+PUBLISHERS = ["No Starch Press", "Addison-Wesley", "MIT Press", "O'Reilly Media", "Springer", "Wiley"]
+SUBJECTS = ["py", "java", "dsa", "aiml", "db", "os", "net"]
+
+
+def synthetic_books(count, rng):
+    for i in range(1, count + 1):
+        name = " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(2, 5)))
+        yield Book(i, f"{name} {i}", rng.choice(PUBLISHERS), rng.choice(SUBJECTS))
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def time_queries(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=5_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    books = list(synthetic_books(args.books, rng))
+
+    index = SuggestIndex()
+    start = time.perf_counter()
+    index.load(books)
+    build_s = time.perf_counter() - start
+
+    queries = []
+    for _ in range(args.queries):
+        name = rng.choice(books).name
+        queries.append(name[:rng.randint(1, 6)])
+
+    normalized_names = [(normalize_title(book.name), book.name) for book in books]
+
+    def linear_scan(query):
+        prefix = normalize_title(query)
+        return [name for normalized, name in normalized_names if normalized.startswith(prefix)][:args.limit]
+
+    memo_prefix_len = suggest_module.MEMO_PREFIX_LEN
+    suggest_module.MEMO_PREFIX_LEN = 0
+    cold = time_queries(lambda q: index.suggest(q, args.limit), queries)
+    suggest_module.MEMO_PREFIX_LEN = memo_prefix_len
+    time_queries(lambda q: index.suggest(q, args.limit), queries)
+    warm = time_queries(lambda q: index.suggest(q, args.limit), queries)
+    scanned = time_queries(linear_scan, queries[: max(1, args.queries // 50)])
+
+    print(f"{args.books} books, {len(index)} index entries, built in {build_s:.2f}s")
+    for label, samples in (("index, cold", cold), ("index, warm", warm), ("linear scan", scanned)):
+        print(
+            f"{label:<13} n={len(samples):<6} "
+            f"p50={percentile(samples, 50):9.1f}us  "
+            f"p95={percentile(samples, 95):9.1f}us  "
+            f"p99={percentile(samples, 99):9.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Bulk catalog importer for supplier feeds
+
+Streams a JSONL or CSV file (optionally gzipped) into one store table,
+validating every row with the store's *Create schema. Existing rows are
+matched on the store id for books and on id for the other tables. Run
+db_init.py first so the tables exist.
+
+Running apps keep serving cached rows until CATALOG_CACHE_TTL expires;
+POST /<store>/admin/cache/invalidate?table=<table name> to refresh sooner.
+
+Usage:
+    python import_catalog.py --store amazon --table books feed.jsonl.gz
+    python import_catalog.py --store flipkart --table prices prices.csv \\
+        --chunk-size 10000 --commit-every 100000 --rejects rejected.jsonl
+"""
+
+import argparse
+import json
+
+from app.importer import IMPORT_TABLES, ON_CONFLICT, import_feed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help=".jsonl, .ndjson or .csv file, optionally .gz")
+    parser.add_argument("--store", required=True, choices=sorted(IMPORT_TABLES))
+    parser.add_argument("--table", required=True, choices=sorted(IMPORT_TABLES["amazon"]))
+    parser.add_argument("--chunk-size", type=int, default=5000, help="rows per executemany")
+    parser.add_argument("--commit-every", type=int, default=50000, help="rows per transaction")
+    parser.add_argument("--on-conflict", choices=ON_CONFLICT, default="update",
+                        help="existing rows: update them, skip the new row, or fail the import")
+    parser.add_argument("--rejects", help="write rejected rows and their errors to this JSONL file")
+    args = parser.parse_args()
+
+    result = import_feed(
+        args.store, args.table, args.path,
+        chunk_size=args.chunk_size,
+        commit_every=args.commit_every,
+        on_conflict=args.on_conflict,
+        rejects_path=args.rejects
+    )
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+"""
+HTTP load generator for the store APIs
+
+Replays a weighted mix of catalog requests (id_or_name, get_price,
+stock_by_id, get_discount) against running store apps, either closed-loop
+(a fixed number of users sending back to back) or open-loop (requests
+arriving at a target rate whether or not earlier ones finished), and
+writes p50/p95/p99 latency, throughput and error rates per endpoint to a
+JSON report. See `python -m loadtest --help`.
+"""
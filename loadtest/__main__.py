@@ -0,0 +1,119 @@
+"""
+Load test the store APIs
+
+Closed loop (default): --concurrency users send requests back to back.
+Open loop: --rps requests a second arrive on schedule regardless of how
+long earlier ones take, up to --max-in-flight outstanding.
+
+Targets the gateway at --base-url (every store under /<store>), the apps
+started by `python -m app.main --separate` with --separate, or any set of
+store URLs with --store-urls. --start launches the gateway locally first
+and stops it afterwards.
+
+Usage:
+    python -m loadtest --start --duration 30 --concurrency 50
+    python -m loadtest --base-url http://localhost:8000 --rps 500 --duration 60 --report report.json
+    python -m loadtest --separate --stores amazon,flipkart --mix id_or_name=1,get_discount=1
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from loadtest.report import Recorder, build_report, format_report, write_report
+from loadtest.runner import closed_loop, open_loop, start_gateway, wait_until_ready
+from loadtest.workload import (
+    DEFAULT_MIX, SEPARATE_APP_URLS, Workload, load_catalog, parse_mix, parse_store_urls
+)
+
+
+def store_urls(args):
+    stores = [store.strip() for store in args.stores.split(",") if store.strip()]
+    if args.store_urls:
+        urls = parse_store_urls(args.store_urls)
+    elif args.separate:
+        urls = SEPARATE_APP_URLS
+    else:
+        urls = {store: f"{args.base_url.rstrip('/')}/{store}" for store in stores}
+    return {store: urls[store] for store in stores if store in urls}
+
+
+async def main(args):
+    mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    urls = store_urls(args)
+    if not urls:
+        raise SystemExit("No store to load: check --stores against --store-urls")
+    concurrency = args.max_in_flight if args.rps else args.concurrency
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    server = start_gateway(args.port, args.workers) if args.start else None
+    try:
+        async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+            if server is not None:
+                await wait_until_ready(client, f"{args.base_url.rstrip('/')}/ready")
+            catalogs = {url: await load_catalog(client, url, args.books) for url in urls.values()}
+            workload = Workload(mix, catalogs, seed=args.seed)
+
+            recorder = Recorder()
+            settings = {
+                "mode": "open" if args.rps else "closed",
+                "rps": args.rps,
+                "arrivals": ("poisson" if args.poisson else "uniform") if args.rps else None,
+                "max_in_flight": args.max_in_flight if args.rps else None,
+                "concurrency": None if args.rps else args.concurrency,
+                "duration_s": args.duration,
+                "warmup_s": args.warmup,
+                "mix": mix,
+                "stores": urls,
+                "books_per_store": {url: len(books) for url, books in catalogs.items()},
+            }
+            print(f"{settings['mode']}-loop load on {', '.join(urls)} for {args.warmup:g}s warm-up + "
+                  f"{args.duration:g}s: " + (f"{args.rps:g} rps" if args.rps else f"{args.concurrency} users"))
+
+            asyncio.get_running_loop().call_later(args.warmup, recorder.start)
+            deadline = time.perf_counter() + args.warmup + args.duration
+            if args.rps:
+                await open_loop(client, workload, recorder, args.rps, deadline, args.max_in_flight, args.poisson)
+            else:
+                await closed_loop(client, workload, recorder, args.concurrency, deadline, args.think_ms / 1000)
+            recorder.stop()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = build_report(recorder, settings)
+    print(format_report(report))
+    write_report(report, args.report)
+    print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="python -m loadtest", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    target = parser.add_argument_group("target")
+    target.add_argument("--base-url", default="http://localhost:8000", help="gateway URL (default %(default)s)")
+    target.add_argument("--separate", action="store_true", help="target the per-store apps on ports 8000-8002")
+    target.add_argument("--store-urls", help="store=url pairs, e.g. amazon=http://host:8000/amazon,...")
+    target.add_argument("--stores", default="amazon,flipkart,sapna")
+    target.add_argument("--start", action="store_true", help="start the gateway on --port for the run")
+    target.add_argument("--port", type=int, default=8000)
+    target.add_argument("--workers", type=int, default=1, help="gateway workers with --start")
+
+    load = parser.add_argument_group("load")
+    load.add_argument("--mix", help=f"endpoint=weight pairs (default {','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())})")
+    load.add_argument("--concurrency", type=int, default=20, help="closed loop: concurrent users")
+    load.add_argument("--think-ms", type=float, default=0, help="closed loop: pause between a user's requests")
+    load.add_argument("--rps", type=float, help="open loop at this many requests per second")
+    load.add_argument("--poisson", action="store_true", help="open loop: Poisson instead of evenly spaced arrivals")
+    load.add_argument("--max-in-flight", type=int, default=1000, help="open loop: outstanding requests before dropping")
+    load.add_argument("--duration", type=float, default=30, help="measured seconds")
+    load.add_argument("--warmup", type=float, default=5, help="seconds of load before measuring")
+    load.add_argument("--books", type=int, help="request only the first N books of each store")
+    load.add_argument("--timeout", type=float, default=10, help="per-request timeout in seconds")
+    load.add_argument("--seed", type=int)
+    parser.add_argument("--report", default="loadtest-report.json", help="JSON report path (default %(default)s)")
+    asyncio.run(main(parser.parse_args()))
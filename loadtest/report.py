@@ -0,0 +1,112 @@
+import json
+import math
+import time
+from collections import Counter, defaultdict
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(len(ordered) * p / 100) - 1)]
+
+
+class Recorder:
+    """
+    Latency and outcome of every request completed inside the measurement
+    window. Requests finishing during the warm-up are sent but not counted.
+    """
+
+    def __init__(self):
+        self.latencies = defaultdict(list)      # endpoint -> seconds
+        self.statuses = defaultdict(Counter)    # endpoint -> status code (or exception name) -> count
+        self.errors = Counter()                 # endpoint -> count
+        self.dropped = 0
+        self.started = None
+        self.finished = None
+
+    def start(self):
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def measuring(self):
+        return self.started is not None and self.finished is None
+
+    def record(self, endpoint, seconds, status, error):
+        if not self.measuring:
+            return
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][str(status)] += 1
+        if error:
+            self.errors[endpoint] += 1
+
+    def drop(self):
+        """An open-loop arrival not sent because --max-in-flight requests were already waiting"""
+        if self.measuring:
+            self.dropped += 1
+
+
+def _summary(latencies, statuses, errors, elapsed):
+    ordered = sorted(latencies)
+    count = len(ordered)
+    milliseconds = lambda seconds: None if seconds is None else round(seconds * 1000, 3)
+    return {
+        "requests": count,
+        "throughput_rps": round(count / elapsed, 2) if elapsed else None,
+        "errors": errors,
+        "error_rate": round(errors / count, 5) if count else None,
+        "latency_ms": {
+            "mean": milliseconds(sum(ordered) / count) if count else None,
+            "p50": milliseconds(percentile(ordered, 50)),
+            "p95": milliseconds(percentile(ordered, 95)),
+            "p99": milliseconds(percentile(ordered, 99)),
+            "max": milliseconds(ordered[-1]) if ordered else None,
+        },
+        "status_codes": dict(sorted(statuses.items())),
+    }
+
+
+def build_report(recorder, settings):
+    """The JSON-able report of a run: the settings it ran with, the totals, and each endpoint"""
+    elapsed = (recorder.finished or time.perf_counter()) - recorder.started
+    every_latency = [seconds for latencies in recorder.latencies.values() for seconds in latencies]
+    every_status = Counter()
+    for statuses in recorder.statuses.values():
+        every_status.update(statuses)
+    total = _summary(every_latency, every_status, sum(recorder.errors.values()), elapsed)
+    total["dropped"] = recorder.dropped
+    return {
+        "settings": settings,
+        "duration_s": round(elapsed, 3),
+        "total": total,
+        "endpoints": {
+            endpoint: _summary(recorder.latencies[endpoint], recorder.statuses[endpoint],
+                               recorder.errors[endpoint], elapsed)
+            for endpoint in sorted(recorder.latencies)
+        },
+    }
+
+
+def write_report(report, path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+def format_report(report):
+    """Console table of a report"""
+    lines = [f"{'endpoint':<14} {'requests':>9} {'rps':>9} {'errors':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"]
+    rows = list(report["endpoints"].items()) + [("total", report["total"])]
+    for endpoint, summary in rows:
+        latency = summary["latency_ms"]
+        cell = lambda value: f"{value:9.2f}" if value is not None else f"{'-':>9}"
+        lines.append(
+            f"{endpoint:<14} {summary['requests']:>9} {summary['throughput_rps'] or 0:>9.1f} "
+            f"{(summary['error_rate'] or 0):>8.2%} {cell(latency['p50'])} {cell(latency['p95'])} {cell(latency['p99'])}"
+        )
+    if report["total"]["dropped"]:
+        lines.append(f"{report['total']['dropped']} open-loop arrivals dropped (--max-in-flight reached)")
+    return "\n".join(lines)
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def send(client, call, recorder, started=None):
+    """
+    Send one call and record it. Open-loop arrivals pass the time they were
+    due as `started`, so time spent queued behind a slow server counts as
+    latency instead of being hidden (coordinated omission).
+    """
+    started = started or time.perf_counter()
+    try:
+        response = await client.request(call.method, call.url, params=call.params)
+        status, error = response.status_code, response.status_code >= 400
+    except httpx.HTTPError as e:
+        status, error = type(e).__name__, True
+    recorder.record(call.endpoint, time.perf_counter() - started, status, error)
+
+
+async def closed_loop(client, workload, recorder, concurrency, deadline, think_time=0.0):
+    """`concurrency` users, each sending its next request as soon as the last one is answered"""
+    async def user():
+        while time.perf_counter() < deadline:
+            await send(client, workload.next_call(), recorder)
+            if think_time:
+                await asyncio.sleep(think_time)
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+
+
+async def open_loop(client, workload, recorder, rps, deadline, max_in_flight, poisson=False):
+    """
+    Requests arriving at `rps` a second, evenly spaced or as a Poisson
+    process, however long earlier ones take. Arrivals beyond
+    `max_in_flight` outstanding requests are dropped and counted.
+    """
+    in_flight = set()
+    next_at = time.perf_counter()
+    while next_at < deadline:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            recorder.drop()
+        else:
+            task = asyncio.create_task(send(client, workload.next_call(), recorder, started=next_at))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        next_at += workload.rng.expovariate(rps) if poisson else 1 / rps
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+
+def start_gateway(port, workers=1):
+    """Start the gateway (all stores) with uvicorn on `port`; returns the process"""
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.gateway_main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT,
+    )
+
+
+async def wait_until_ready(client, url, timeout=60.0):
+    """Poll a /ready endpoint until it answers 200"""
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            if (await client.get(url)).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        if time.perf_counter() > deadline:
+            raise RuntimeError(f"{url} was not ready after {timeout:.0f}s")
+        await asyncio.sleep(0.25)
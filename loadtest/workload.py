@@ -0,0 +1,108 @@
+import random
+from dataclasses import dataclass
+
+# Share of requests per endpoint unless --mix says otherwise, roughly a
+# shopper browsing: look a book up, check its price and stock, sometimes
+# price a quantity
+DEFAULT_MIX = {"id_or_name": 4, "get_price": 3, "stock_by_id": 2, "get_discount": 1}
+
+# Store apps as started by app/main.py --separate (each keeps its /<store> prefix)
+SEPARATE_APP_URLS = {
+    "amazon": "http://localhost:8000/amazon",
+    "flipkart": "http://localhost:8001/flipkart",
+    "sapna": "http://localhost:8002/sapna",
+}
+
+
+@dataclass
+class Call:
+    """One request to send; `endpoint` is the label its latency is reported under"""
+    endpoint: str
+    method: str
+    url: str
+    params: dict
+
+
+def parse_mix(spec):
+    """'id_or_name=4,get_price=1' -> {"id_or_name": 4.0, "get_price": 1.0}"""
+    mix = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        endpoint, _, weight = item.partition("=")
+        endpoint = endpoint.strip()
+        if endpoint not in REQUESTS:
+            raise ValueError(f"Unknown endpoint {endpoint!r}, expected one of {', '.join(REQUESTS)}")
+        mix[endpoint] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("The request mix needs at least one endpoint with a positive weight")
+    return mix
+
+
+def parse_store_urls(spec):
+    """'amazon=http://host:8000/amazon,...' -> {"amazon": "http://host:8000/amazon", ...}"""
+    urls = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        store, _, url = item.partition("=")
+        urls[store.strip()] = url.strip().rstrip("/")
+    return urls
+
+
+def id_or_name(base_url, book, rng):
+    params = {"id": book["id"]} if rng.random() < 0.5 else {"name": book["name"]}
+    return "GET", f"{base_url}/id_or_name", params
+
+
+def get_price(base_url, book, rng):
+    return "GET", f"{base_url}/get_price", {"id": book["id"]}
+
+
+def stock_by_id(base_url, book, rng):
+    return "POST", f"{base_url}/stock_by_id", {"id": book["id"]}
+
+
+def get_discount(base_url, book, rng):
+    return "POST", f"{base_url}/get_discount", {"id": book["id"], "quantity": rng.randint(1, 10)}
+
+
+REQUESTS = {
+    "id_or_name": id_or_name,
+    "get_price": get_price,
+    "stock_by_id": stock_by_id,
+    "get_discount": get_discount,
+}
+
+
+class Workload:
+    """
+    Draws calls from the request mix. Each call goes to a random store and
+    a random book of that store's catalog, so caches see a realistic spread
+    of keys rather than one hot book.
+    """
+
+    def __init__(self, mix, catalogs, seed=None):
+        self.catalogs = {base_url: books for base_url, books in catalogs.items() if books}
+        if not self.catalogs:
+            raise ValueError("No books to request: every store's catalog is empty")
+        self.endpoints = list(mix)
+        self.weights = [mix[endpoint] for endpoint in self.endpoints]
+        self.base_urls = list(self.catalogs)
+        self.rng = random.Random(seed)
+
+    def next_call(self):
+        endpoint = self.rng.choices(self.endpoints, self.weights)[0]
+        base_url = self.rng.choice(self.base_urls)
+        book = self.rng.choice(self.catalogs[base_url])
+        method, url, params = REQUESTS[endpoint](base_url, book, self.rng)
+        return Call(endpoint, method, url, params)
+
+
+async def load_catalog(client, base_url, limit=None):
+    """Ids and names of a store's books, paged through GET /books"""
+    books = []
+    after = 0
+    while after is not None and (limit is None or len(books) < limit):
+        response = await client.get(f"{base_url}/books", params={"after": after, "limit": 1000})
+        response.raise_for_status()
+        page = response.json()
+        books += [{"id": book["id"], "name": book["name"]} for book in page["books"]]
+        after = page["next_after"]
+    return books[:limit] if limit else books
@@ -0,0 +1,27 @@
+import os
+import tempfile
+
+import pytest
+
+# Every store on its own throwaway SQLite file, set before the app reads its
+# settings (.env does not override variables that are already set)
+_DB_DIR = tempfile.mkdtemp(prefix="store-tests-")
+for variable, name in (("DATABASE_URL", "amazon"), ("FLIPKART_DATABASE_URL", "flipkart"),
+                       ("SAPNA_DATABASE_URL", "sapna")):
+    os.environ[variable] = f"sqlite:///{_DB_DIR}/{name}.db"
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient on the gateway app, started (databases seeded, indexes built) once per run"""
+    from fastapi.testclient import TestClient
+
+    from app.gateway_main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
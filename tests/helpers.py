@@ -0,0 +1,30 @@
+import re
+
+
+def query_count(response):
+    """Statements a response's request ran, read from its Server-Timing header"""
+    header = response.headers.get("server-timing")
+    if header is None:
+        raise AssertionError("Response has no Server-Timing header; is SERVER_TIMING disabled?")
+    match = re.search(r"(?:^|,)\s*db;[^,]*\bcount=(\d+)", header)
+    if match is None:
+        raise AssertionError(f"No query count in Server-Timing: {header}")
+    return int(match.group(1))
+
+
+def assert_queries(client, method, url, expected, **kwargs):
+    """
+    Make a request with a TestClient (or httpx client) and assert how many
+    SQL statements the endpoint ran. `expected` is an exact count, or a
+    range such as range(1, 4). Returns the response. Catalog caches make
+    repeated requests cheaper, so invalidate them first or vary the ids.
+
+        assert_queries(client, "POST", "/amazon/get_discount?id=1&quantity=3", 3)
+    """
+    response = client.request(method, url, **kwargs)
+    count = query_count(response)
+    within = count in expected if isinstance(expected, range) else count == expected
+    if not within:
+        raise AssertionError(f"{method} {url} ran {count} queries, expected {expected} "
+                             f"(Server-Timing: {response.headers['server-timing']})")
+    return response
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from sqlalchemy import Column, Integer, String, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+
+from app.fuzzy_search import TrigramIndex
+from app.suggest import SuggestIndex
+
+pytestmark = pytest.mark.anyio
+
+Base = declarative_base()
+
+
+class Book(Base):
+    __tablename__ = "books"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100))
+    publisher = Column(String(100))
+    subject_code = Column(String(10))
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/books.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Book), [{"id": 1, "name": "Deep Learning"}, {"id": 2, "name": "Fluent Python"}])
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+def names(index, query):
+    return [suggestion["text"] for suggestion in index.suggest(query)]
+
+
+async def test_stale_index_is_served_while_it_rebuilds(session_factory):
+    index = SuggestIndex()
+    index.max_age = 0
+    await index.ready(session_factory, Book)
+    assert names(index, "effective") == []
+
+    # Written by another process: no ORM event reaches this index
+    async with session_factory() as db:
+        await db.execute(insert(Book).values(id=3, name="Effective Java"))
+        await db.commit()
+
+    await index.ready(session_factory, Book)
+    rebuilding = index.refresh(session_factory, Book)
+    assert index.refresh(session_factory, Book) is rebuilding
+    assert names(index, "effective") == []
+
+    await rebuilding
+    assert names(index, "effective") == ["Effective Java"]
+
+
+async def test_writes_during_a_rebuild_reach_the_new_copy(session_factory, monkeypatch):
+    index = SuggestIndex()
+    index.track(Book)
+    loading = threading.Event()
+    load = SuggestIndex.load
+
+    def slow_load(self, books):
+        loading.set()
+        time.sleep(0.2)
+        load(self, books)
+
+    monkeypatch.setattr(SuggestIndex, "load", slow_load)
+    rebuilding = index.refresh(session_factory, Book)
+    await asyncio.get_running_loop().run_in_executor(None, loading.wait)
+
+    async with session_factory() as db:
+        db.add(Book(id=4, name="Clean Code"))
+        (await db.get(Book, 1)).name = "Deep Learning with Python"
+        await db.commit()
+    await rebuilding
+
+    assert names(index, "clean") == ["Clean Code"]
+    assert names(index, "deep") == ["Deep Learning with Python"]
+
+
+async def test_trigram_index_is_searched_while_it_rebuilds(session_factory):
+    index = TrigramIndex()
+    index.max_age = 0
+    await index.ready(session_factory, Book)
+
+    async with session_factory() as db:
+        await db.execute(insert(Book).values(id=3, name="Effective Java"))
+        await db.commit()
+
+    await index.ready(session_factory, Book)
+    assert index.search("efective jav") == []
+
+    await index.refresh(session_factory, Book)
+    assert [hit["name"] for hit in index.search("efective jav")] == ["Effective Java"]
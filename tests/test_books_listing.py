@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from app.schemas.common_schemas import MAX_PAGE_SIZE
+from tests.helpers import assert_queries
+
+
+def all_pages(client, url, **params):
+    books, after = [], 0
+    while after is not None:
+        page = client.get(url, params={**params, "after": after}).json()
+        books += page["books"]
+        after = page["next_after"]
+    return books
+
+
+@pytest.mark.parametrize("store", ["amazon", "flipkart", "sapna"])
+def test_pages_follow_the_cursor_to_the_export(client, store):
+    books = all_pages(client, f"/{store}/books", limit=7)
+    ids = [book["id"] for book in books]
+    assert ids == sorted(set(ids))
+
+    response = client.get(f"/{store}/books/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == books
+
+
+def test_filters_apply_to_pages_and_export(client):
+    books = all_pages(client, "/amazon/books", limit=3, subject_code="py")
+    assert books and all(book["subject_code"] == "py" for book in books)
+
+    exported = client.get("/amazon/books/export", params={"subject_code": "py"}).text.splitlines()
+    assert [json.loads(line)["id"] for line in exported] == [book["id"] for book in books]
+    assert client.get("/amazon/books/export", params={"genre": "no such genre"}).text == ""
+
+
+def test_a_deep_page_is_one_query(client):
+    first = client.get("/amazon/books", params={"limit": 2}).json()
+    assert first["next_after"] == first["books"][-1]["id"]
+    page = assert_queries(client, "GET", f"/amazon/books?after={first['next_after']}&limit=2", 1).json()
+    assert page["books"][0]["id"] > first["next_after"]
+
+
+def test_page_size_is_bounded(client):
+    assert client.get("/amazon/books", params={"limit": MAX_PAGE_SIZE + 1}).status_code == 422
+    assert client.get("/amazon/books", params={"after": -1}).status_code == 422
@@ -0,0 +1,72 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.compare import compare_offers, http_offer_source
+
+pytestmark = pytest.mark.anyio
+
+
+def offer_after(seconds, payable_amount=None, fail=False):
+    async def fetch(name, quantity):
+        await asyncio.sleep(seconds)
+        if fail:
+            raise RuntimeError("store is down")
+        if payable_amount is None:
+            return None
+        return {"name": name, "quantity": quantity, "payable_amount": payable_amount}
+    return fetch
+
+
+async def test_compare_picks_the_cheapest_answer():
+    result = await compare_offers(
+        {"a": offer_after(0, 300.0), "b": offer_after(0, 250.0), "c": offer_after(0)}, "Some Book", 2
+    )
+    assert result["cheapest"] == {"store": "b", "name": "Some Book", "quantity": 2, "payable_amount": 250.0}
+    assert {store: r["status"] for store, r in result["stores"].items()} == {"a": "ok", "b": "ok", "c": "not_found"}
+
+
+async def test_compare_reports_timeouts_deadlines_and_errors():
+    sources = {
+        "fast": offer_after(0, 500.0),
+        "failing": offer_after(0, fail=True),
+        "slow": offer_after(0.3, 100.0),
+        "stuck": offer_after(10, 50.0),
+    }
+    result = await compare_offers(sources, "Some Book", store_timeout=0.1, deadline=0.05)
+    statuses = {store: r["status"] for store, r in result["stores"].items()}
+    assert statuses == {"fast": "ok", "failing": "error", "slow": "deadline", "stuck": "deadline"}
+    assert result["stores"]["failing"]["error"] == "store is down"
+    assert result["cheapest"]["store"] == "fast"
+    assert result["elapsed_ms"] < 1000
+
+
+async def test_compare_store_timeout_comes_before_the_deadline():
+    result = await compare_offers({"slow": offer_after(10, 1.0)}, "Some Book", store_timeout=0.05, deadline=1)
+    assert result["stores"]["slow"]["status"] == "timeout"
+    assert result["cheapest"] is None
+
+
+async def test_http_offer_source_reads_the_offer_endpoint():
+    def handler(request):
+        if request.url.params["name"] == "missing":
+            return httpx.Response(404, json={"detail": "Product not found"})
+        return httpx.Response(200, json={"quantity": int(request.url.params["quantity"]), "payable_amount": 9.5})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        fetch = http_offer_source(client, "http://store/amazon")
+        assert await fetch("Some Book", 3) == {"quantity": 3, "payable_amount": 9.5}
+        assert await fetch("missing", 1) is None
+
+
+def test_compare_endpoint(client):
+    response = client.get("/compare", params={"name": "Python Crash Course", "quantity": 2,
+                                               "timeout_ms": 5000, "deadline_ms": 5000})
+    assert response.status_code == 200
+    result = response.json()
+    assert set(result["stores"]) == {"amazon", "flipkart", "sapna"}
+    payable = [r["offer"]["payable_amount"] for r in result["stores"].values() if r["status"] == "ok"]
+    assert result["cheapest"]["payable_amount"] == min(payable)
+
+    assert client.get("/compare", params={"name": "x", "deadline_ms": 0}).status_code == 422
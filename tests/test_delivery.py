@@ -0,0 +1,47 @@
+import pytest
+
+from app.delivery import DeliveryIndex, normalize_pincode
+
+
+def test_normalize_pincode():
+    assert normalize_pincode(" 110 001 ") == "110001"
+    assert normalize_pincode(560001) == "560001"
+    assert normalize_pincode("11a001") is None
+    assert normalize_pincode("12") is None
+
+
+def test_unknown_pincodes_fall_back_to_the_slowest_shared_prefix():
+    index = DeliveryIndex()
+    index.load([("110001", 2), ("110002", 4), ("400001", 3), ("bad", 1), ("560001", None)])
+    assert len(index) == 3
+
+    assert index.lookup("110001") == {"pincode": "110001", "delivery_time": 2, "match": "exact", "matched_prefix": "110001"}
+    assert index.lookup("110009") == {"pincode": "110009", "delivery_time": 4, "match": "prefix", "matched_prefix": "11000"}
+    assert index.lookup("190000")["delivery_time"] == 4
+    assert index.lookup("400999")["matched_prefix"] == "400"
+    assert index.lookup("999999") is None
+
+
+def test_duplicate_pincodes_keep_the_slowest_time():
+    index = DeliveryIndex()
+    index.load([("110001", 2), ("110 001", 5)])
+    assert index.lookup("110001")["delivery_time"] == 5
+
+
+@pytest.mark.parametrize("store", ["amazon", "flipkart", "sapna"])
+def test_delivery_endpoint(client, store):
+    exact = client.get(f"/{store}/delivery", params={"pincode": "110001"})
+    assert exact.status_code == 200
+    assert exact.json()["match"] == "exact"
+
+    assert client.get(f"/{store}/delivery", params={"pincode": "110099"}).json()["match"] == "prefix"
+    assert client.get(f"/{store}/delivery", params={"pincode": "abc"}).status_code == 400
+    assert client.get(f"/{store}/delivery", params={"pincode": "999999"}).status_code == 404
+
+
+def test_deliveries_report_errors_per_item(client):
+    response = client.post("/amazon/deliveries", json={"pincodes": ["110001", "x", "999999"]})
+    assert response.status_code == 200
+    assert [item["error"] for item in response.json()] == [None, "Invalid pincode", "No delivery to this pincode"]
+
+    assert client.post("/amazon/deliveries", json={"pincodes": []}).status_code == 400
@@ -0,0 +1,34 @@
+from collections import namedtuple
+
+import pytest
+
+from app.discount_tiers import DiscountTierError, DiscountTiers
+
+Row = namedtuple("Row", ["cost_from", "cost_to", "percent_off"])
+
+
+def test_percent_off_uses_half_open_tiers():
+    tiers = DiscountTiers([Row(500, 1000, 10), Row(0, 500, 0), Row(1000, 5000, 15)])
+    assert tiers.percent_off(0) == 0
+    assert tiers.percent_off(499.99) == 0
+    assert tiers.percent_off(500) == 10
+    assert tiers.percent_off(999.99) == 10
+    assert tiers.percent_off(1000) == 15
+
+
+def test_totals_outside_or_between_tiers_get_no_discount():
+    tiers = DiscountTiers([Row(100, 200, 5), Row(300, 400, 10)])
+    assert tiers.gaps == [(200, 300)]
+    assert tiers.percent_off(50) == 0
+    assert tiers.percent_off(250) == 0
+    assert tiers.percent_off(400) == 0
+
+
+def test_overlapping_tiers_are_rejected():
+    with pytest.raises(DiscountTierError, match="overlap"):
+        DiscountTiers([Row(0, 500, 5), Row(400, 1000, 10)])
+
+
+def test_empty_tier_is_rejected():
+    with pytest.raises(DiscountTierError, match="Empty"):
+        DiscountTiers([Row(500, 500, 5)])
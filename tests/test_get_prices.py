@@ -0,0 +1,36 @@
+import pytest
+
+from app.schemas.common_schemas import MAX_BATCH_SIZE
+from tests.helpers import assert_queries
+
+
+@pytest.mark.parametrize("store", ["amazon", "flipkart", "sapna"])
+def test_get_prices_matches_get_price(client, store):
+    batch = client.post(f"/{store}/get_prices", json={"ids": [1, 2]}).json()
+    for item in batch:
+        single = client.get(f"/{store}/get_price", params={"id": item["id"]}).json()
+        assert item["unit_price"] == single["unit_price"]
+        assert item["error"] is None
+
+
+def test_get_prices_keeps_request_order_with_per_item_errors(client):
+    response = client.post("/amazon/get_prices", json={"ids": [2, 999999, 1], "names": ["PYTHON  crash course", "nope"]})
+    assert response.status_code == 200
+    items = response.json()
+    assert [item["id"] for item in items] == [2, 999999, 1, 1, None]
+    assert [item["error"] for item in items] == [None, "Product not found", None, None, "Product not found"]
+    assert items[3]["name"] == "Python Crash Course"
+    assert items[4]["name"] == "nope"
+
+
+def test_get_prices_query_count_does_not_grow_with_the_batch(client):
+    client.post("/amazon/admin/cache/invalidate").raise_for_status()
+    assert_queries(client, "POST", "/amazon/get_prices", 2, json={"ids": [1, 2]})
+    client.post("/amazon/admin/cache/invalidate").raise_for_status()
+    assert_queries(client, "POST", "/amazon/get_prices", 2, json={"ids": list(range(1, 13)), "names": ["effective python"]})
+
+
+def test_get_prices_rejects_empty_and_oversized_batches(client):
+    assert client.post("/amazon/get_prices", json={}).status_code == 400
+    ids = list(range(1, MAX_BATCH_SIZE + 2))
+    assert client.post("/amazon/get_prices", json={"ids": ids}).status_code == 400
@@ -0,0 +1,66 @@
+from datetime import datetime
+
+import pytest
+from starlette.requests import Request
+
+from app.http_cache import entity_tag, http_date, not_modified
+
+
+def request_with(**headers):
+    return Request({"type": "http", "method": "GET", "headers": [
+        (name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()
+    ]})
+
+
+def test_entity_tag_follows_the_values():
+    assert entity_tag(1, "Book") == entity_tag(1, "Book")
+    assert entity_tag(1, "Book") != entity_tag(1, "Book 2")
+    assert entity_tag(1, "Book").startswith('"')
+
+
+def test_http_date():
+    assert http_date(datetime(2024, 1, 2, 3, 4, 5, 600)) == "Tue, 02 Jan 2024 03:04:05 GMT"
+
+
+def test_not_modified():
+    modified = datetime(2024, 1, 2, 3, 4, 5, 600)
+    assert not_modified(request_with(if_none_match='"a", W/"b"'), '"b"')
+    assert not_modified(request_with(if_none_match="*"), '"b"')
+    assert not not_modified(request_with(if_none_match='"a"'), '"b"')
+    assert not_modified(request_with(if_modified_since="Tue, 02 Jan 2024 03:04:05 GMT"), '"b"', modified)
+    assert not not_modified(request_with(if_modified_since="Tue, 02 Jan 2024 03:04:04 GMT"), '"b"', modified)
+    assert not not_modified(request_with(if_modified_since="yesterday"), '"b"', modified)
+    # If-None-Match wins over If-Modified-Since
+    assert not not_modified(
+        request_with(if_none_match='"a"', if_modified_since="Tue, 02 Jan 2024 03:04:05 GMT"), '"b"', modified
+    )
+
+
+@pytest.mark.parametrize("url", ["/amazon/get_price?id=1", "/flipkart/id_or_name?id=1", "/sapna/get_price?id=2"])
+def test_catalog_reads_answer_304_to_matching_validators(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    etag, last_modified = response.headers["etag"], response.headers["last-modified"]
+    assert response.headers["cache-control"].startswith("public, max-age=")
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(url, headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get(url, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_post_get_price_always_gets_the_body(client):
+    etag = client.get("/amazon/get_price?id=1").headers["etag"]
+    response = client.post("/amazon/get_price?id=1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["unit_price"] > 0
+
+
+@pytest.mark.parametrize("url", ["/amazon/get_price?id=1", "/amazon/id_or_name?id=1"])
+def test_catalog_reads_answer_head(client, url):
+    etag = client.get(url).headers["etag"]
+    response = client.head(url)
+    assert response.status_code == 200
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    assert client.head(url, headers={"If-None-Match": etag}).status_code == 304
@@ -0,0 +1,95 @@
+import gzip
+import json
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import importer
+from app.database import Base
+from app.importer import feed_format, import_feed
+from app.models.amazon_models import Amazon, AmazonInventory, AmazonPrice
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """Every store's tables on a throwaway SQLite file, in place of the store databases"""
+    engine = create_engine(f"sqlite:///{tmp_path}/import.db")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(importer, "get_engine", lambda store: engine)
+    monkeypatch.setattr(importer, "get_session_factory", lambda store: sessionmaker(bind=engine))
+    yield engine
+    engine.dispose()
+
+
+def book(n, name=None):
+    return {"amazon_id": f"feed_{n:03d}", "name": name or f"Feed  Book {n}", "publisher": "Feed Press",
+            "genre": "python", "subject_code": "py", "serial_number": n}
+
+
+def write_jsonl(path, lines):
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "wt", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_feed_format():
+    assert feed_format("books.jsonl.gz") == "jsonl"
+    assert feed_format("books.ndjson") == "jsonl"
+    assert feed_format("prices.csv") == "csv"
+    with pytest.raises(ValueError):
+        feed_format("books.txt")
+
+
+def test_import_books_counts_and_records_rejects(engine, tmp_path):
+    feed = write_jsonl(tmp_path / "books.jsonl.gz", [
+        json.dumps(book(1)),
+        "{not json",
+        json.dumps({**book(2), "serial_number": "two"}),
+        "[1, 2]",
+        json.dumps(book(3)),
+    ])
+    rejects = tmp_path / "rejects.jsonl"
+
+    result = import_feed("amazon", "books", feed, chunk_size=2, commit_every=2,
+                         rejects_path=str(rejects), progress=lambda line: None)
+    assert (result["read"], result["written"], result["rejected"]) == (5, 2, 3)
+    assert [json.loads(line)["line"] for line in rejects.read_text().splitlines()] == [2, 3, 4]
+
+    with sessionmaker(bind=engine)() as db:
+        books = db.scalars(select(Amazon).order_by(Amazon.id)).all()
+        assert [b.name_normalized for b in books] == ["feed book 1", "feed book 3"]
+        # No prices yet, so no price reference; stock is seeded like for seeded books
+        assert [b.price_id for b in books] == [None, None]
+        assert db.scalar(select(func.count()).select_from(AmazonInventory)) == 2
+
+
+def test_import_csv_prices_then_books_get_a_price(engine, tmp_path):
+    prices = tmp_path / "prices.csv"
+    prices.write_text("id,price\n1,100\n2,200\n3,\n", encoding="utf-8")
+    result = import_feed("amazon", "prices", str(prices), progress=lambda line: None)
+    assert (result["written"], result["rejected"]) == (2, 1)
+
+    feed = write_jsonl(tmp_path / "books.jsonl", [json.dumps(book(n)) for n in (1, 2, 3)])
+    import_feed("amazon", "books", feed, progress=lambda line: None)
+    with sessionmaker(bind=engine)() as db:
+        assert db.scalars(select(Amazon.price_id).order_by(Amazon.id)).all() == [2, 1, 2]
+        assert db.scalar(select(func.count()).select_from(AmazonPrice)) == 2
+
+
+@pytest.mark.parametrize("on_conflict, name", [("update", "Renamed"), ("skip", "Feed  Book 1")])
+def test_import_matches_existing_books_on_the_store_id(engine, tmp_path, on_conflict, name):
+    import_feed("amazon", "books", write_jsonl(tmp_path / "a.jsonl", [json.dumps(book(1))]),
+                progress=lambda line: None)
+    result = import_feed("amazon", "books", write_jsonl(tmp_path / "b.jsonl", [json.dumps(book(1, "Renamed"))]),
+                         on_conflict=on_conflict, progress=lambda line: None)
+    assert result["rejected"] == 0
+
+    with sessionmaker(bind=engine)() as db:
+        assert db.scalars(select(Amazon.name)).all() == [name]
+
+
+def test_import_rejects_unknown_conflict_modes(engine, tmp_path):
+    with pytest.raises(ValueError):
+        import_feed("amazon", "books", str(tmp_path / "books.jsonl"), on_conflict="replace")
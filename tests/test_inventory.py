@@ -0,0 +1,100 @@
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.inventory import (
+    COMMITTED, InsufficientStock, ReservationError, ShardedStockLedger, StockLedger
+)
+from app.models.amazon_models import AmazonInventory, AmazonReservation
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/inventory.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda conn: AmazonInventory.__table__.create(conn))
+        await conn.run_sync(lambda conn: AmazonReservation.__table__.create(conn))
+        await conn.execute(insert(AmazonInventory), [
+            {"book_id": 1, "on_hand": 10, "reserved": 0, "version": 0},
+            {"book_id": 2, "on_hand": 3, "reserved": 0, "version": 0},
+        ])
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def stock(session_factory, book_id):
+    async with session_factory() as db:
+        row = await db.get(AmazonInventory, book_id)
+        return row.on_hand, row.reserved
+
+
+async def test_reserve_commit_and_release(session_factory):
+    ledger = StockLedger("amazon", AmazonInventory, AmazonReservation)
+    async with session_factory() as db:
+        sale = await ledger.reserve(db, [(1, 2), (2, 1)])
+        cart = await ledger.reserve(db, [(1, 3)])
+        assert await stock(session_factory, 1) == (10, 5)
+
+        await ledger.commit(db, sale["reservation_id"])
+        await ledger.release(db, cart["reservation_id"])
+        with pytest.raises(ReservationError):
+            await ledger.commit(db, cart["reservation_id"])
+
+    assert await stock(session_factory, 1) == (8, 0)
+    assert await stock(session_factory, 2) == (2, 0)
+
+
+async def test_reserve_is_all_or_nothing(session_factory):
+    ledger = StockLedger("amazon", AmazonInventory, AmazonReservation)
+    async with session_factory() as db:
+        with pytest.raises(InsufficientStock) as error:
+            await ledger.reserve(db, [(1, 2), (2, 4)])
+    assert (error.value.book_id, error.value.available) == (2, 3)
+    assert await stock(session_factory, 1) == (10, 0)
+
+
+async def test_restock_creates_missing_row(session_factory):
+    ledger = StockLedger("amazon", AmazonInventory, AmazonReservation)
+    async with session_factory() as db:
+        assert (await ledger.restock(db, 3, 5))["available"] == 5
+        assert (await ledger.restock(db, 3, -2))["available"] == 3
+        with pytest.raises(InsufficientStock):
+            await ledger.restock(db, 4, -1)
+
+
+async def test_restock_retries_when_the_row_appears_meanwhile(session_factory, monkeypatch):
+    ledger = StockLedger("amazon", AmazonInventory, AmazonReservation)
+    async with session_factory() as db:
+        get = db.get
+
+        async def created_concurrently(model, book_id):
+            # Another restock inserts the row between our UPDATE and INSERT
+            monkeypatch.setattr(db, "get", get)
+            await db.execute(insert(AmazonInventory).values(book_id=book_id, on_hand=4, reserved=0, version=0))
+            return None
+
+        monkeypatch.setattr(db, "get", created_concurrently)
+        assert (await ledger.restock(db, 3, 5))["on_hand"] == 5
+
+
+async def test_sharded_commit_is_written_before_it_returns(session_factory):
+    ledger = ShardedStockLedger("amazon", AmazonInventory, AmazonReservation, {1},
+                                lease_size=5, flush_interval=3600)
+    await ledger.start(session_factory)
+    try:
+        async with session_factory() as db:
+            reservation = await ledger.reserve(db, [(1, 2)])
+            await ledger.commit(db, reservation["reservation_id"])
+
+        # No flush interval has passed: the sale is in the database, out of the lease
+        assert await stock(session_factory, 1) == (8, 3)
+        async with session_factory() as db:
+            statuses = (await db.scalars(
+                select(AmazonReservation.status).where(AmazonReservation.reservation_id == reservation["reservation_id"])
+            )).all()
+        assert statuses == [COMMITTED]
+    finally:
+        await ledger.stop()
+    assert await stock(session_factory, 1) == (8, 0)
@@ -0,0 +1,107 @@
+import time
+
+import httpx
+import pytest
+
+from loadtest.report import Recorder, build_report, format_report, percentile
+from loadtest.runner import closed_loop, open_loop
+from loadtest.workload import Workload, load_catalog, parse_mix, parse_store_urls
+
+BOOKS = {"http://store/amazon": [{"id": 1, "name": "Python Crash Course"}, {"id": 2, "name": "Fluent Python"}]}
+
+
+def test_percentile_is_nearest_rank():
+    ordered = list(range(1, 101))
+    assert [percentile(ordered, p) for p in (50, 95, 99, 100)] == [50, 95, 99, 100]
+    assert percentile([1, 2, 3], 50) == 2
+    assert percentile([1, 2, 3], 99) == 3
+    assert percentile([7], 1) == 7
+    assert percentile([], 50) is None
+
+
+def test_only_the_measurement_window_is_reported():
+    recorder = Recorder()
+    recorder.record("get_price", 9.0, 200, False)
+    recorder.drop()
+    recorder.start()
+    for ms in range(1, 101):
+        recorder.record("get_price", ms / 1000, 200, False)
+    recorder.record("stock_by_id", 0.5, 503, True)
+    recorder.drop()
+    recorder.stop()
+    recorder.record("get_price", 9.0, 200, False)
+
+    report = build_report(recorder, {"mode": "closed"})
+    prices = report["endpoints"]["get_price"]
+    assert prices["requests"] == 100
+    assert prices["latency_ms"]["p50"] == 50.0
+    assert prices["latency_ms"]["p99"] == 99.0
+    assert prices["latency_ms"]["max"] == 100.0
+    assert report["endpoints"]["stock_by_id"]["error_rate"] == 1.0
+    assert report["total"]["requests"] == 101
+    assert report["total"]["status_codes"] == {"200": 100, "503": 1}
+    assert report["total"]["dropped"] == 1
+    assert report["settings"] == {"mode": "closed"}
+
+    table = format_report(report).splitlines()
+    assert table[0].split()[0] == "endpoint"
+    assert [line.split()[0] for line in table[1:4]] == ["get_price", "stock_by_id", "total"]
+
+
+def test_parse_mix_and_store_urls():
+    assert parse_mix("id_or_name=4, get_price") == {"id_or_name": 4.0, "get_price": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("checkout=1")
+    with pytest.raises(ValueError):
+        parse_mix("get_price=0")
+    assert parse_store_urls("amazon=http://h:8000/amazon/") == {"amazon": "http://h:8000/amazon"}
+
+
+def test_workload_follows_the_mix():
+    workload = Workload({"get_price": 1, "get_discount": 0}, {**BOOKS, "http://store/empty": []}, seed=1)
+    calls = [workload.next_call() for _ in range(50)]
+    assert {call.endpoint for call in calls} == {"get_price"}
+    assert {call.url for call in calls} == {"http://store/amazon/get_price"}
+    assert {call.params["id"] for call in calls} == {1, 2}
+
+    with pytest.raises(ValueError):
+        Workload({"get_price": 1}, {"http://store/empty": []})
+
+
+def store_transport():
+    def handler(request):
+        if request.url.path.endswith("/books"):
+            after = int(request.url.params["after"])
+            books = [{"id": id, "name": f"Book {id}"} for id in range(after + 1, min(after + 1000, 2500) + 1)]
+            return httpx.Response(200, json={"books": books, "next_after": books[-1]["id"] if len(books) == 1000 else None})
+        if request.url.params.get("id") == "2":
+            return httpx.Response(500)
+        return httpx.Response(200, json={})
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.anyio
+async def test_load_catalog_pages_through_books():
+    async with httpx.AsyncClient(transport=store_transport()) as client:
+        assert len(await load_catalog(client, "http://store/amazon")) == 2500
+        assert len(await load_catalog(client, "http://store/amazon", limit=1200)) == 1200
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("loop", ["closed", "open"])
+async def test_loops_record_every_answer(loop):
+    recorder = Recorder()
+    workload = Workload({"get_price": 1}, BOOKS, seed=3)
+    async with httpx.AsyncClient(transport=store_transport()) as client:
+        recorder.start()
+        deadline = time.perf_counter() + 0.2
+        if loop == "closed":
+            await closed_loop(client, workload, recorder, concurrency=4, deadline=deadline)
+        else:
+            await open_loop(client, workload, recorder, rps=200, deadline=deadline, max_in_flight=10)
+        recorder.stop()
+
+    statuses = recorder.statuses["get_price"]
+    assert sum(statuses.values()) == len(recorder.latencies["get_price"]) > 0
+    assert set(statuses) <= {"200", "500"}
+    assert recorder.errors["get_price"] == statuses["500"]
@@ -0,0 +1,129 @@
+import json
+import logging
+import logging.config
+import queue
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from uvicorn.config import LOGGING_CONFIG
+
+from app import query_tracking
+from app.log_config import (
+    JSONFormatter, TextFormatter, _parse_levels, _QueueHandler, configure_logging, install_logging,
+    outgoing_headers, request_id
+)
+
+
+def test_uvicorn_loggers_are_rerouted_after_uvicorn_configures_them():
+    configure_logging()
+    # What uvicorn does when it starts, after the app module was first imported
+    logging.config.dictConfig(LOGGING_CONFIG)
+    assert logging.getLogger("uvicorn.access").handlers
+
+    configure_logging()
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logger = logging.getLogger(name)
+        assert logger.handlers == []
+        assert logger.propagate
+
+
+def make_record(message="hello %s", args=("world",), **extra):
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, message, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_writes_extras_as_fields():
+    entry = json.loads(JSONFormatter().format(make_record(request_id="abc", store="amazon", color_message="x")))
+    assert entry["message"] == "hello world"
+    assert entry["logger"] == "app.test"
+    assert entry["level"] == "INFO"
+    assert entry["request_id"] == "abc"
+    assert entry["store"] == "amazon"
+    assert "color_message" not in entry
+
+
+def test_queue_handler_resolves_messages_and_tracebacks():
+    try:
+        raise ValueError("bad")
+    except ValueError:
+        record = logging.LogRecord("app.test", logging.ERROR, __file__, 1, "failed %d", (3,), sys.exc_info())
+
+    prepared = _QueueHandler(queue.SimpleQueue()).prepare(record)
+    assert (prepared.msg, prepared.args, prepared.exc_info) == ("failed 3", None, None)
+    assert "ValueError: bad" in prepared.exc_text
+    assert "ValueError: bad" in json.loads(JSONFormatter().format(prepared))["exception"]
+
+
+def test_text_formatter_shows_a_dash_without_a_request():
+    assert "app.test [-] hello world" in TextFormatter().format(make_record())
+
+
+def test_parse_levels():
+    assert _parse_levels(" app.sql=debug, uvicorn.access=WARNING,,") == {"app.sql": "DEBUG", "uvicorn.access": "WARNING"}
+
+
+@pytest.fixture(scope="module")
+def small_app():
+    app = FastAPI()
+    install_logging(app)
+
+    @app.get("/whoami")
+    async def whoami():
+        return {"request_id": request_id.get(), "outgoing": outgoing_headers()}
+
+    with TestClient(app) as client:
+        yield client
+
+
+def test_requests_get_an_id(small_app):
+    response = small_app.get("/whoami")
+    body = response.json()
+    assert body["request_id"] == response.headers["x-request-id"]
+    assert body["outgoing"] == {"X-Request-ID": body["request_id"]}
+    assert small_app.get("/whoami").json()["request_id"] != body["request_id"]
+    assert request_id.get() is None
+
+
+@pytest.mark.parametrize("incoming, reused", [("trace-42.a:b", True), ("not ok!", False), ("x" * 129, False)])
+def test_incoming_request_ids_are_reused_when_well_formed(small_app, incoming, reused):
+    response = small_app.get("/whoami", headers={"X-Request-ID": incoming})
+    assert (response.headers["x-request-id"] == incoming) is reused
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/log.db", logging_name="logtest")
+    yield engine
+    engine.dispose()
+
+
+def run_select(engine):
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+def test_sql_statements_are_sampled(engine, monkeypatch, caplog):
+    caplog.set_level(logging.INFO, logger="app.sql")
+    monkeypatch.setitem(query_tracking._sample_rates, "logtest", 0.0)
+    run_select(engine)
+    assert not caplog.records
+
+    monkeypatch.setitem(query_tracking._sample_rates, "logtest", 1.0)
+    run_select(engine)
+    [record] = caplog.records
+    assert record.levelno == logging.INFO
+    assert (record.store, record.statement) == ("logtest", "SELECT 1")
+
+
+def test_slow_statements_are_warnings(engine, monkeypatch, caplog):
+    caplog.set_level(logging.INFO, logger="app.sql")
+    monkeypatch.setitem(query_tracking._sample_rates, "logtest", 0.0)
+    monkeypatch.setattr(query_tracking, "SLOW_QUERY_MS", 1e-9)
+    run_select(engine)
+    [record] = caplog.records
+    assert record.levelno == logging.WARNING
+    assert record.getMessage().startswith("Slow query on logtest")
@@ -0,0 +1,75 @@
+import re
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.metrics import LATENCY_BUCKETS, install_metrics, render_metrics
+
+_SAMPLE = re.compile(r"^(\w+)(\{.*\})? (\S+)$")
+
+
+def samples(text):
+    """{'name{labels}': value} of every sample in a Prometheus text exposition"""
+    values = {}
+    for line in text.splitlines():
+        if not line.startswith("#"):
+            name, labels, value = _SAMPLE.match(line).groups()
+            values[name + (labels or "")] = float(value)
+    return values
+
+
+@pytest.fixture(scope="module")
+def small_app():
+    app = FastAPI()
+    install_metrics(app)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/broken")
+    async def broken():
+        raise RuntimeError("boom")
+
+    with TestClient(app, raise_server_exceptions=False) as client:
+        yield client
+
+
+def test_requests_are_labelled_by_route_template(small_app):
+    before = samples(render_metrics())
+    for item_id in (1, 2, 3):
+        assert small_app.get(f"/items/{item_id}").status_code == 200
+    small_app.get("/no/such/path")
+    after = samples(render_metrics())
+
+    def delta(key):
+        return after.get(key, 0) - before.get(key, 0)
+
+    assert delta('http_requests_total{method="GET",route="/items/{item_id}",status="200"}') == 3
+    assert delta('http_requests_total{method="GET",route="unmatched",status="404"}') == 1
+    assert not any("/items/1" in key for key in after)
+
+    histogram = 'http_request_duration_seconds_{}{{method="GET",route="/items/{{item_id}}"{}}}'
+    assert delta(histogram.format("count", "")) == 3
+    assert delta(histogram.format("bucket", ',le="+Inf"')) == 3
+    assert delta(histogram.format("bucket", f',le="{LATENCY_BUCKETS[-1]}"')) == 3
+
+
+def test_exceptions_count_as_errors(small_app):
+    before = samples(render_metrics())
+    assert small_app.get("/broken").status_code == 500
+    after = samples(render_metrics())
+    key = 'http_request_errors_total{method="GET",route="/broken"}'
+    assert after[key] - before.get(key, 0) == 1
+
+
+def test_store_queries_are_counted_per_route(client):
+    client.post("/amazon/admin/cache/invalidate").raise_for_status()
+    key = 'db_queries_total{route="/amazon/get_price",store="amazon"}'
+    before = samples(client.get("/metrics").text).get(key, 0)
+    client.get("/amazon/get_price", params={"id": 5})
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert samples(response.text)[key] - before == 2
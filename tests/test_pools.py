@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app import database
+from app.database import TimedQueuePool, engine_options, ping_idle_connections, pre_ping_mode, track_pool_health
+
+
+@pytest.mark.parametrize("value, mode", [
+    (None, "idle"), ("always", "always"), ("Never", "never"), ("True", "always"), ("false", "never")
+])
+def test_pre_ping_mode(monkeypatch, value, mode):
+    monkeypatch.delenv("AMAZON_DB_POOL_PRE_PING", raising=False)
+    if value is None:
+        monkeypatch.delenv("DB_POOL_PRE_PING", raising=False)
+    else:
+        monkeypatch.setenv("DB_POOL_PRE_PING", value)
+    assert pre_ping_mode("amazon") == mode
+
+
+def test_pool_settings_per_store(monkeypatch):
+    monkeypatch.setenv("FLIPKART_DATABASE_URL", "mysql+pymysql://user:pass@db/flipkart")
+    monkeypatch.setenv("DB_POOL_SIZE", "7")
+    monkeypatch.setenv("FLIPKART_DB_POOL_SIZE", "12")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "always")
+    options = engine_options("flipkart")
+    assert options["poolclass"] is TimedQueuePool
+    assert options["pool_size"] == 12
+    assert options["pool_pre_ping"] is True
+    assert options["logging_name"] == "flipkart"
+
+    # SQLite pools take no sizing
+    assert "pool_size" not in engine_options("amazon")
+
+
+def test_idle_connections_that_fail_their_ping_are_replaced(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/ping.db")
+    ping_idle_connections(engine, 0)
+    with engine.connect() as conn:
+        first = conn.connection.dbapi_connection
+    # The server dropped the pooled connection
+    first.close()
+
+    with engine.connect() as conn:
+        assert conn.connection.dbapi_connection is not first
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+    engine.dispose()
+
+
+def test_connection_failures_are_recorded(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "_pool_health", {})
+    engine = create_engine(f"sqlite:///{tmp_path}/missing/dir/db.sqlite")
+    track_pool_health("unreachable", engine)
+    with pytest.raises(OperationalError):
+        engine.connect()
+    assert database._pool_health["unreachable"]["last_error"].startswith("OperationalError")
+    engine.dispose()
+
+
+def test_ready_probes(client):
+    for store in ("amazon", "flipkart", "sapna"):
+        response = client.get(f"/{store}/ready")
+        assert response.status_code == 200
+        assert response.json()["ready"] and response.json()["warmed"]
+
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert set(response.json()["stores"]) == {"amazon", "flipkart", "sapna"}
+
+
+def test_ready_is_503_after_a_connection_failure(client, monkeypatch):
+    monkeypatch.setitem(database._pool_health["sapna"], "last_error", "OperationalError: gone")
+    assert client.get("/sapna/ready").status_code == 503
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["stores"]["sapna"]["last_error"] == "OperationalError: gone"
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import Column, ForeignKey, Integer, String, create_engine, inspect, select, text
+from sqlalchemy.orm import Session, declarative_base
+
+from app.database import add_missing_columns
+from app.pricing import assign_price_ids
+from tests.helpers import assert_queries
+
+Base = declarative_base()
+
+
+class Price(Base):
+    __tablename__ = "prices"
+
+    id = Column(Integer, primary_key=True)
+    price = Column(Integer)
+
+
+class Book(Base):
+    __tablename__ = "books"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100))
+    price_id = Column(Integer, ForeignKey("prices.id"), nullable=True, index=True)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/books.db")
+    # The book table as it was before price_id existed
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE books (id INTEGER PRIMARY KEY, name VARCHAR(100))"))
+        conn.execute(text("INSERT INTO books (id, name) VALUES (1, 'a'), (2, 'b'), (3, 'c'), (4, 'd')"))
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_add_missing_columns_adds_and_indexes_new_columns(engine):
+    add_missing_columns(engine, Book, Price)
+    inspector = inspect(engine)
+    assert "price_id" in {column["name"] for column in inspector.get_columns("books")}
+    assert any(index["column_names"] == ["price_id"] for index in inspector.get_indexes("books"))
+
+    # A second run finds nothing to add
+    add_missing_columns(engine, Book, Price)
+
+
+def test_assign_price_ids_keeps_the_modulo_rule(engine):
+    add_missing_columns(engine, Book, Price)
+    with Session(engine) as db:
+        db.add_all([Price(id=1, price=10), Price(id=2, price=20), Price(id=3, price=30)])
+        db.execute(text("UPDATE books SET price_id = 1 WHERE id = 4"))
+        assert assign_price_ids(db, Book, Price) == 3
+        db.commit()
+
+        # (id % 3) + 1, except the book that already had a price
+        assert db.execute(select(Book.id, Book.price_id).order_by(Book.id)).all() == [(1, 2), (2, 3), (3, 1), (4, 1)]
+        assert assign_price_ids(db, Book, Price) == 0
+
+
+def test_assign_price_ids_without_prices_is_a_no_op(engine):
+    add_missing_columns(engine, Book, Price)
+    with Session(engine) as db:
+        assert assign_price_ids(db, Book, Price) == 0
+        assert db.scalars(select(Book.price_id)).all() == [None] * 4
+
+
+def test_get_price_reads_the_materialized_price_id(client):
+    client.post("/amazon/admin/cache/invalidate").raise_for_status()
+    # The book and its price row; no COUNT(*) over the price table
+    assert_queries(client, "GET", "/amazon/get_price?id=3", 2)
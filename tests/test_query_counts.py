@@ -0,0 +1,24 @@
+from tests.helpers import assert_queries
+
+
+def invalidate_caches(client):
+    client.post("/amazon/admin/cache/invalidate").raise_for_status()
+
+
+def test_get_discount_cold_runs_one_query_per_table(client):
+    invalidate_caches(client)
+    # The book, its price and the discount tiers
+    response = assert_queries(client, "POST", "/amazon/get_discount?id=1&quantity=3", 3)
+    assert response.status_code == 200
+
+
+def test_get_discount_reuses_cached_tiers(client):
+    invalidate_caches(client)
+    assert_queries(client, "POST", "/amazon/get_discount?id=1&quantity=3", 3)
+    assert_queries(client, "POST", "/amazon/get_discount?id=2&quantity=3", 2)
+
+
+def test_get_discount_repeated_is_served_from_cache(client):
+    invalidate_caches(client)
+    assert_queries(client, "POST", "/amazon/get_discount?id=1&quantity=3", 3)
+    assert_queries(client, "POST", "/amazon/get_discount?id=1&quantity=3", 0)
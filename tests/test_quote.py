@@ -0,0 +1,41 @@
+import pytest
+
+from tests.helpers import assert_queries
+
+
+@pytest.mark.parametrize("store", ["amazon", "flipkart", "sapna"])
+def test_quote_lines_match_get_discount(client, store):
+    quote = client.post(f"/{store}/quote", json={"lines": [{"id": 1, "quantity": 3}, {"id": 2, "quantity": 1}]}).json()
+    for line in quote["lines"]:
+        single = client.post(f"/{store}/get_discount", params={"id": line["id"], "quantity": line["quantity"]}).json()
+        assert line["line_total"] == single["total_price"]
+        assert line["discount_percent"] == single["discount_percent"]
+        assert line["payable_amount"] == single["payable_amount"]
+
+    # Totals are rounded once, not summed from the rounded line amounts
+    assert quote["subtotal"] == pytest.approx(sum(line["line_total"] for line in quote["lines"]), abs=0.01)
+    assert quote["payable_amount"] == pytest.approx(quote["subtotal"] - quote["reduced_amount"], abs=0.01)
+    assert quote["payable_if_bought_separately"] == pytest.approx(sum(line["payable_amount"] for line in quote["lines"]), abs=0.01)
+
+
+def test_quote_leaves_unpriced_lines_out_of_the_totals(client):
+    quote = client.post("/amazon/quote", json={"lines": [{"id": 1, "quantity": 2}, {"id": 999999, "quantity": 1}]}).json()
+    assert [line["error"] for line in quote["lines"]] == [None, "Product not found"]
+    assert quote["subtotal"] == quote["lines"][0]["line_total"]
+
+
+def test_quote_runs_a_constant_number_of_queries(client):
+    client.post("/amazon/admin/cache/invalidate").raise_for_status()
+    # Books, prices and discount tiers, however many lines
+    lines = [{"id": id, "quantity": 1} for id in range(1, 11)]
+    assert_queries(client, "POST", "/amazon/quote", 3, json={"lines": lines})
+
+
+def test_quote_validates_lines(client):
+    assert client.post("/amazon/quote", json={"lines": []}).status_code == 400
+    assert client.post("/amazon/quote", json={"lines": [{"id": 1, "quantity": 0}]}).status_code == 422
+
+
+@pytest.mark.parametrize("quantity", [0, -3])
+def test_get_discount_rejects_non_positive_quantities(client, quantity):
+    assert client.post("/amazon/get_discount", params={"id": 1, "quantity": quantity}).status_code == 422
@@ -0,0 +1,61 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from app.responses import FastJSONResponse, encode_json
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+    created_at: datetime
+    price: Optional[float] = None
+
+
+class Other(BaseModel):
+    id: int
+
+
+ITEMS = [Item(id=i, name=f"Book {i}", created_at=datetime(2024, 1, 2, 3, 4, 5)) for i in range(3)]
+
+
+def test_encode_json_matches_jsonable_encoder():
+    content = {
+        "items": ITEMS,
+        "price": Decimal("12.50"),
+        "count": Decimal("3"),
+        "tags": {"py"},
+        "when": datetime(2024, 1, 2, 3, 4, 5),
+        "nothing": None,
+    }
+    assert json.loads(encode_json(content)) == jsonable_encoder(content)
+
+
+def test_encode_json_writes_models_and_model_lists_directly():
+    assert json.loads(encode_json(ITEMS[0])) == jsonable_encoder(ITEMS[0])
+    assert json.loads(encode_json(ITEMS)) == jsonable_encoder(ITEMS)
+    # Mixed lists go through orjson item by item
+    mixed = [ITEMS[0], Other(id=9)]
+    assert json.loads(encode_json(mixed)) == jsonable_encoder(mixed)
+
+
+def test_encode_json_accepts_non_string_keys():
+    assert json.loads(encode_json({1: "a"})) == {"1": "a"}
+
+
+def test_fast_json_response_renders_with_encode_json():
+    response = FastJSONResponse({"items": ITEMS})
+    assert response.media_type == "application/json"
+    assert response.body == encode_json({"items": ITEMS})
+
+
+def test_root_payloads_are_served_pre_encoded(client):
+    for path in ("/", "/amazon/", "/flipkart/", "/sapna/"):
+        response = client.get(path)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert "message" in response.json()
@@ -0,0 +1,49 @@
+import sys
+from collections import namedtuple
+
+from app import suggest
+from app.fuzzy_search import TrigramIndex
+from app.suggest import SuggestIndex
+
+Book = namedtuple("Book", ["id", "name", "publisher", "subject_code"])
+
+
+def test_suggest_ranks_every_match(monkeypatch):
+    monkeypatch.setattr(suggest, "MEMO_PREFIX_LEN", 0)
+    index = SuggestIndex()
+    books = [Book(i, f"Learning Paint {i:04d}", None, None) for i in range(1, 700)]
+    index.load(books + [Book(700, "Python Crash Course", None, None)])
+
+    # Inner-word matches ("paint ...") sort before it alphabetically, but
+    # whole-value matches rank first
+    assert index.suggest("p", 5)[0] == {"text": "Python Crash Course", "field": "name", "books": 1}
+
+
+def test_suggest_follows_adds_and_removes():
+    index = SuggestIndex()
+    index.load([Book(1, "Deep Learning", "MIT Press", "aiml")])
+    index.add(Book(2, "Learning Python", "O'Reilly Media", "py"))
+    assert [s["text"] for s in index.suggest("learn")] == ["Learning Python", "Deep Learning"]
+
+    index.remove(2)
+    assert [s["text"] for s in index.suggest("learn")] == ["Deep Learning"]
+    assert index.suggest("o'reilly") == []
+
+
+def test_trigram_remove_drops_postings():
+    index = TrigramIndex()
+    index.load([Book(1, "Deep Learning", None, None), Book(2, "Python Crash Course", None, None)])
+    index.remove(1)
+    index.add(Book(2, "Fluent Python", None, None))
+
+    assert all(1 not in postings and list(postings).count(2) <= 1 for postings in index._postings.values())
+    assert index.search("deep learning") == []
+    assert index.search("fluent pyhton")[0]["id"] == 2
+
+
+def test_suggest_prefix_at_the_last_code_point():
+    index = SuggestIndex()
+    top = chr(sys.maxunicode)
+    index.load([Book(1, "a" + top, None, None), Book(2, "b", None, None)])
+    assert [s["text"] for s in index.suggest("a" + top)] == ["a" + top]
+    assert index.suggest(top) == []
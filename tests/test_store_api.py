@@ -0,0 +1,45 @@
+import sys
+
+import pytest
+
+from app.titles import prefix_bounds
+
+
+@pytest.mark.parametrize("store", ["amazon", "flipkart", "sapna"])
+def test_stock_by_id_takes_an_integer_id(client, store):
+    response = client.post(f"/{store}/stock_by_id", params={"id": 1})
+    assert response.status_code == 200
+    assert isinstance(response.json(), int)
+
+    assert client.post(f"/{store}/stock_by_id", params={"id": "1 OR 1=1"}).status_code == 422
+
+
+@pytest.mark.parametrize("method, url", [
+    ("POST", "/amazon/stock_by_id?id=0"),
+    ("POST", "/amazon/get_discount?id=0&quantity=1"),
+    ("POST", "/amazon/admin/inventory/restock?id=0&quantity=1"),
+    ("GET", "/amazon/id_or_name?id=0"),
+    ("GET", "/amazon/get_price?id=0"),
+])
+def test_book_id_zero_is_not_found(client, method, url):
+    assert client.request(method, url).status_code == 404
+
+
+
+def test_prefix_bounds_handle_the_last_code_point():
+    top = chr(sys.maxunicode)
+    assert prefix_bounds("ab") == ("ab", "ac")
+    assert prefix_bounds("a" + top) == ("a" + top, "b")
+    assert prefix_bounds(top) == (top, None)
+
+
+@pytest.mark.parametrize("prefix", ["\U0010ffff", "z\U0010ffff"])
+def test_search_by_prefix_at_the_last_code_point(client, prefix):
+    response = client.get("/amazon/search_by_prefix", params={"prefix": prefix})
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_suggest_at_the_last_code_point(client):
+    response = client.get("/amazon/suggest", params={"q": "\U0010ffff"})
+    assert response.status_code == 200
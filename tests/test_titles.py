@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine, select, text
+from sqlalchemy.orm import Session, declarative_base
+
+from app.titles import backfill_normalized_titles, keep_normalized_title, normalize_title
+
+Base = declarative_base()
+
+
+class Book(Base):
+    __tablename__ = "books"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100))
+    name_normalized = Column(String(100), index=True)
+
+
+keep_normalized_title(Book)
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/titles.db")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        yield db
+    engine.dispose()
+
+
+def test_normalize_title():
+    assert normalize_title("  Effective \t JAVA\n") == "effective java"
+    assert normalize_title("Straße") == "strasse"
+
+
+def test_writes_keep_the_normalized_title(db):
+    book = Book(id=1, name="Deep  Learning")
+    db.add(book)
+    db.flush()
+    assert book.name_normalized == "deep learning"
+
+    book.name = "Deep Learning, 2nd Edition"
+    db.flush()
+    assert db.scalar(select(Book.name_normalized)) == "deep learning, 2nd edition"
+
+
+def test_backfill_fills_rows_written_without_it(db):
+    db.execute(text("INSERT INTO books (id, name) VALUES (1, 'Fluent  Python'), (2, 'Clean Code')"))
+    assert backfill_normalized_titles(db, Book, batch_size=1) == 2
+    assert db.scalars(select(Book.name_normalized).order_by(Book.id)).all() == ["fluent python", "clean code"]
+    assert backfill_normalized_titles(db, Book) == 0
+
+
+@pytest.mark.parametrize("store", ["amazon", "flipkart", "sapna"])
+def test_name_lookups_ignore_case_and_spacing(client, store):
+    response = client.get(f"/{store}/id_or_name", params={"name": "  python   CRASH course "})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Python Crash Course"
+    assert client.get(f"/{store}/get_price", params={"book_name": "PYTHON CRASH COURSE"}).status_code == 200
+
+
+def test_search_by_prefix(client):
+    books = client.get("/amazon/search_by_prefix", params={"prefix": " PYTHON ", "limit": 50}).json()
+    names = [book["name"] for book in books]
+    assert names and all(normalize_title(name).startswith("python") for name in names)
+    assert names == sorted(names, key=normalize_title)
+
+    assert len(client.get("/amazon/search_by_prefix", params={"prefix": "p", "limit": 1}).json()) == 1
+    assert client.get("/amazon/search_by_prefix", params={"prefix": "   "}).status_code == 400